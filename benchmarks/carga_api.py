@@ -0,0 +1,424 @@
+"""
+Benchmark de carga da API do flask_server.
+
+Gera uma base sintética (usuarios.json no formato antigo), sobe o
+flask_server/app.py numa porta local com essa base e dispara uma mistura
+de requisições (login, ranking, perfil, nova atividade, termos) de várias
+threads ao mesmo tempo. No fim imprime um JSON com vazão e latências
+p50/p95/p99 por rota.
+
+Só usa a biblioteca padrão e roda offline. Exemplos:
+
+    python benchmarks/carga_api.py --usuarios 1000
+    python benchmarks/carga_api.py --usuarios 10000 --backend memoria --duracao 60
+    python benchmarks/carga_api.py --usuarios 100000 --dados /tmp/eco100k --saida r.json
+
+Com --dados a base gerada fica nessa pasta e é reaproveitada nas próximas
+execuções (importar 100k usuários demora); sem --dados usa uma pasta
+temporária que é apagada no fim.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+from datetime import datetime, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_SERVIDOR = os.path.join(RAIZ, 'flask_server')
+
+CATEGORIAS = [
+    'Energia', 'Água', 'Mobilidade', 'Resíduos', 'Alimentação',
+    'Consumo Consciente', 'Bem-estar', 'Educação Ambiental', 'Tecnologia Verde'
+]
+
+PALAVRAS = [
+    'banho', 'rapido', 'bicicleta', 'onibus', 'reciclei', 'lampada', 'led',
+    'garrafa', 'compostagem', 'horta', 'feira', 'carona', 'desliguei', 'torneira',
+    'sacola', 'vidro', 'papel', 'plastico', 'solar', 'caminhada'
+]
+
+# Peso de cada operação na mistura padrão (proporção aproximada das
+# chamadas que o cliente faz numa sessão normal)
+MISTURA_PADRAO = {
+    'login': 5,
+    'ranking': 20,
+    'usuario': 35,
+    'atividade': 25,
+    'termos_get': 10,
+    'termos_post': 5,
+}
+
+
+# ---------------- base sintética ----------------
+
+def gerar_usuario(rnd, indice, historico_medio, inicio):
+    """
+    Um usuário no formato do antigo usuarios.json, com histórico de
+    tamanho aleatório (média historico_medio) espalhado desde 'inicio'.
+    """
+    categorias = {nome: {'pontos': 0, 'meta': 100, 'nivel': 1} for nome in CATEGORIAS}
+    historico = []
+    for _ in range(int(rnd.expovariate(1 / historico_medio)) if historico_medio else 0):
+        categoria = rnd.choice(CATEGORIAS)
+        pontos = rnd.randint(1, 30)
+        categorias[categoria]['pontos'] += pontos
+        historico.append({
+            'id': str(uuid.UUID(int=rnd.getrandbits(128))),
+            'data': (inicio + timedelta(seconds=rnd.randint(0, 365 * 86400))).isoformat(),
+            'categoria': categoria,
+            'descricao': ' '.join(rnd.sample(PALAVRAS, 4)),
+            'pontos': pontos
+        })
+
+    termos = {}
+    for categoria in rnd.sample(CATEGORIAS, 2):
+        termos[categoria] = {palavra: {'contagem': rnd.randint(1, 5), 'peso': 1.0}
+                             for palavra in rnd.sample(PALAVRAS, 5)}
+
+    return {
+        'id': str(uuid.UUID(int=rnd.getrandbits(128))),
+        'nome': f'Usuário {indice}',
+        'email': f'usuario{indice}@bench.local',
+        'senha': f'senha{indice}',
+        'nivel': 1,
+        'pontuacao_total': sum(cat['pontos'] for cat in categorias.values()),
+        'categorias': categorias,
+        'historico': historico,
+        'termos_aprendidos': termos,
+        'data_criacao': inicio.isoformat()
+    }
+
+
+def gerar_base(pasta, quantidade, historico_medio, semente):
+    """
+    Grava pasta/usuarios.json usuário por usuário (sem montar o dict
+    inteiro na memória). Retorna a lista de (id, email, senha).
+    """
+    rnd = random.Random(semente)
+    inicio = datetime(2025, 1, 1)
+    credenciais = []
+    with open(os.path.join(pasta, 'usuarios.json'), 'w', encoding='utf-8') as f:
+        f.write('{')
+        for i in range(quantidade):
+            usuario = gerar_usuario(rnd, i, historico_medio, inicio)
+            credenciais.append((usuario['id'], usuario['email'], usuario['senha']))
+            f.write((',' if i else '') + json.dumps(usuario['id']) + ':'
+                    + json.dumps(usuario, ensure_ascii=False))
+        f.write('}')
+    return credenciais
+
+
+def preparar_dados(pasta, quantidade, historico_medio, semente):
+    """
+    Gera a base se a pasta ainda não tem uma com os mesmos parâmetros.
+    Retorna a lista de credenciais (id, email, senha).
+    """
+    caminho_meta = os.path.join(pasta, 'bench.json')
+    parametros = {'usuarios': quantidade, 'historico_medio': historico_medio, 'semente': semente}
+    if os.path.exists(caminho_meta):
+        with open(caminho_meta, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['parametros'] == parametros:
+            return [tuple(c) for c in meta['credenciais']]
+        # Parâmetros diferentes: começa a pasta do zero
+        shutil.rmtree(pasta)
+
+    os.makedirs(pasta, exist_ok=True)
+    print(f"Gerando {quantidade} usuários em {pasta}...", file=sys.stderr)
+    credenciais = gerar_base(pasta, quantidade, historico_medio, semente)
+    with open(caminho_meta, 'w', encoding='utf-8') as f:
+        json.dump({'parametros': parametros, 'credenciais': credenciais}, f)
+    return credenciais
+
+
+# ---------------- servidor ----------------
+
+def iniciar_servidor(pasta, porta, backend, timeout):
+    """
+    Sobe o app.py num subprocesso e espera ele responder.
+    Na primeira vez o servidor importa o usuarios.json da pasta.
+    """
+    env = dict(os.environ,
+               ECOSCORE_DADOS=pasta,
+               ECOSCORE_PORTA=str(porta),
+               ECOSCORE_DEBUG='0',
+               ECOSCORE_ARMAZENAMENTO=backend)
+    processo = subprocess.Popen([sys.executable, 'app.py'], cwd=PASTA_SERVIDOR, env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError(f"O servidor saiu com código {processo.returncode}")
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{porta}/api/ranking?limit=1', timeout=1).read()
+            return processo
+        except OSError:
+            time.sleep(0.2)
+
+    parar_servidor(processo)
+    raise RuntimeError(f"O servidor não respondeu em {timeout}s")
+
+
+def parar_servidor(processo):
+    processo.terminate()
+    try:
+        processo.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        processo.kill()
+        processo.wait()
+
+
+# ---------------- carga ----------------
+
+class Cliente:
+    """
+    Uma conexão HTTP persistente (keep-alive) por thread.
+    """
+
+    def __init__(self, porta):
+        self.porta = porta
+        self.conexao = None
+
+    def requisitar(self, metodo, caminho, corpo=None):
+        """
+        Retorna o status HTTP, ou None se a conexão falhou.
+        """
+        cabecalhos = {}
+        dados = None
+        if corpo is not None:
+            dados = json.dumps(corpo).encode('utf-8')
+            cabecalhos['Content-Type'] = 'application/json'
+
+        for tentativa in range(2):
+            if self.conexao is None:
+                self.conexao = http.client.HTTPConnection('127.0.0.1', self.porta, timeout=30)
+            try:
+                self.conexao.request(metodo, caminho, body=dados, headers=cabecalhos)
+                resposta = self.conexao.getresponse()
+                resposta.read()
+                if resposta.getheader('Connection', '').lower() == 'close':
+                    self.fechar()
+                return resposta.status
+            except (OSError, http.client.HTTPException):
+                # Servidor fechou a conexão ociosa: reconecta uma vez
+                self.fechar()
+        return None
+
+    def fechar(self):
+        if self.conexao is not None:
+            self.conexao.close()
+            self.conexao = None
+
+
+def montar_operacao(rnd, nome, credenciais):
+    """
+    Retorna (metodo, caminho, corpo) de uma operação da mistura.
+    """
+    user_id, email, senha = rnd.choice(credenciais)
+    if nome == 'login':
+        return 'POST', '/api/login', {'email': email, 'senha': senha}
+    if nome == 'ranking':
+        return 'GET', '/api/ranking?limit=100', None
+    if nome == 'usuario':
+        return 'GET', f'/api/usuarios/{user_id}', None
+    if nome == 'atividade':
+        return 'POST', f'/api/usuarios/{user_id}/atividades', {
+            'categoria': rnd.choice(CATEGORIAS),
+            'descricao': ' '.join(rnd.sample(PALAVRAS, 4)),
+            'pontos': rnd.randint(1, 30)
+        }
+    if nome == 'termos_get':
+        return 'GET', f'/api/usuarios/{user_id}/termos', None
+    if nome == 'termos_post':
+        return 'POST', f'/api/usuarios/{user_id}/termos', {
+            'categoria': rnd.choice(CATEGORIAS),
+            'termos': {palavra: {'contagem': 1, 'peso': 1.0} for palavra in rnd.sample(PALAVRAS, 3)}
+        }
+    raise ValueError(f"Operação desconhecida: {nome}")
+
+
+def trabalhador(porta, credenciais, mistura, semente, inicio_medicao, fim, resultados):
+    """
+    Dispara requisições até 'fim'. Só guarda as que começaram depois de
+    inicio_medicao (antes disso é aquecimento).
+    resultados: {operacao: {'latencias': [...], 'erros': n}}
+    """
+    rnd = random.Random(semente)
+    nomes = list(mistura)
+    pesos = [mistura[nome] for nome in nomes]
+    cliente = Cliente(porta)
+    local = {nome: {'latencias': [], 'erros': 0} for nome in nomes}
+
+    while True:
+        antes = time.perf_counter()
+        if antes >= fim:
+            break
+        nome = rnd.choices(nomes, pesos)[0]
+        metodo, caminho, corpo = montar_operacao(rnd, nome, credenciais)
+        status = cliente.requisitar(metodo, caminho, corpo)
+        depois = time.perf_counter()
+        if antes < inicio_medicao:
+            continue
+        if status is None or status >= 400:
+            local[nome]['erros'] += 1
+        else:
+            local[nome]['latencias'].append(depois - antes)
+
+    cliente.fechar()
+    resultados.append(local)
+
+
+def percentil(ordenados, p):
+    """
+    Percentil por posição mais próxima (ordenados já em ordem crescente).
+    """
+    if not ordenados:
+        return None
+    indice = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[indice]
+
+
+def resumir(latencias, erros, duracao):
+    ordenados = sorted(latencias)
+
+    def ms(valor):
+        return None if valor is None else round(valor * 1000, 3)
+
+    return {
+        'requisicoes': len(ordenados),
+        'erros': erros,
+        'vazao_rps': round(len(ordenados) / duracao, 1),
+        'p50_ms': ms(percentil(ordenados, 50)),
+        'p95_ms': ms(percentil(ordenados, 95)),
+        'p99_ms': ms(percentil(ordenados, 99)),
+        'max_ms': ms(ordenados[-1] if ordenados else None)
+    }
+
+
+def executar_carga(porta, credenciais, mistura, concorrencia, duracao, aquecimento, semente):
+    agora = time.perf_counter()
+    inicio_medicao = agora + aquecimento
+    fim = inicio_medicao + duracao
+    resultados = []
+    threads = [
+        threading.Thread(target=trabalhador,
+                         args=(porta, credenciais, mistura, semente + i, inicio_medicao, fim, resultados))
+        for i in range(concorrencia)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    rotas = {}
+    todas = []
+    erros_total = 0
+    for nome in mistura:
+        latencias = [lat for local in resultados for lat in local[nome]['latencias']]
+        erros = sum(local[nome]['erros'] for local in resultados)
+        rotas[nome] = resumir(latencias, erros, duracao)
+        todas.extend(latencias)
+        erros_total += erros
+    return rotas, resumir(todas, erros_total, duracao)
+
+
+def ler_mistura(texto):
+    """
+    "usuario=50,ranking=50" -> {'usuario': 50, 'ranking': 50}
+    """
+    mistura = {}
+    for parte in texto.split(','):
+        nome, _, peso = parte.partition('=')
+        nome = nome.strip()
+        if nome not in MISTURA_PADRAO:
+            raise argparse.ArgumentTypeError(f"Operação desconhecida: {nome}")
+        mistura[nome] = float(peso or 1)
+    return mistura
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de carga da API do EcoScore')
+    parser.add_argument('--usuarios', type=int, default=1000,
+                        help='Quantidade de usuários na base sintética (ex: 1000, 10000, 100000)')
+    parser.add_argument('--historico-medio', type=int, default=20,
+                        help='Tamanho médio do histórico de cada usuário')
+    parser.add_argument('--backend', default='sqlite', choices=('sqlite', 'memoria'))
+    parser.add_argument('--dados', help='Pasta da base gerada (reaproveitada entre execuções)')
+    parser.add_argument('--porta', type=int, default=5055)
+    parser.add_argument('--concorrencia', type=int, default=8, help='Threads disparando requisições')
+    parser.add_argument('--duracao', type=float, default=20, help='Segundos de medição')
+    parser.add_argument('--aquecimento', type=float, default=3, help='Segundos antes de medir')
+    parser.add_argument('--mistura', type=ler_mistura, default=MISTURA_PADRAO,
+                        help='Pesos das operações, ex: "usuario=50,ranking=30,atividade=20"')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--timeout-inicio', type=float, default=600,
+                        help='Segundos esperando o servidor subir (inclui a importação)')
+    parser.add_argument('--saida', help='Arquivo pra gravar o JSON (padrão: stdout)')
+    args = parser.parse_args()
+
+    pasta_temporaria = None
+    pasta = args.dados
+    if not pasta:
+        pasta = pasta_temporaria = tempfile.mkdtemp(prefix='ecoscore-bench-')
+    pasta = os.path.abspath(pasta)
+    # Cada backend tem seus próprios arquivos; a base gerada é a mesma
+    pasta_backend = os.path.join(pasta, args.backend)
+
+    try:
+        credenciais = preparar_dados(pasta, args.usuarios, args.historico_medio, args.semente)
+        os.makedirs(pasta_backend, exist_ok=True)
+        caminho_json = os.path.join(pasta_backend, 'usuarios.json')
+        if not os.path.exists(caminho_json):
+            shutil.copy(os.path.join(pasta, 'usuarios.json'), caminho_json)
+
+        print(f"Iniciando servidor ({args.backend})...", file=sys.stderr)
+        inicio = time.perf_counter()
+        servidor = iniciar_servidor(pasta_backend, args.porta, args.backend, args.timeout_inicio)
+        tempo_inicio = time.perf_counter() - inicio
+        try:
+            print(f"Medindo por {args.duracao}s com {args.concorrencia} threads...", file=sys.stderr)
+            rotas, total = executar_carga(args.porta, credenciais, args.mistura, args.concorrencia,
+                                          args.duracao, args.aquecimento, args.semente)
+        finally:
+            parar_servidor(servidor)
+    finally:
+        if pasta_temporaria:
+            shutil.rmtree(pasta_temporaria, ignore_errors=True)
+
+    relatorio = {
+        'configuracao': {
+            'usuarios': args.usuarios,
+            'historico_medio': args.historico_medio,
+            'backend': args.backend,
+            'concorrencia': args.concorrencia,
+            'duracao_s': args.duracao,
+            'aquecimento_s': args.aquecimento,
+            'mistura': args.mistura,
+            'semente': args.semente,
+            'python': sys.version.split()[0],
+            'data': datetime.now().isoformat(timespec='seconds')
+        },
+        'inicio_servidor_s': round(tempo_inicio, 2),
+        'rotas': rotas,
+        'total': total
+    }
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+    else:
+        print(texto)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+Benchmark de serialização e compressão das respostas da API.
+
+Usa a mesma base sintética do carga_api.py, carrega o flask_server/app.py
+no próprio processo (cliente de teste do Flask, sem rede) e mede, para
+/usuarios/<id>, /historico e /ranking, os bytes de cada resposta e o
+tempo de CPU por requisição em cada combinação de:
+- codificador: json (biblioteca padrão) ou orjson (se instalado)
+- compressão: sem (Accept-Encoding: identity) ou gzip
+
+A economia é calculada contra json sem compressão. Exemplos:
+
+    python benchmarks/serializacao_api.py --usuarios 1000
+    python benchmarks/serializacao_api.py --historico-medio 500 --repeticoes 500 --saida s.json
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from carga_api import PASTA_SERVIDOR, preparar_dados  # noqa: E402
+
+ROTAS = {
+    'usuario': '/api/usuarios/{id}',
+    'historico': '/api/usuarios/{id}/historico?limit=500',
+    'ranking': '/api/ranking?limit=500',
+}
+
+COMPRESSOES = {'sem': 'identity', 'gzip': 'gzip'}
+
+
+def carregar_app(pasta, backend):
+    """
+    Importa o app.py com a base da pasta (na primeira vez importa o
+    usuarios.json, como o servidor faria).
+    """
+    os.environ.update(ECOSCORE_DADOS=pasta, ECOSCORE_ARMAZENAMENTO=backend)
+    sys.path.insert(0, PASTA_SERVIDOR)
+    import app
+    return app
+
+
+def medir(cliente, caminhos, accept_encoding, repeticoes):
+    """
+    Faz 'repeticoes' GETs passando pelos caminhos em rodízio.
+    Retorna (bytes médios por resposta, ms de CPU por requisição).
+    """
+    cabecalhos = {'Accept-Encoding': accept_encoding}
+    for caminho in caminhos[:5]:  # aquecimento (caches, conexões do sqlite)
+        cliente.get(caminho, headers=cabecalhos)
+
+    total_bytes = 0
+    inicio = time.process_time()
+    for i in range(repeticoes):
+        resposta = cliente.get(caminhos[i % len(caminhos)], headers=cabecalhos)
+        if resposta.status_code != 200:
+            raise RuntimeError(f"{caminhos[i % len(caminhos)]} -> {resposta.status_code}")
+        total_bytes += len(resposta.get_data())
+    cpu = time.process_time() - inicio
+    return total_bytes / repeticoes, cpu * 1000 / repeticoes
+
+
+def executar(app, ids, repeticoes, rodadas):
+    """
+    Mede cada combinação 'rodadas' vezes, intercaladas, e fica com o
+    menor tempo de CPU (o menos afetado por ruído da máquina).
+    """
+    from armazenamento import serializacao
+
+    codificadores = ['json'] + (['orjson'] if serializacao.USANDO_ORJSON else [])
+    orjson_original = serializacao.orjson
+    cliente = app.app.test_client()
+
+    rotas = {}
+    for nome, modelo in ROTAS.items():
+        caminhos = [modelo.format(id=user_id) for user_id in ids]
+        variantes = {}
+        for _ in range(rodadas):
+            for codificador in codificadores:
+                # Sem o módulo, codificar_json cai no json da biblioteca padrão
+                serializacao.orjson = orjson_original if codificador == 'orjson' else None
+                for compressao, accept_encoding in COMPRESSOES.items():
+                    media_bytes, cpu_ms = medir(cliente, caminhos, accept_encoding, repeticoes)
+                    chave = f'{codificador}+{compressao}'
+                    anterior = variantes.get(chave)
+                    if anterior is None or cpu_ms < anterior['cpu_ms']:
+                        variantes[chave] = {'bytes': round(media_bytes), 'cpu_ms': round(cpu_ms, 3)}
+        serializacao.orjson = orjson_original
+
+        base = variantes['json+sem']
+        for resultado in variantes.values():
+            resultado['bytes_economizados_pct'] = round(100 * (1 - resultado['bytes'] / base['bytes']), 1)
+            resultado['cpu_economizada_pct'] = round(100 * (1 - resultado['cpu_ms'] / base['cpu_ms']), 1)
+        rotas[nome] = variantes
+    return rotas
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bytes e CPU das respostas da API do EcoScore')
+    parser.add_argument('--usuarios', type=int, default=1000,
+                        help='Quantidade de usuários na base sintética')
+    parser.add_argument('--historico-medio', type=int, default=200,
+                        help='Tamanho médio do histórico de cada usuário')
+    parser.add_argument('--backend', default='sqlite', choices=('sqlite', 'memoria'))
+    parser.add_argument('--dados', help='Pasta da base gerada (reaproveitada entre execuções)')
+    parser.add_argument('--repeticoes', type=int, default=200,
+                        help='Requisições medidas por rota e combinação')
+    parser.add_argument('--rodadas', type=int, default=3,
+                        help='Vezes que cada combinação é medida (vale a melhor)')
+    parser.add_argument('--amostra', type=int, default=50,
+                        help='Quantos usuários diferentes consultar (os de maior histórico)')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', help='Arquivo pra gravar o JSON (padrão: stdout)')
+    args = parser.parse_args()
+
+    pasta_temporaria = None
+    pasta = args.dados
+    if not pasta:
+        pasta = pasta_temporaria = tempfile.mkdtemp(prefix='ecoscore-bench-')
+    pasta = os.path.abspath(pasta)
+    pasta_backend = os.path.join(pasta, args.backend)
+
+    try:
+        credenciais = preparar_dados(pasta, args.usuarios, args.historico_medio, args.semente)
+        os.makedirs(pasta_backend, exist_ok=True)
+        caminho_json = os.path.join(pasta_backend, 'usuarios.json')
+        if not os.path.exists(caminho_json):
+            shutil.copy(os.path.join(pasta, 'usuarios.json'), caminho_json)
+
+        print(f"Carregando a API ({args.backend})...", file=sys.stderr)
+        app = carregar_app(pasta_backend, args.backend)
+        try:
+            # Usuários com mais histórico: onde o tamanho da resposta pesa
+            ids = sorted((user_id for user_id, _, _ in credenciais),
+                         key=lambda user_id: -len(app.store.obter_historico(user_id)))[:args.amostra]
+            print(f"Medindo {args.repeticoes} requisições por rota e combinação...", file=sys.stderr)
+            rotas = executar(app, ids, args.repeticoes, args.rodadas)
+        finally:
+            app.store.fechar()
+    finally:
+        if pasta_temporaria:
+            shutil.rmtree(pasta_temporaria, ignore_errors=True)
+
+    relatorio = {
+        'configuracao': {
+            'usuarios': args.usuarios,
+            'historico_medio': args.historico_medio,
+            'backend': args.backend,
+            'repeticoes': args.repeticoes,
+            'rodadas': args.rodadas,
+            'amostra': args.amostra,
+            'gzip_tamanho_minimo': app.GZIP_TAMANHO_MINIMO,
+            'gzip_nivel': app.GZIP_NIVEL,
+            'semente': args.semente,
+            'python': sys.version.split()[0],
+            'data': datetime.now().isoformat(timespec='seconds')
+        },
+        'rotas': rotas
+    }
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+    else:
+        print(texto)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,42 +1,207 @@
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, request, make_response
 from flask_cors import CORS
-import json
+from contextlib import ExitStack
+import gzip
 import os
-from datetime import datetime
+from datetime import date, datetime, timedelta
 import uuid
 
+from armazenamento import (ConflitoDeVersao, EmailJaCadastrado, TravasPorUsuario,
+                           codificar_json, criar_armazenamento, importar_json)
+from niveis import RegraNivel
+from pontuacao import ServicoPontuacao, carregar_vocabulario
+from ranking import Ranking
+from termos_globais import IndiceTermos
+
 app = Flask(__name__)
-CORS(app)  # Habilita CORS para todas as rotas
+# Habilita CORS para todas as rotas (e deixa o navegador ler nossos cabeçalhos extras)
+CORS(app, expose_headers=['ETag', 'X-Total-Count', 'X-Proximo-Cursor'])
 
-# Caminho do arquivo de dados
-DATA_FILE = 'data/usuarios.json'
+# Pasta e arquivos de dados (ECOSCORE_DADOS troca a pasta, ex: nos benchmarks)
+DATA_DIR = os.environ.get('ECOSCORE_DADOS', 'data')
+DATA_FILE = os.path.join(DATA_DIR, 'usuarios.json')  # formato antigo (só para importação)
 
-def carregar_usuarios():
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return {}
-    return {}
+# Backend de armazenamento: 'sqlite' ou 'memoria' (journal + snapshots)
+STORAGE_BACKEND = os.environ.get('ECOSCORE_ARMAZENAMENTO', 'sqlite')
+
+OPCOES_BACKEND = {}
+if STORAGE_BACKEND == 'memoria':
+    OPCOES_BACKEND = {
+        'intervalo_compactacao': int(os.environ.get('ECOSCORE_COMPACTACAO_SEGUNDOS', 60)),
+        'max_registros_journal': int(os.environ.get('ECOSCORE_COMPACTACAO_REGISTROS', 1000)),
+        'fsync': os.environ.get('ECOSCORE_FSYNC', '0') == '1'
+    }
+
+# Cria o diretório de dados se não existir
+os.makedirs(DATA_DIR, exist_ok=True)
+store = criar_armazenamento(STORAGE_BACKEND, DATA_DIR, **OPCOES_BACKEND)
+
+# Na primeira execução com o backend novo, traz os usuários do JSON antigo
+if not store.listar_usuarios() and os.path.exists(DATA_FILE):
+    importar_json(store, DATA_FILE)
+
+# Ranking em memória, atualizado a cada mudança de pontuação
+RANKING_LIMITE_PADRAO = 50
+RANKING_LIMITE_MAXIMO = 500
+
+ranking = Ranking()
+ranking.carregar(store.listar_usuarios())
+
+# Termos aprendidos de todos os usuários, por categoria (ver termos_globais.py)
+TERMOS_LIMITE_PADRAO = 20
+TERMOS_LIMITE_MAXIMO = 500
+
+indice_termos = IndiceTermos()
+indice_termos.carregar(store.obter_termos(u['id']) for u in store.listar_usuarios())
+
+# Nível geral: sobe um a cada ECOSCORE_PONTOS_POR_NIVEL pontos (ver niveis.py)
+regra_nivel = RegraNivel(int(os.environ.get('ECOSCORE_PONTOS_POR_NIVEL', 100)))
+
+# Quem decide os pontos de uma atividade: 'servidor' (padrão: calculados
+# pela descrição, com o mesmo motor do cliente) ou 'cliente' (aceita os
+# pontos enviados, ex: importações). ECOSCORE_VOCABULARIO aponta um JSON
+# com outro vocabulário; é lido uma vez só, aqui.
+PONTUACAO = os.environ.get('ECOSCORE_PONTUACAO', 'servidor')
+servico_pontuacao = ServicoPontuacao(store, carregar_vocabulario(os.environ.get('ECOSCORE_VOCABULARIO')))
+
+# Tamanho máximo de uma página do histórico
+HISTORICO_LIMITE_MAXIMO = 500
+
+# Máximo de atividades aceitas numa requisição de lote
+LOTE_TAMANHO_MAXIMO = 1000
+
+# Serializa o "lê-altera-grava" de um mesmo usuário; usuários diferentes rodam em paralelo
+travas = TravasPorUsuario()
+
+# Respostas a partir desse tamanho (bytes) vão com gzip pra quem aceita
+# (Accept-Encoding). Abaixo disso o gzip custa mais CPU do que economiza.
+# Nível 1: em JSON já reduz ~3/4 dos bytes, com bem menos CPU que o 6.
+GZIP_TAMANHO_MINIMO = int(os.environ.get('ECOSCORE_GZIP_MINIMO', 1024))
+GZIP_NIVEL = int(os.environ.get('ECOSCORE_GZIP_NIVEL', 1))
+
+def jsonify(dados):
+    """
+    Como o jsonify do Flask, mas com codificar_json (orjson se estiver
+    instalado) e sem espaços nem escapes de acentos.
+    """
+    return app.response_class(codificar_json(dados), mimetype='application/json')
+
+@app.after_request
+def comprimir_resposta(resposta):
+    if (resposta.direct_passthrough or resposta.status_code < 200 or resposta.status_code == 204
+            or resposta.status_code >= 300 or 'Content-Encoding' in resposta.headers):
+        return resposta
+    corpo = resposta.get_data()
+    if len(corpo) < GZIP_TAMANHO_MINIMO:
+        return resposta
+
+    resposta.vary.add('Accept-Encoding')
+    if request.accept_encodings['gzip'] <= 0:
+        return resposta
+    resposta.set_data(gzip.compress(corpo, compresslevel=GZIP_NIVEL))
+    resposta.headers['Content-Encoding'] = 'gzip'
+    # Corpo comprimido é outra representação: a ETag (versão) vira fraca,
+    # o que If-None-Match e If-Match já aceitam
+    etag = resposta.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        resposta.headers['ETag'] = 'W/' + etag
+    return resposta
+
+def versao_if_match():
+    """
+    Lê a versão enviada no cabeçalho If-Match (ex: If-Match: "3").
+    Retorna None se o cabeçalho não veio ou é '*'.
+    """
+    valor = request.headers.get('If-Match', '').strip()
+    if not valor or valor == '*':
+        return None
+    if valor.startswith('W/'):
+        valor = valor[2:]
+    valor = valor.strip('"')
+    try:
+        return int(valor)
+    except ValueError:
+        return -1  # nunca bate com uma versão real -> 409
+
+def parametro_inteiro(nome, padrao, minimo=0, maximo=None):
+    """
+    Lê um parâmetro inteiro da query string (?nome=valor).
+    Valores fora de [minimo, maximo] são ajustados pro limite mais próximo.
+    Levanta ValueError se o valor não for um número.
+    """
+    valor = request.args.get(nome)
+    if valor is None or valor == '':
+        return padrao
+    valor = max(minimo, int(valor))
+    if maximo is not None:
+        valor = min(maximo, valor)
+    return valor
+
+def parametro_data(nome):
+    """
+    Lê uma data ISO 8601 da query string (?nome=2025-10-01 ou com hora) e
+    devolve no formato em que as atividades guardam a data (datetime
+    isoformat, sem fuso), pra todos os backends compararem igual.
+    Levanta ValueError se não for uma data.
+    """
+    valor = request.args.get(nome)
+    if valor is None or valor == '':
+        return None
+    return datetime.fromisoformat(valor).replace(tzinfo=None).isoformat()
+
+# Campos do perfil "enxuto" devolvido pela API. O histórico sai só por
+# /historico, os termos por /termos, e a senha nunca sai.
+CAMPOS_PERFIL = ('id', 'nome', 'email', 'nivel', 'pontuacao_total',
+                 'categorias', 'data_criacao', 'versao')
+
+def perfil_usuario(usuario):
+    perfil = {campo: usuario[campo] for campo in CAMPOS_PERFIL if campo in usuario}
+    # Nível e faixas sempre pela regra do servidor (vale também pra dados antigos)
+    perfil.update(regra_nivel.progresso(usuario.get('pontuacao_total', 0)))
+    return perfil
+
+def responder_usuario(usuario, status=200):
+    # ETag com a versão atual, pra ser devolvida no If-Match do próximo PUT
+    return com_etag(make_response(jsonify(perfil_usuario(usuario)), status), usuario['versao'])
+
+def com_etag(resposta, etag):
+    resposta.headers['ETag'] = f'"{etag}"'
+    return resposta
 
-def salvar_usuarios(usuarios):
-    # Garante que o diretório existe
-    os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(usuarios, f, ensure_ascii=False, indent=2)
+def nao_modificado(etag):
+    """
+    GET condicional: se o If-None-Match do cliente já tem essa ETag,
+    devolve a resposta 304 (sem corpo); senão None.
+    """
+    if request.if_none_match.contains_weak(str(etag)):
+        return com_etag(make_response('', 304), etag)
+    return None
+
+def responder_conflito(user_id):
+    usuario = store.obter_usuario(user_id)
+    return jsonify({
+        'erro': 'O usuário foi alterado por outra requisição. Recarregue e tente de novo.',
+        'versao_atual': usuario['versao'] if usuario else None
+    }), 409
 
 # Rota para criar um novo usuário
+# (/api/cadastrar é o caminho que o cliente desktop usa)
 @app.route('/api/usuarios', methods=['POST'])
+@app.route('/api/cadastrar', methods=['POST'])
 def criar_usuario():
     dados = request.get_json()
-    usuarios = carregar_usuarios()
+    if not isinstance(dados, dict):
+        return jsonify({'sucesso': False, 'erro': 'O corpo deve ser um objeto JSON'}), 400
+    try:
+        validar_campos_usuario(dados)
+    except ValueError as e:
+        return jsonify({'sucesso': False, 'erro': str(e)}), 400
     
     # Gera um ID único para o usuário
     user_id = str(uuid.uuid4())
     
     # Cria a estrutura básica do usuário
-    usuarios[user_id] = {
+    usuario = {
         'id': user_id,
         'nome': dados.get('nome', 'Usuário'),
         'email': dados.get('email', ''),
@@ -59,159 +224,784 @@ def criar_usuario():
         'data_criacao': datetime.now().isoformat()
     }
     
-    salvar_usuarios(usuarios)
-    return jsonify({'sucesso': True, 'usuario_id': user_id, 'usuario': usuarios[user_id]}), 201
+    try:
+        store.criar_usuario(usuario)
+    except EmailJaCadastrado:
+        return jsonify({'sucesso': False, 'erro': 'Email já cadastrado'}), 409
+    ranking.atualizar(usuario)
+    return jsonify({'sucesso': True, 'usuario_id': user_id, 'usuario': perfil_usuario(usuario)}), 201
 
 # Rota para autenticar usuário
 @app.route('/api/login', methods=['POST'])
 def login():
     dados = request.get_json()
-    usuarios = carregar_usuarios()
+    if not isinstance(dados, dict) or not isinstance(dados.get('email'), str):
+        return jsonify({'sucesso': False, 'erro': 'Credenciais inválidas'}), 401
     
-    for user_id, usuario in usuarios.items():
-        if (usuario.get('email') == dados.get('email') and 
-            usuario.get('senha') == dados.get('senha')):  # Em produção, use verificação de hash
-            return jsonify({'sucesso': True, 'usuario_id': user_id, 'usuario': usuario})
+    # Busca direta pelo índice de emails
+    user_id = store.obter_id_por_email(dados['email'])
+    usuario = store.obter_usuario(user_id) if user_id else None
+    if usuario and usuario.get('senha') == dados.get('senha'):  # Em produção, use verificação de hash
+        return jsonify({'sucesso': True, 'usuario_id': user_id, 'usuario': perfil_usuario(usuario)})
     
     return jsonify({'sucesso': False, 'erro': 'Credenciais inválidas'}), 401
 
 # Rota para obter dados do usuário
+# Aceita If-None-Match com a ETag recebida antes: se o usuário não mudou,
+# responde 304 sem corpo (vale também pra /historico, /estatisticas e /termos).
 @app.route('/api/usuarios/<user_id>', methods=['GET'])
 def obter_usuario(user_id):
-    usuarios = carregar_usuarios()
-    if user_id in usuarios:
-        return jsonify(usuarios[user_id])
+    # Confere só a versão antes de montar o perfil
+    versao = store.obter_versao(user_id)
+    if versao is not None:
+        resposta = nao_modificado(versao)
+        if resposta:
+            return resposta
+    
+    usuario = store.obter_usuario(user_id)
+    if usuario is not None:
+        return responder_usuario(usuario)
     return jsonify({'erro': 'Usuário não encontrado'}), 404
 
 # Rota para atualizar dados do usuário
 @app.route('/api/usuarios/<user_id>', methods=['PUT'])
 def atualizar_usuario(user_id):
-    usuarios = carregar_usuarios()
-    if user_id not in usuarios:
+    if not store.existe_usuario(user_id):
         return jsonify({'erro': 'Usuário não encontrado'}), 404
     
     dados = request.get_json()
+    if not isinstance(dados, dict):
+        return jsonify({'erro': 'O corpo deve ser um objeto JSON'}), 400
+    versao_esperada = versao_if_match()
     
-    # Atualiza apenas os campos fornecidos
+    # Atualiza apenas os campos fornecidos. O nível não é aceito: ele
+    # segue a pontuação total (regra_nivel).
+    campos = {}
+    categorias = None
+    historico = None
+    termos_aprendidos = None
     for key, value in dados.items():
-        if key in ['nome', 'email', 'senha', 'nivel', 'pontuacao_total']:
-            usuarios[user_id][key] = value
+        if key in ['nome', 'email', 'senha', 'pontuacao_total']:
+            campos[key] = value
         elif key == 'categorias':
-            for cat_nome, cat_dados in value.items():
-                if cat_nome in usuarios[user_id]['categorias']:
-                    usuarios[user_id]['categorias'][cat_nome].update(cat_dados)
+            categorias = value
         elif key == 'historico':
-            usuarios[user_id]['historico'] = value
+            historico = value
         elif key == 'termos_aprendidos':
-            usuarios[user_id]['termos_aprendidos'] = value
-    
-    salvar_usuarios(usuarios)
-    return jsonify(usuarios[user_id])
+            termos_aprendidos = value
+    try:
+        validar_campos_usuario(campos)
+        if termos_aprendidos is not None:
+            if not isinstance(termos_aprendidos, dict):
+                raise ValueError('termos_aprendidos deve ser um objeto {categoria: termos}')
+            for termos in termos_aprendidos.values():
+                validar_termos(termos)
+        if categorias is not None:
+            validar_categorias(categorias, store.obter_usuario(user_id)['categorias'])
+        if historico is not None:
+            validar_historico(historico)
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    if 'pontuacao_total' in campos:
+        campos['nivel'] = regra_nivel.nivel(campos['pontuacao_total'])
+
+    with travas.travar(user_id):
+        termos_antes = store.obter_termos(user_id) if termos_aprendidos is not None else None
+        try:
+            store.atualizar_usuario(user_id, campos, categorias, historico, termos_aprendidos,
+                                    versao_esperada=versao_esperada)
+        except ConflitoDeVersao:
+            return responder_conflito(user_id)
+        except EmailJaCadastrado:
+            return jsonify({'erro': 'Email já cadastrado'}), 409
+        usuario = store.obter_usuario(user_id)
+        ranking.atualizar(usuario)
+        if termos_antes is not None:
+            indice_termos.atualizar(termos_antes, store.obter_termos(user_id))
+        return responder_usuario(usuario)
 
 # Rota para obter o ranking de usuários
+# Parâmetros opcionais:
+#   ?offset=0&limit=50        -> uma página do ranking
+#   ?around=<user_id>&radius=10 -> usuários em volta de um usuário
+# O total de usuários no ranking vai no cabeçalho X-Total-Count.
+# ETag/If-None-Match como em /api/usuarios/<id>, pela versão do ranking.
 @app.route('/api/ranking', methods=['GET'])
 def obter_ranking():
-    usuarios = carregar_usuarios()
+    try:
+        offset = parametro_inteiro('offset', 0)
+        limit = parametro_inteiro('limit', RANKING_LIMITE_PADRAO, 1, RANKING_LIMITE_MAXIMO)
+        radius = parametro_inteiro('radius', 10, 0, RANKING_LIMITE_MAXIMO // 2)
+    except ValueError:
+        return jsonify({'erro': 'offset, limit e radius devem ser números inteiros'}), 400
+    
+    # A ETag muda a cada mudança no ranking (ranking.versao); lida antes
+    # das linhas, então nunca é mais nova que o conteúdo
+    etag = f'r{ranking.versao}'
+    resposta = nao_modificado(etag)
+    if resposta:
+        return resposta
+    
+    around = request.args.get('around')
+    if around:
+        linhas = ranking.ao_redor(around, radius)
+        if linhas is None:
+            return jsonify({'erro': 'Usuário não encontrado'}), 404
+    else:
+        linhas = ranking.pagina(offset, limit)
+    
+    resposta = jsonify(linhas)
+    resposta.headers['X-Total-Count'] = str(ranking.total)
+    return com_etag(resposta, etag)
+
+def validar_textos(dados):
+    """
+    'descricao' e 'categoria' (opcionais) precisam ser texto, pro motor
+    de pontuação. Levanta ValueError se não forem.
+    """
+    for campo in ('descricao', 'categoria'):
+        if dados.get(campo) is not None and not isinstance(dados[campo], str):
+            raise ValueError(f'{campo} deve ser um texto')
+
+def validar_campos_usuario(campos):
+    """
+    nome, email e senha (os que vierem) precisam ser texto e
+    pontuacao_total um número. Levanta ValueError se não forem.
+    """
+    for campo in ('nome', 'email', 'senha'):
+        if campo in campos and not isinstance(campos[campo], str):
+            raise ValueError(f'{campo} deve ser um texto')
+    pontuacao = campos.get('pontuacao_total', 0)
+    if isinstance(pontuacao, bool) or not isinstance(pontuacao, (int, float)):
+        raise ValueError('pontuacao_total deve ser um número')
+
+def validar_termos(termos):
+    """
+    Termos de uma categoria, {termo: {contagem, peso}}: contagem inteira e
+    peso numérico (os dois opcionais). Levanta ValueError se não forem.
+    """
+    if not isinstance(termos, dict) or not all(isinstance(info, dict) for info in termos.values()):
+        raise ValueError('termos deve ser um objeto {termo: {contagem, peso}}')
+    for termo, info in termos.items():
+        for campo, tipos in (('contagem', int), ('peso', (int, float))):
+            valor = info.get(campo)
+            if valor is not None and (isinstance(valor, bool) or not isinstance(valor, tipos)):
+                raise ValueError(f'{campo} do termo {termo} deve ser um número')
+
+def validar_categorias(categorias, nomes):
+    """
+    Categorias do PUT, {nome: {pontos, meta, nivel}}: só nomes que o
+    usuário já tem (nomes) e valores numéricos. Levanta ValueError se não.
+    """
+    if not isinstance(categorias, dict) or not all(isinstance(dados, dict) for dados in categorias.values()):
+        raise ValueError('categorias deve ser um objeto {categoria: {pontos, meta, nivel}}')
+    for nome, dados in categorias.items():
+        if nome not in nomes:
+            raise ValueError(f'Categoria desconhecida: {nome}')
+        for campo in ('pontos', 'meta', 'nivel'):
+            valor = dados.get(campo, 0)
+            if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+                raise ValueError(f'{campo} da categoria {nome} deve ser um número')
+
+def validar_historico(historico):
+    """
+    Histórico completo do PUT: lista de atividades com 'id' (texto), 'data'
+    ISO 8601 e 'pontos' numérico, sem ids repetidos. Levanta ValueError se
+    não for.
+    """
+    if not isinstance(historico, list) or not all(isinstance(atividade, dict) for atividade in historico):
+        raise ValueError('historico deve ser uma lista de atividades')
+    ids = set()
+    for indice, atividade in enumerate(historico):
+        try:
+            if not isinstance(atividade.get('id'), str) or not atividade['id']:
+                raise ValueError('id deve ser um texto')
+            if atividade['id'] in ids:
+                raise ValueError(f"id repetido: {atividade['id']}")
+            ids.add(atividade['id'])
+            try:
+                datetime.fromisoformat(atividade.get('data'))
+            except (TypeError, ValueError):
+                raise ValueError('data deve estar no formato ISO 8601')
+            pontos = atividade.get('pontos')
+            if isinstance(pontos, bool) or not isinstance(pontos, (int, float)):
+                raise ValueError('pontos deve ser um número')
+            validar_textos(atividade)
+        except ValueError as e:
+            raise ValueError(f'Atividade {indice} do historico: {e}')
+
+def montar_atividade(dados):
+    """
+    Valida o corpo de uma atividade e monta o registro do histórico.
+    'data' é opcional (ISO 8601); sem ela vale o horário atual.
+    'pontos' só vale com ECOSCORE_PONTUACAO=cliente; senão é recalculado
+    em registrar_atividades.
+    'id' é opcional (UUID): o cliente que gera o id pode reenviar a mesma
+    atividade sem medo, ela só é gravada uma vez.
+    Levanta ValueError com a mensagem de erro se algo estiver inválido.
+    """
+    if not isinstance(dados, dict):
+        raise ValueError('A atividade deve ser um objeto JSON')
+    
+    pontos = dados.get('pontos', 0)
+    if isinstance(pontos, bool) or not isinstance(pontos, (int, float)):
+        raise ValueError('pontos deve ser um número')
+    validar_textos(dados)
     
-    # Cria uma lista de usuários com informações para o ranking
-    ranking = []
-    for user_id, usuario in usuarios.items():
-        ranking.append({
-            'id': user_id,
-            'nome': usuario['nome'],
-            'nivel': usuario['nivel'],
-            'pontuacao_total': usuario['pontuacao_total']
-        })
+    data = dados.get('data')
+    if data:
+        try:
+            data = datetime.fromisoformat(data).isoformat()
+        except (TypeError, ValueError):
+            raise ValueError('data deve estar no formato ISO 8601')
+    else:
+        data = datetime.now().isoformat()
     
-    # Ordena por pontuação total (decrescente)
-    ranking.sort(key=lambda x: x['pontuacao_total'], reverse=True)
+    atividade_id = dados.get('id')
+    if atividade_id is None:
+        atividade_id = str(uuid.uuid4())
+    else:
+        try:
+            atividade_id = str(uuid.UUID(str(atividade_id)))
+        except ValueError:
+            raise ValueError('id deve ser um UUID')
     
-    # Adiciona a posição no ranking
-    for i, user in enumerate(ranking, 1):
-        user['posicao'] = i
+    return {
+        'id': atividade_id,
+        'data': data,
+        'categoria': dados.get('categoria'),
+        'descricao': dados.get('descricao') or '',
+        'pontos': pontos
+    }
+
+def aplicar_pontos(usuario, atividade, categorias_alteradas):
+    """
+    Soma os pontos da atividade na categoria e no total do usuário (em
+    memória) e anota a categoria alterada em categorias_alteradas.
+    """
+    categoria = atividade['categoria']
+    if categoria not in usuario['categorias']:
+        return
     
-    return jsonify(ranking)
+    cat_info = usuario['categorias'][categoria]
+    cat_info['pontos'] += atividade['pontos']
+    usuario['pontuacao_total'] += atividade['pontos']
+    
+    # Verifica se subiu de nível (pode subir vários de uma vez num lote)
+    while cat_info['meta'] > 0 and cat_info['pontos'] >= cat_info['meta']:
+        cat_info['nivel'] += 1
+        cat_info['meta'] *= 2  # Dobra a meta para o próximo nível
+    categorias_alteradas[categoria] = cat_info
+
+def registrar_atividades(atividades_por_usuario):
+    """
+    Aplica as atividades de cada usuário ({user_id: [atividade, ...]}) e
+    grava tudo numa transação só do armazenamento.
+    
+    Lê-altera-grava com a trava de cada usuário envolvido: duas
+    requisições ao mesmo tempo não perdem pontos uma da outra. As travas
+    são pegas sempre na mesma ordem pra dois lotes não se bloquearem.
+    Levanta ConflitoDeVersao se outro processo gravou no meio.
+    
+    Atividades com id já gravado (reenvios) são ignoradas.
+    Retorna (usuarios, repetidas):
+    - usuarios: {user_id: usuario} com o estado já gravado (pontos, nível
+      e versão novos)
+    - repetidas: {id: atividade já gravada} das que foram ignoradas
+    """
+    with ExitStack() as pilha:
+        for user_id in sorted(atividades_por_usuario):
+            pilha.enter_context(travas.travar(user_id))
+        
+        usuarios = []
+        alteracoes = []
+        repetidas = {}
+        for user_id, atividades in atividades_por_usuario.items():
+            usuario = store.obter_usuario(user_id)
+            versao_lida = usuario['versao']
+            
+            # Confere os reenvios aqui, com a trava: duas tentativas ao mesmo
+            # tempo não gravam a atividade duas vezes
+            novas = {}
+            for atividade in atividades:
+                gravada = novas.get(atividade['id']) or store.obter_atividade(user_id, atividade['id'])
+                if gravada:
+                    repetidas[atividade['id']] = gravada
+                else:
+                    novas[atividade['id']] = atividade
+            usuarios.append(usuario)
+            if not novas:
+                continue
+            atividades = list(novas.values())
+            if PONTUACAO == 'servidor':
+                servico_pontuacao.pontuar_atividades(user_id, atividades)
+            
+            categorias_alteradas = {}
+            for atividade in atividades:
+                aplicar_pontos(usuario, atividade, categorias_alteradas)
+            usuario['nivel'] = regra_nivel.nivel(usuario['pontuacao_total'])
+            
+            alteracoes.append({
+                'usuario_id': user_id,
+                'atividades': atividades,
+                'categorias': categorias_alteradas,
+                'pontuacao_total': usuario['pontuacao_total'],
+                'nivel': usuario['nivel'],
+                'versao_esperada': versao_lida
+            })
+        
+        if alteracoes:
+            store.registrar_atividades(alteracoes)
+        gravados = {alteracao['usuario_id'] for alteracao in alteracoes}
+        for usuario in usuarios:
+            if usuario['id'] in gravados:
+                usuario['versao'] += 1  # cada alteração gravada sobe uma versão
+                ranking.atualizar(usuario)
+        return {usuario['id']: usuario for usuario in usuarios}, repetidas
 
 # Rota para adicionar uma nova atividade
+# Devolve a atividade criada e, em 'usuario', o perfil já atualizado
+# (pontos, nível e versão), então o cliente não precisa buscá-lo de novo.
+# Reenvio de uma atividade com o mesmo 'id': 200 com a atividade já gravada.
 @app.route('/api/usuarios/<user_id>/atividades', methods=['POST'])
 def adicionar_atividade(user_id):
-    usuarios = carregar_usuarios()
-    if user_id not in usuarios:
+    if not store.existe_usuario(user_id):
         return jsonify({'erro': 'Usuário não encontrado'}), 404
     
-    dados = request.get_json()
-    categoria = dados.get('categoria')
-    descricao = dados.get('descricao', '')
-    pontos = dados.get('pontos', 0)
+    try:
+        nova_atividade = montar_atividade(request.get_json())
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
     
-    # Adiciona a atividade ao histórico
-    nova_atividade = {
-        'id': str(uuid.uuid4()),
-        'data': datetime.now().isoformat(),
-        'categoria': categoria,
-        'descricao': descricao,
-        'pontos': pontos
-    }
+    try:
+        usuarios, repetidas = registrar_atividades({user_id: [nova_atividade]})
+    except ConflitoDeVersao:
+        # Só acontece se outro processo escreveu no mesmo banco
+        return responder_conflito(user_id)
     
-    usuarios[user_id]['historico'].append(nova_atividade)
+    perfil = perfil_usuario(usuarios[user_id])
+    if nova_atividade['id'] in repetidas:
+        return jsonify(dict(repetidas[nova_atividade['id']], usuario=perfil)), 200
+    return jsonify(dict(nova_atividade, usuario=perfil)), 201
+
+def processar_lote(itens, user_id_fixo=None):
+    """
+    Valida cada item do lote e grava os válidos de uma vez.
+    Retorna a resposta com um resultado por item, na ordem recebida;
+    itens com 'id' já gravado voltam com repetida=True. Num lote de um
+    usuário só, 'usuario' traz o perfil atualizado.
+    """
+    if not isinstance(itens, list):
+        return jsonify({'erro': 'O corpo deve ser uma lista de atividades'}), 400
+    if len(itens) > LOTE_TAMANHO_MAXIMO:
+        return jsonify({'erro': f'No máximo {LOTE_TAMANHO_MAXIMO} atividades por lote'}), 413
     
-    # Atualiza a pontuação da categoria e total
-    if categoria in usuarios[user_id]['categorias']:
-        usuarios[user_id]['categorias'][categoria]['pontos'] += pontos
-        usuarios[user_id]['pontuacao_total'] += pontos
+    resultados = []
+    atividades_por_usuario = {}
+    vistas = {}  # id -> atividade, pra repetições dentro do próprio lote
+    for indice, item in enumerate(itens):
+        try:
+            atividade = montar_atividade(item)
+            user_id = user_id_fixo or item.get('usuario_id')
+            if not user_id or not store.existe_usuario(user_id):
+                raise ValueError('Usuário não encontrado')
+        except ValueError as e:
+            resultados.append({'indice': indice, 'sucesso': False, 'erro': str(e)})
+            continue
         
-        # Verifica se subiu de nível
-        cat_info = usuarios[user_id]['categorias'][categoria]
-        if cat_info['pontos'] >= cat_info['meta']:
-            cat_info['nivel'] += 1
-            cat_info['meta'] *= 2  # Dobra a meta para o próximo nível
+        if atividade['id'] in vistas:
+            resultados.append({'indice': indice, 'sucesso': True, 'usuario_id': user_id,
+                               'atividade': vistas[atividade['id']], 'repetida': True})
+            continue
+        vistas[atividade['id']] = atividade
+        atividades_por_usuario.setdefault(user_id, []).append(atividade)
+        resultados.append({'indice': indice, 'sucesso': True, 'usuario_id': user_id,
+                           'atividade': atividade})
+    
+    usuarios, repetidas = {}, {}
+    if atividades_por_usuario:
+        try:
+            usuarios, repetidas = registrar_atividades(atividades_por_usuario)
+        except ConflitoDeVersao:
+            return jsonify({'erro': 'Usuários alterados por outra requisição. Envie o lote de novo.'}), 409
     
-    salvar_usuarios(usuarios)
-    return jsonify(nova_atividade), 201
+    for resultado in resultados:
+        if resultado['sucesso'] and 'repetida' not in resultado:
+            atividade_id = resultado['atividade']['id']
+            resultado['repetida'] = atividade_id in repetidas
+            if resultado['repetida']:
+                resultado['atividade'] = repetidas[atividade_id]
+    
+    aceitas = sum(1 for r in resultados if r['sucesso'])
+    corpo = {
+        'aceitas': aceitas,
+        'rejeitadas': len(resultados) - aceitas,
+        'resultados': resultados
+    }
+    if user_id_fixo:
+        usuario = usuarios.get(user_id_fixo) or store.obter_usuario(user_id_fixo)
+        corpo['usuario'] = perfil_usuario(usuario)
+    return jsonify(corpo)
+
+# Rota para adicionar várias atividades de um usuário de uma vez
+# Corpo: [{categoria, descricao, pontos, data?}, ...]
+@app.route('/api/usuarios/<user_id>/atividades/lote', methods=['POST'])
+def adicionar_atividades_lote(user_id):
+    if not store.existe_usuario(user_id):
+        return jsonify({'erro': 'Usuário não encontrado'}), 404
+    
+    return processar_lote(request.get_json(), user_id_fixo=user_id)
+
+# Rota para adicionar atividades de vários usuários de uma vez
+# Corpo: [{usuario_id, categoria, descricao, pontos, data?}, ...]
+@app.route('/api/atividades/lote', methods=['POST'])
+def adicionar_atividades_lote_geral():
+    return processar_lote(request.get_json())
+
+# Campos que a operação 'definir' do PATCH pode trocar
+CAMPOS_PATCH = ('nome', 'email', 'senha', 'pontuacao_total')
+
+def retirar_pontos(usuario, atividade, categorias_alteradas):
+    """
+    Desfaz o que aplicar_pontos somou pra uma atividade removida. O nível
+    e a meta da categoria ficam como estão.
+    """
+    categoria = atividade['categoria']
+    if categoria not in usuario['categorias']:
+        return
+
+    cat_info = usuario['categorias'][categoria]
+    cat_info['pontos'] -= atividade['pontos']
+    usuario['pontuacao_total'] -= atividade['pontos']
+    categorias_alteradas[categoria] = cat_info
+
+def montar_alteracao(user_id, usuario, operacoes):
+    """
+    Aplica as operações do PATCH, em ordem, no usuário lido (em memória) e
+    monta o que store.aplicar_alteracoes precisa gravar: só o que mudou.
+    Reenvio de atividade já gravada e remoção de id que não existe são
+    ignorados, então o mesmo PATCH pode ser enviado de novo.
+    Levanta ValueError com a operação e o erro se algo estiver inválido.
+    """
+    pontuacao_lida = usuario['pontuacao_total']
+    campos = {}
+    categorias_alteradas = {}
+    novas = {}       # id -> atividade
+    removidas = []
+    termos = {}      # categoria -> {termo: {contagem, peso}}
+    total_atividades = 0
+
+    for indice, operacao in enumerate(operacoes):
+        op = operacao.get('op')
+        try:
+            if op == 'incrementar_pontos':
+                pontos = operacao.get('pontos')
+                if isinstance(pontos, bool) or not isinstance(pontos, (int, float)):
+                    raise ValueError('pontos deve ser um número')
+                categoria = operacao.get('categoria')
+                if categoria is None:
+                    usuario['pontuacao_total'] += pontos
+                elif categoria in usuario['categorias']:
+                    aplicar_pontos(usuario, {'categoria': categoria, 'pontos': pontos},
+                                   categorias_alteradas)
+                else:
+                    raise ValueError(f'Categoria desconhecida: {categoria}')
+
+            elif op == 'adicionar_atividades':
+                itens = operacao.get('atividades')
+                if not isinstance(itens, list):
+                    raise ValueError('atividades deve ser uma lista')
+                total_atividades += len(itens)
+                if total_atividades > LOTE_TAMANHO_MAXIMO:
+                    raise ValueError(f'No máximo {LOTE_TAMANHO_MAXIMO} atividades por PATCH')
+                atividades = {}
+                for item in map(montar_atividade, itens):
+                    if item['id'] in novas or item['id'] in atividades:
+                        continue
+                    if item['id'] not in removidas and store.obter_atividade(user_id, item['id']):
+                        continue
+                    atividades[item['id']] = item
+                atividades = list(atividades.values())
+                if PONTUACAO == 'servidor':
+                    servico_pontuacao.pontuar_atividades(user_id, atividades)
+                for atividade in atividades:
+                    aplicar_pontos(usuario, atividade, categorias_alteradas)
+                    novas[atividade['id']] = atividade
+
+            elif op == 'remover_atividade':
+                atividade_id = operacao.get('id')
+                if not isinstance(atividade_id, str):
+                    raise ValueError('id deve ser um texto')
+                if atividade_id in novas:
+                    retirar_pontos(usuario, novas.pop(atividade_id), categorias_alteradas)
+                elif atividade_id not in removidas:
+                    gravada = store.obter_atividade(user_id, atividade_id)
+                    if gravada:
+                        retirar_pontos(usuario, gravada, categorias_alteradas)
+                        removidas.append(atividade_id)
+
+            elif op == 'definir':
+                valores = operacao.get('campos')
+                if not isinstance(valores, dict):
+                    raise ValueError('campos deve ser um objeto')
+                for campo in valores:
+                    if campo not in CAMPOS_PATCH:
+                        raise ValueError(f'Campo não pode ser alterado: {campo}')
+                validar_campos_usuario(valores)
+                for campo, valor in valores.items():
+                    if campo == 'pontuacao_total':
+                        usuario['pontuacao_total'] = valor
+                    else:
+                        campos[campo] = valor
+
+            elif op == 'mesclar_termos':
+                categoria = operacao.get('categoria')
+                novos_termos = operacao.get('termos')
+                if not categoria:
+                    raise ValueError('Categoria não informada')
+                validar_termos(novos_termos)
+                termos_cat = termos.setdefault(categoria, {})
+                for termo, info in novos_termos.items():
+                    atual = termos_cat.setdefault(termo, {'contagem': 0})
+                    atual['contagem'] += info.get('contagem', 1)
+                    atual['peso'] = info.get('peso', 1.0)
+
+            else:
+                raise ValueError(f'Operação desconhecida: {op}')
+        except ValueError as e:
+            raise ValueError(f'Operação {indice}: {e}')
+
+    if usuario['pontuacao_total'] != pontuacao_lida:
+        campos['pontuacao_total'] = usuario['pontuacao_total']
+        campos['nivel'] = regra_nivel.nivel(usuario['pontuacao_total'])
+    return {
+        'campos': campos,
+        'categorias': categorias_alteradas,
+        'atividades': list(novas.values()),
+        'removidas': removidas,
+        'termos': termos
+    }
+
+# Rota para alterar partes de um usuário sem reenviar o usuário inteiro
+# Corpo: lista de operações, aplicadas em ordem e gravadas juntas (ou nenhuma):
+#   {"op": "incrementar_pontos", "pontos": 10, "categoria": "Água"}  (categoria opcional)
+#   {"op": "adicionar_atividades", "atividades": [{categoria, descricao, pontos, id?, data?}, ...]}
+#   {"op": "remover_atividade", "id": "..."}
+#   {"op": "definir", "campos": {"nome": ..., "email": ..., "senha": ..., "pontuacao_total": ...}}
+#   {"op": "mesclar_termos", "categoria": "Água", "termos": {termo: {contagem, peso}}}
+# If-Match opcional, como no PUT. Devolve o perfil atualizado.
+@app.route('/api/usuarios/<user_id>', methods=['PATCH'])
+def alterar_usuario(user_id):
+    if not store.existe_usuario(user_id):
+        return jsonify({'erro': 'Usuário não encontrado'}), 404
+
+    operacoes = request.get_json()
+    if not isinstance(operacoes, list) or not all(isinstance(op, dict) for op in operacoes):
+        return jsonify({'erro': 'O corpo deve ser uma lista de operações'}), 400
+    versao_esperada = versao_if_match()
+
+    with travas.travar(user_id):
+        usuario = store.obter_usuario(user_id)
+        if versao_esperada is not None and usuario['versao'] != versao_esperada:
+            return responder_conflito(user_id)
+        try:
+            alteracao = montar_alteracao(user_id, usuario, operacoes)
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+
+        termos_antes = store.obter_termos(user_id) if alteracao['termos'] else None
+        try:
+            # Versão lida aqui: pega também escritas de outro processo no mesmo banco
+            store.aplicar_alteracoes(user_id, versao_esperada=usuario['versao'], **alteracao)
+        except ConflitoDeVersao:
+            return responder_conflito(user_id)
+        except EmailJaCadastrado:
+            return jsonify({'erro': 'Email já cadastrado'}), 409
+        usuario = store.obter_usuario(user_id)
+        ranking.atualizar(usuario)
+        if termos_antes is not None:
+            indice_termos.atualizar(termos_antes, store.obter_termos(user_id))
+        return responder_usuario(usuario)
+
+# Rota para pontuar descrições sem gravar nada (estimativas, repontuar o histórico)
+# Corpo: {"usuario_id": "..." (opcional, usa os termos aprendidos dele),
+#         "itens": [{descricao, categoria}, ...]}
+# Resposta: {"pontos": [...]} na ordem dos itens
+@app.route('/api/pontuacao', methods=['POST'])
+def pontuar_descricoes():
+    dados = request.get_json()
+    itens = dados.get('itens') if isinstance(dados, dict) else None
+    if not isinstance(itens, list) or not all(isinstance(item, dict) for item in itens):
+        return jsonify({'erro': 'itens deve ser uma lista de {descricao, categoria}'}), 400
+    try:
+        for item in itens:
+            validar_textos(item)
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    if len(itens) > LOTE_TAMANHO_MAXIMO:
+        return jsonify({'erro': f'No máximo {LOTE_TAMANHO_MAXIMO} itens por requisição'}), 413
+    
+    user_id = dados.get('usuario_id')
+    if user_id and not store.existe_usuario(user_id):
+        return jsonify({'erro': 'Usuário não encontrado'}), 404
+    
+    motor = servico_pontuacao.motor_do_usuario(user_id)
+    return jsonify({'pontos': motor.repontuar(itens)})
 
 # Rota para obter histórico de atividades de um usuário
+# Vem do mais recente pro mais antigo. Parâmetros opcionais:
+#   ?limit=10            -> no máximo 10 atividades
+#   ?cursor=...          -> continua de onde a página anterior parou
+#   ?since=2025-10-01    -> a partir dessa data (inclusive)
+#   ?until=2025-11-01    -> antes dessa data (exclusive)
+#   ?categoria=Água      -> só uma categoria
+# since/until aceitam data ou data e hora ISO 8601; outra coisa dá 400.
+# Se houver mais páginas, o cursor da próxima vem no cabeçalho X-Proximo-Cursor.
 @app.route('/api/usuarios/<user_id>/historico', methods=['GET'])
 def obter_historico(user_id):
-    usuarios = carregar_usuarios()
-    if user_id not in usuarios:
+    versao = store.obter_versao(user_id)
+    if versao is None:
         return jsonify({'erro': 'Usuário não encontrado'}), 404
+    resposta = nao_modificado(versao)
+    if resposta:
+        return resposta
+    
+    try:
+        limite = parametro_inteiro('limit', None, 1, HISTORICO_LIMITE_MAXIMO)
+        atividades, proximo_cursor = store.listar_historico(
+            user_id,
+            limite=limite,
+            cursor=request.args.get('cursor'),
+            desde=parametro_data('since'),
+            ate=parametro_data('until'),
+            categoria=request.args.get('categoria'))
+    except ValueError:
+        return jsonify({'erro': 'Parâmetros de paginação inválidos'}), 400
     
-    return jsonify(usuarios[user_id]['historico'])
+    resposta = jsonify(atividades)
+    if proximo_cursor:
+        resposta.headers['X-Proximo-Cursor'] = proximo_cursor
+    return com_etag(resposta, versao)
+
+# Estatísticas do usuário, montadas a partir dos agregados por dia e por
+# categoria que o backend mantém a cada atividade (sem ler o histórico todo).
+#   ?ultimas=10          -> quantas atividades recentes incluir
+#   ?hoje=2025-11-03     -> "hoje" do cliente (padrão: data do servidor)
+# pontos_7dias soma os 7 dias corridos que terminam hoje (hoje incluso).
+@app.route('/api/usuarios/<user_id>/estatisticas', methods=['GET'])
+def obter_estatisticas(user_id):
+    versao = store.obter_versao(user_id)
+    if versao is None:
+        return jsonify({'erro': 'Usuário não encontrado'}), 404
+    
+    try:
+        ultimas = parametro_inteiro('ultimas', 10, 0, HISTORICO_LIMITE_MAXIMO)
+        hoje = date.fromisoformat(request.args['hoje']) if 'hoje' in request.args else date.today()
+    except ValueError:
+        return jsonify({'erro': 'Parâmetros inválidos'}), 400
+    
+    # "Hoje" e "7 dias" mudam com a data mesmo sem atividade nova
+    etag = f'{versao}-{hoje.isoformat()}'
+    resposta = nao_modificado(etag)
+    if resposta:
+        return resposta
+    
+    inicio_semana = (hoje - timedelta(days=6)).isoformat()
+    por_dia, por_categoria = store.obter_agregados(user_id, inicio_semana)
+    
+    def soma_pontos(categorias):
+        return sum(c['pontos'] for c in categorias.values())
+    
+    pontos_7dias = sum(soma_pontos(cats) for dia, cats in por_dia.items() if dia <= hoje.isoformat())
+    pontos_total = soma_pontos(por_categoria)
+    total_atividades = sum(c['atividades'] for c in por_categoria.values())
+    
+    if por_categoria:
+        categoria_top = max(por_categoria, key=lambda cat: por_categoria[cat]['pontos'])
+    else:
+        categoria_top = '—'
+    
+    ultimas_atividades = []
+    if ultimas:
+        ultimas_atividades, _ = store.listar_historico(user_id, limite=ultimas)
+    
+    return com_etag(jsonify({
+        'pontos_hoje': soma_pontos(por_dia.get(hoje.isoformat(), {})),
+        'pontos_7dias': pontos_7dias,
+        'media_pontos': pontos_total / total_atividades if total_atividades else 0,
+        'total_atividades': total_atividades,
+        'categoria_top': categoria_top,
+        'pontos_por_categoria': {cat: c['pontos'] for cat, c in por_categoria.items()},
+        'ultimas_atividades': ultimas_atividades
+    }), etag)
+
+# Rota para obter termos aprendidos
+@app.route('/api/usuarios/<user_id>/termos', methods=['GET'])
+def obter_termos(user_id):
+    versao = store.obter_versao(user_id)
+    if versao is None:
+        return jsonify({'erro': 'Usuário não encontrado'}), 404
+    resposta = nao_modificado(versao)
+    if resposta:
+        return resposta
+    
+    return com_etag(jsonify(store.obter_termos(user_id)), versao)
 
 # Rota para atualizar termos aprendidos
 @app.route('/api/usuarios/<user_id>/termos', methods=['POST'])
 def atualizar_termos(user_id):
-    usuarios = carregar_usuarios()
-    if user_id not in usuarios:
+    if not store.existe_usuario(user_id):
         return jsonify({'erro': 'Usuário não encontrado'}), 404
     
     dados = request.get_json()
+    if not isinstance(dados, dict):
+        return jsonify({'erro': 'O corpo deve ser um objeto JSON'}), 400
     categoria = dados.get('categoria')
     termos = dados.get('termos', {})
+    if not categoria:
+        return jsonify({'erro': 'Categoria não informada'}), 400
+    if not isinstance(categoria, str):
+        return jsonify({'erro': 'categoria deve ser um texto'}), 400
+    try:
+        validar_termos(termos)
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
     
-    if 'termos_aprendidos' not in usuarios[user_id]:
-        usuarios[user_id]['termos_aprendidos'] = {}
+    # Soma contagens e atualiza pesos dos termos (um registro por termo),
+    # e leva a diferença pro índice global
+    with travas.travar(user_id):
+        termos_antes = store.obter_termos(user_id)
+        termos_aprendidos = store.atualizar_termos(user_id, categoria, termos)
+        indice_termos.atualizar(termos_antes, termos_aprendidos)
+    return jsonify(termos_aprendidos)
+
+# Rota para obter os termos mais usados entre todos os usuários
+# Parâmetros opcionais:
+#   ?categoria=Água -> só essa categoria (X-Total-Count = termos nela)
+#   ?limit=20       -> quantos termos por categoria
+# Resposta: {categoria: [{termo, contagem, usuarios, peso}, ...]}, com
+# contagem total, quantos usuários têm o termo e o peso médio entre eles.
+# ETag/If-None-Match pela versão do índice, como no ranking.
+@app.route('/api/termos', methods=['GET'])
+def obter_termos_globais():
+    try:
+        limit = parametro_inteiro('limit', TERMOS_LIMITE_PADRAO, minimo=1, maximo=TERMOS_LIMITE_MAXIMO)
+    except ValueError:
+        return jsonify({'erro': 'limit deve ser um número inteiro'}), 400
     
-    if categoria not in usuarios[user_id]['termos_aprendidos']:
-        usuarios[user_id]['termos_aprendidos'][categoria] = {}
+    etag = f't{indice_termos.versao}'
+    resposta = nao_modificado(etag)
+    if resposta:
+        return resposta
     
-    # Atualiza os termos aprendidos
-    for termo, info in termos.items():
-        if termo in usuarios[user_id]['termos_aprendidos'][categoria]:
-            # Atualiza contagem e peso se o termo já existe
-            usuarios[user_id]['termos_aprendidos'][categoria][termo]['contagem'] += info.get('contagem', 1)
-            usuarios[user_id]['termos_aprendidos'][categoria][termo]['peso'] = info.get('peso', 1.0)
-        else:
-            # Adiciona novo termo
-            usuarios[user_id]['termos_aprendidos'][categoria][termo] = {
-                'contagem': info.get('contagem', 1),
-                'peso': info.get('peso', 1.0)
-            }
-    
-    salvar_usuarios(usuarios)
-    return jsonify(usuarios[user_id]['termos_aprendidos'])
+    categoria = request.args.get('categoria')
+    if categoria:
+        resposta = jsonify({categoria: indice_termos.top(categoria, limit)})
+        resposta.headers['X-Total-Count'] = str(indice_termos.total(categoria))
+    else:
+        resposta = jsonify({cat: indice_termos.top(cat, limit) for cat in indice_termos.categorias()})
+    return com_etag(resposta, etag)
 
 if __name__ == '__main__':
-    # Cria o diretório de dados se não existir
-    os.makedirs('data', exist_ok=True)
-    app.run(debug=True, port=5000)
+    app.run(debug=os.environ.get('ECOSCORE_DEBUG', '1') == '1',
+            port=int(os.environ.get('ECOSCORE_PORTA', 5000)))
@@ -0,0 +1,45 @@
+"""
+Camada de armazenamento dos usuários do EcoScore.
+
+Uso:
+    from armazenamento import criar_armazenamento
+    store = criar_armazenamento('sqlite', 'data')
+
+Backends disponíveis:
+- 'sqlite': tabelas indexadas, leituras e escritas por linha
+- 'memoria': tudo em memória, com journal de alterações e snapshots
+"""
+import os
+
+from .base import (ArmazenamentoUsuarios, ConflitoDeVersao, EmailJaCadastrado,
+                   CAMPOS_EDITAVEIS, CAMPOS_CATEGORIA, normalizar_email)
+from .memoria import ArmazenamentoMemoria
+from .serializacao import USANDO_ORJSON, codificar_json, decodificar_json
+from .sqlite import ArmazenamentoSQLite
+from .travas import TravasPorUsuario
+
+BACKENDS = ('sqlite', 'memoria')
+
+
+def criar_armazenamento(tipo, pasta_dados, **opcoes):
+    """
+    Cria o backend pedido guardando os arquivos dentro de pasta_dados.
+    As opcoes extras vão direto pro construtor do backend.
+    """
+    if tipo == 'sqlite':
+        return ArmazenamentoSQLite(os.path.join(pasta_dados, 'usuarios.db'), **opcoes)
+    if tipo == 'memoria':
+        return ArmazenamentoMemoria(pasta_dados, **opcoes)
+    raise ValueError(f"Backend de armazenamento desconhecido: {tipo} (use um de {BACKENDS})")
+
+
+def importar_json(store, caminho_json):
+    """
+    Importa o antigo usuarios.json para o backend informado.
+    Retorna (quantos foram importados, ids dos que ficaram de fora por
+    email repetido); ver ArmazenamentoUsuarios.importar_usuarios.
+    """
+    with open(caminho_json, 'rb') as f:
+        usuarios = decodificar_json(f.read())
+
+    return store.importar_usuarios(usuarios)
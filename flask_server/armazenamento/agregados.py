@@ -0,0 +1,103 @@
+"""
+Agregados de pontuação por dia e por categoria.
+
+Mantidos junto com o histórico a cada atividade gravada, pra que as
+estatísticas (pontos de hoje, últimos 7 dias, média, categoria top) não
+precisem percorrer o histórico inteiro.
+"""
+from datetime import datetime
+
+# Categoria usada quando a atividade não tem uma
+CATEGORIA_PADRAO = 'Outros'
+
+
+def dia_da_atividade(atividade):
+    """
+    Dia da atividade no formato AAAA-MM-DD, ou '' se a data não for
+    reconhecida (a atividade ainda conta na média e nas categorias).
+    """
+    data = atividade.get('data') or ''
+    try:
+        return datetime.fromisoformat(data).date().isoformat()
+    except ValueError:
+        pass
+    # Formato antigo do cliente: "dd/mm/AAAA HH:MM"
+    try:
+        return datetime.strptime(data, "%d/%m/%Y %H:%M").date().isoformat()
+    except ValueError:
+        return ''
+
+
+def categoria_da_atividade(atividade):
+    return atividade.get('categoria') or CATEGORIA_PADRAO
+
+
+class AgregadosUsuario:
+    """
+    - por_dia: {dia: {categoria: [pontos, atividades]}}
+    - por_categoria: {categoria: [pontos, atividades]} (histórico todo)
+    """
+
+    def __init__(self, atividades=()):
+        self.reconstruir(atividades)
+
+    @classmethod
+    def de_colunas(cls, colunas):
+        """
+        Agregados de um HistoricoColunar, somados direto nas colunas
+        (sem montar um dict por atividade).
+        """
+        agregados = cls()
+        for dia, categorias in colunas.somar_por_dia().items():
+            dia = dia.isoformat() if dia else ''
+            for categoria, (pontos, quantidade) in categorias.items():
+                categoria = categoria or CATEGORIA_PADRAO
+                for soma in (agregados.por_dia.setdefault(dia, {}).setdefault(categoria, [0, 0]),
+                             agregados.por_categoria.setdefault(categoria, [0, 0])):
+                    soma[0] += pontos
+                    soma[1] += quantidade
+        return agregados
+
+    def reconstruir(self, atividades):
+        self.por_dia = {}
+        self.por_categoria = {}
+        for atividade in atividades:
+            self.adicionar(atividade)
+
+    def adicionar(self, atividade):
+        pontos = atividade.get('pontos', 0) or 0
+        categoria = categoria_da_atividade(atividade)
+
+        dia = self.por_dia.setdefault(dia_da_atividade(atividade), {})
+        for soma in (dia.setdefault(categoria, [0, 0]),
+                     self.por_categoria.setdefault(categoria, [0, 0])):
+            soma[0] += pontos
+            soma[1] += 1
+
+    def remover(self, atividade):
+        pontos = atividade.get('pontos', 0) or 0
+        categoria = categoria_da_atividade(atividade)
+        dia = dia_da_atividade(atividade)
+
+        for somas in (self.por_dia.get(dia, {}), self.por_categoria):
+            soma = somas.get(categoria)
+            if soma is None:
+                continue
+            soma[0] -= pontos
+            soma[1] -= 1
+            if soma[1] <= 0:
+                del somas[categoria]
+        if dia in self.por_dia and not self.por_dia[dia]:
+            del self.por_dia[dia]
+
+    def exportar(self, dia_inicial):
+        """
+        Formato de ArmazenamentoUsuarios.obter_agregados.
+        """
+        por_dia = {
+            dia: {cat: {'pontos': p, 'atividades': n} for cat, (p, n) in categorias.items()}
+            for dia, categorias in self.por_dia.items() if dia and dia >= dia_inicial
+        }
+        por_categoria = {cat: {'pontos': p, 'atividades': n}
+                         for cat, (p, n) in self.por_categoria.items()}
+        return por_dia, por_categoria
@@ -0,0 +1,264 @@
+"""
+Interface comum dos backends de armazenamento de usuários.
+
+As rotas do app.py só falam com essa interface, nunca com o arquivo ou o
+banco diretamente. Assim dá pra trocar o backend (SQLite, memória, ...)
+sem mexer nas rotas.
+"""
+import base64
+import binascii
+import logging
+
+log = logging.getLogger(__name__)
+
+# Campos simples do usuário que podem ser alterados via PUT
+CAMPOS_EDITAVEIS = ('nome', 'email', 'senha', 'nivel', 'pontuacao_total')
+
+# Campos de cada categoria que o backend guarda
+CAMPOS_CATEGORIA = ('pontos', 'meta', 'nivel')
+
+
+def normalizar_email(email):
+    """
+    Forma usada no índice de emails: sem espaços nas pontas e minúscula.
+    """
+    return (email or '').strip().lower()
+
+
+def avisar_email_repetido(usuario):
+    """
+    Registra no log um usuário que a importação deixou de fora.
+    """
+    log.warning("Usuário %s não importado: email %s já pertence a outro usuário "
+                "(continua no JSON de origem)", usuario.get('id'), usuario.get('email'))
+
+
+def codificar_cursor(atividade):
+    """
+    Cursor de paginação do histórico: aponta pra (data, id) da última
+    atividade entregue. É opaco pro cliente.
+    """
+    bruto = f"{atividade['data']}|{atividade['id']}".encode('utf-8')
+    return base64.urlsafe_b64encode(bruto).decode('ascii')
+
+
+def paginar(itens, limite):
+    """
+    Recebe até limite+1 itens: se veio o item extra, há próxima página.
+    """
+    if limite is not None and len(itens) > limite:
+        itens = itens[:limite]
+        return itens, codificar_cursor(itens[-1])
+    return itens, None
+
+
+def decodificar_cursor(cursor):
+    """
+    Retorna a tupla (data, id). Levanta ValueError se o cursor é inválido.
+    """
+    try:
+        data, atividade_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|', 1)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError(f"Cursor inválido: {cursor}")
+    return data, atividade_id
+
+
+class EmailJaCadastrado(Exception):
+    """
+    Já existe outro usuário com esse email.
+    """
+
+
+class ConflitoDeVersao(Exception):
+    """
+    A versão do usuário mudou desde a leitura (outra escrita chegou antes).
+    """
+
+
+class ArmazenamentoUsuarios:
+    """
+    Classe base dos backends. Cada método lê ou grava só o que precisa
+    (um usuário, uma atividade, uma categoria), em vez do arquivo inteiro.
+
+    Todo usuário tem um campo 'versao' que sobe a cada escrita. Os métodos
+    que recebem versao_esperada só gravam se a versão atual for essa
+    (compare-and-swap); senão levantam ConflitoDeVersao.
+    """
+
+    def obter_usuario(self, user_id, completo=False):
+        """
+        Retorna o perfil do usuário (dados, totais e categorias) ou None se
+        ele não existir. Histórico e termos aprendidos ficam guardados à
+        parte e só vêm junto com completo=True.
+        """
+        raise NotImplementedError
+
+    def existe_usuario(self, user_id):
+        return self.obter_versao(user_id) is not None
+
+    def obter_versao(self, user_id):
+        """
+        Só a versão atual do usuário (None se ele não existe). Serve pra
+        responder GETs condicionais sem montar o perfil.
+        """
+        usuario = self.obter_usuario(user_id)
+        return usuario['versao'] if usuario else None
+
+    def obter_agregados(self, user_id, dia_inicial):
+        """
+        Pontuação agregada do usuário, mantida a cada atividade gravada.
+        Retorna (por_dia, por_categoria):
+        - por_dia: {dia: {categoria: {pontos, atividades}}} com dia >= dia_inicial
+        - por_categoria: {categoria: {pontos, atividades}} do histórico todo
+        """
+        raise NotImplementedError
+
+    def obter_termos(self, user_id):
+        """
+        Termos aprendidos do usuário: {categoria: {termo: {contagem, peso}}}.
+        """
+        raise NotImplementedError
+
+    def listar_usuarios(self):
+        """
+        Lista resumida de todos os usuários (id, nome, email, senha,
+        nivel, pontuacao_total). Não carrega histórico nem categorias.
+        """
+        raise NotImplementedError
+
+    def obter_id_por_email(self, email):
+        """
+        Busca no índice de emails (normalizados). Retorna o id ou None.
+        """
+        raise NotImplementedError
+
+    def criar_usuario(self, usuario):
+        """
+        Levanta EmailJaCadastrado se o email já pertence a outro usuário.
+        """
+        raise NotImplementedError
+
+    def atualizar_usuario(self, user_id, campos=None, categorias=None,
+                          historico=None, termos_aprendidos=None, versao_esperada=None):
+        """
+        - campos: dict com campos simples (ver CAMPOS_EDITAVEIS)
+        - categorias: {nome: {pontos/meta/nivel}} atualizados parcialmente
+        - historico / termos_aprendidos: se informados, substituem tudo
+
+        Trocar para um email que já é de outro usuário levanta EmailJaCadastrado.
+        """
+        raise NotImplementedError
+
+    def aplicar_alteracoes(self, user_id, campos=None, categorias=None, atividades=(),
+                           removidas=(), termos=None, versao_esperada=None):
+        """
+        Grava de uma vez só o que mudou num usuário (PATCH), numa
+        transação e subindo uma versão só:
+        - campos / categorias: como em atualizar_usuario
+        - atividades: atividades novas pro histórico
+        - removidas: ids de atividades que saem do histórico (e dos agregados)
+        - termos: {categoria: {termo: {contagem, peso}}} somados como em
+          atualizar_termos
+
+        As removidas saem antes das novas entrarem. Trocar para um email
+        que já é de outro usuário levanta EmailJaCadastrado.
+        """
+        raise NotImplementedError
+
+    def registrar_atividade(self, user_id, atividade, categorias, pontuacao_total, nivel,
+                            versao_esperada=None):
+        """
+        Grava uma atividade nova junto com o novo estado das categorias
+        afetadas e a nova pontuação total e nível do usuário.
+        """
+        self.registrar_atividades([{
+            'usuario_id': user_id,
+            'atividades': [atividade],
+            'categorias': categorias,
+            'pontuacao_total': pontuacao_total,
+            'nivel': nivel,
+            'versao_esperada': versao_esperada
+        }])
+
+    def registrar_atividades(self, alteracoes):
+        """
+        Grava várias atividades, de um ou mais usuários, numa transação só:
+        ou tudo é gravado, ou nada. Cada item de 'alteracoes' é um dict com
+        usuario_id, atividades (lista), categorias, pontuacao_total, nivel
+        e versao_esperada (opcional), como em registrar_atividade.
+        """
+        raise NotImplementedError
+
+    def obter_historico(self, user_id):
+        raise NotImplementedError
+
+    def obter_atividade(self, user_id, atividade_id):
+        """
+        Atividade do histórico do usuário com esse id, ou None. Usado pra
+        reconhecer reenvios da mesma atividade (id gerado pelo cliente).
+        """
+        for atividade in self.obter_historico(user_id):
+            if atividade['id'] == atividade_id:
+                return atividade
+        return None
+
+    def listar_historico(self, user_id, limite=None, cursor=None, desde=None,
+                         ate=None, categoria=None):
+        """
+        Histórico do mais recente pro mais antigo, em páginas.
+
+        - limite: máximo de atividades (None = todas)
+        - cursor: valor de codificar_cursor() devolvido pela página anterior
+        - desde / ate: datas no formato de datetime.isoformat() (o app.py
+          valida e normaliza); 'desde' inclui, 'ate' não inclui
+        - categoria: só atividades dessa categoria
+
+        Retorna (atividades, proximo_cursor); proximo_cursor é None quando
+        não há mais páginas. Os backends sobrescrevem isso usando índices;
+        esta versão genérica filtra o histórico inteiro.
+        """
+        limite_cursor = decodificar_cursor(cursor) if cursor else None
+        historico = sorted(self.obter_historico(user_id),
+                           key=lambda atv: (atv['data'], atv['id']), reverse=True)
+        itens = []
+        for atv in historico:
+            if limite_cursor and (atv['data'], atv['id']) >= limite_cursor:
+                continue
+            if desde and atv['data'] < desde:
+                break
+            if ate and atv['data'] >= ate:
+                continue
+            if categoria and atv.get('categoria') != categoria:
+                continue
+            itens.append(atv)
+            if limite is not None and len(itens) > limite:
+                break
+        return paginar(itens, limite)
+
+    def atualizar_termos(self, user_id, categoria, termos):
+        """
+        Soma as contagens e troca o peso dos termos de uma categoria.
+        Retorna todos os termos aprendidos do usuário.
+        """
+        raise NotImplementedError
+
+    def importar_usuarios(self, usuarios):
+        """
+        Importa um dict {user_id: usuario} no formato do antigo
+        usuarios.json (que não exigia email único). Um usuário cujo email
+        já é de outro fica de fora e vai pro log.
+        Retorna (quantos foram importados, ids dos que ficaram de fora).
+        """
+        importados = 0
+        ignorados = []
+        for usuario in usuarios.values():
+            try:
+                self.criar_usuario(usuario)
+                importados += 1
+            except EmailJaCadastrado:
+                avisar_email_repetido(usuario)
+                ignorados.append(usuario.get('id'))
+        return importados, ignorados
+
+    def fechar(self):
+        pass
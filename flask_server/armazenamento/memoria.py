@@ -0,0 +1,566 @@
+"""
+Backend em memória com journal (write-ahead log) e snapshots.
+
+Todos os usuários ficam num dict dentro do processo do Flask, então as
+leituras nunca tocam o disco. Cada alteração vira UMA linha pequena no
+journal (usuarios.journal) antes de ser aplicada em memória. De tempos em
+tempos uma thread grava um snapshot completo (usuarios.snapshot.json) e
+descarta o journal antigo.
+
+Na inicialização: carrega o snapshot e reaplica o journal por cima.
+Cada registro tem um número de sequência; o snapshot guarda o último
+número incluído, então um registro nunca é aplicado duas vezes.
+"""
+import os
+import threading
+
+import raiz_projeto  # noqa: F401  (historico_colunar fica na raiz do projeto)
+from historico_colunar import MOMENTO_DESCONHECIDO, HistoricoColunar, momento_de
+
+from .agregados import AgregadosUsuario
+from .base import (ArmazenamentoUsuarios, ConflitoDeVersao, EmailJaCadastrado,
+                   CAMPOS_EDITAVEIS, CAMPOS_CATEGORIA, decodificar_cursor,
+                   normalizar_email, paginar)
+from .serializacao import codificar_json, decodificar_json
+
+ARQUIVO_SNAPSHOT = 'usuarios.snapshot.json'
+ARQUIVO_JOURNAL = 'usuarios.journal'
+# Journal que estava sendo compactado (só existe se o processo caiu no meio)
+ARQUIVO_JOURNAL_ANTIGO = 'usuarios.journal.1'
+
+
+def momento_do_filtro(texto):
+    """
+    since/until da paginação -> momento. Levanta ValueError se a data
+    não for reconhecida.
+    """
+    momento = momento_de(texto)
+    if momento == MOMENTO_DESCONHECIDO:
+        raise ValueError(f"Data inválida: {texto}")
+    return momento
+
+
+def _numero(valor):
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool)
+
+
+def conferir_atividades(atividades):
+    """
+    Atividades que o histórico e os agregados conseguem guardar: dicts com
+    pontos numéricos e data/categoria em texto (os três podem faltar).
+    A data pode estar em qualquer formato (usuarios.json antigo).
+    """
+    if not isinstance(atividades, (list, tuple)):
+        raise ValueError('historico deve ser uma lista de atividades')
+    for atividade in atividades:
+        if not isinstance(atividade, dict):
+            raise ValueError('Atividade deve ser um objeto')
+        if atividade.get('pontos') is not None and not _numero(atividade['pontos']):
+            raise ValueError('pontos da atividade deve ser um número')
+        for campo in ('data', 'categoria'):
+            if atividade.get(campo) is not None and not isinstance(atividade[campo], str):
+                raise ValueError(f'{campo} da atividade deve ser um texto')
+
+
+def conferir_termos(termos_por_categoria):
+    """
+    {categoria: {termo: {contagem, peso}}}, com contagem numérica.
+    """
+    if not isinstance(termos_por_categoria, dict):
+        raise ValueError('termos deve ser um objeto {categoria: termos}')
+    for termos in termos_por_categoria.values():
+        if not isinstance(termos, dict) or not all(isinstance(info, dict) for info in termos.values()):
+            raise ValueError('termos deve ser um objeto {termo: {contagem, peso}}')
+        for info in termos.values():
+            if 'contagem' in info and not _numero(info['contagem']):
+                raise ValueError('contagem do termo deve ser um número')
+
+
+def conferir_registro(registro):
+    """
+    Confere se _aplicar consegue aplicar o registro, antes de ele ir pro
+    journal: um registro que falha ao ser aplicado ficaria no journal e
+    quebraria toda inicialização seguinte. Levanta ValueError.
+    """
+    op = registro['op']
+    if op == 'criar':
+        usuario = registro['usuario']
+        categorias = usuario.get('categorias')
+        if not isinstance(categorias, dict) or not all(isinstance(c, dict) for c in categorias.values()):
+            raise ValueError('categorias deve ser um objeto {categoria: {pontos, meta, nivel}}')
+        conferir_termos(usuario.get('termos_aprendidos', {}))
+        conferir_atividades(usuario.get('historico', []))
+    elif op == 'atividades':
+        for alteracao in registro['alteracoes']:
+            conferir_atividades(alteracao['atividades'])
+    else:
+        if registro.get('historico') is not None:
+            conferir_atividades(registro['historico'])
+        if registro.get('termos_aprendidos') is not None:
+            conferir_termos(registro['termos_aprendidos'])
+        if op == 'termos':
+            conferir_termos({registro['categoria']: registro['termos']})
+        elif op == 'alterar':
+            conferir_atividades(registro['atividades'])
+            conferir_termos(registro['termos'])
+
+
+class HistoricoOrdenado:
+    """
+    Histórico de um usuário em colunas (HistoricoColunar), sempre
+    ordenado por (data, id): períodos, cursores e o id de uma atividade
+    são buscas nas colunas, sem um dict por atividade em memória.
+    Atividades novas quase sempre são as mais recentes, então inserir
+    costuma ser só um append. Os agregados (por dia e por categoria) são
+    atualizados junto; não vão pro snapshot, são refeitos ao carregar.
+    """
+
+    def __init__(self, atividades=()):
+        self.colunas = HistoricoColunar()
+        self.substituir(atividades)
+
+    def substituir(self, atividades):
+        self.colunas.substituir(atividades)
+        self.agregados = AgregadosUsuario.de_colunas(self.colunas)
+
+    def atividades(self):
+        return self.colunas.para_atividades()
+
+    def obter(self, atividade_id):
+        i = self.colunas.indice_do_id(atividade_id)
+        return None if i is None else self.colunas.atividade(i)
+
+    def adicionar(self, atividade):
+        self.colunas.adicionar(atividade)
+        self.agregados.adicionar(atividade)
+
+    def remover(self, atividade_id):
+        i = self.colunas.indice_do_id(atividade_id)
+        if i is None:
+            return
+        self.agregados.remover(self.colunas.remover(i))
+
+    def pagina(self, limite=None, cursor=None, desde=None, ate=None, categoria=None):
+        colunas = self.colunas
+        # Intervalo [inicio, fim) das linhas que passam nos filtros de data/cursor
+        fim = len(colunas)
+        if ate:
+            fim = colunas.posicao(momento_do_filtro(ate))
+        if cursor:
+            data, atividade_id = decodificar_cursor(cursor)
+            fim = min(fim, colunas.posicao(momento_de(data), atividade_id))
+        inicio = colunas.posicao(momento_do_filtro(desde)) if desde else 0
+
+        codigo = colunas.codigo_categoria(categoria) if categoria else None
+        if categoria and codigo is None:
+            return [], None  # nenhuma atividade nessa categoria
+
+        itens = []
+        for i in range(fim - 1, inicio - 1, -1):
+            if categoria and colunas.codigo_da_linha(i) != codigo:
+                continue
+            itens.append(colunas.atividade(i))
+            if limite is not None and len(itens) > limite:
+                break
+        return paginar(itens, limite)
+
+
+class ArmazenamentoMemoria(ArmazenamentoUsuarios):
+    """
+    - intervalo_compactacao: segundos entre verificações da thread de snapshot
+    - max_registros_journal: só compacta quando o journal passa desse tamanho
+    - fsync: se True, força cada registro pro disco (mais lento, mais seguro)
+    """
+
+    def __init__(self, pasta, intervalo_compactacao=60, max_registros_journal=1000,
+                 fsync=False):
+        self.pasta = pasta
+        self.fsync = fsync
+        self.max_registros_journal = max_registros_journal
+        os.makedirs(pasta, exist_ok=True)
+
+        self._caminho_snapshot = os.path.join(pasta, ARQUIVO_SNAPSHOT)
+        self._caminho_journal = os.path.join(pasta, ARQUIVO_JOURNAL)
+        self._caminho_journal_antigo = os.path.join(pasta, ARQUIVO_JOURNAL_ANTIGO)
+
+        self._lock = threading.RLock()
+        self._usuarios = {}     # user_id -> perfil + categorias + termos
+        self._historicos = {}   # user_id -> HistoricoOrdenado
+        self._emails = {}       # email normalizado -> user_id
+        self._seq = 0           # último registro aplicado
+        self._registros_journal = 0
+
+        self._carregar()
+        if os.path.exists(self._caminho_journal_antigo):
+            # O processo caiu no meio de uma compactação: termina ela agora,
+            # antes de aceitar escritas novas
+            self._gravar_snapshot(self._serializar())
+            os.remove(self._caminho_journal_antigo)
+            if os.path.exists(self._caminho_journal):
+                os.remove(self._caminho_journal)
+            self._registros_journal = 0
+        self._journal = open(self._caminho_journal, 'ab')
+
+        self._parar = threading.Event()
+        self._compactador = None
+        if intervalo_compactacao:
+            self._compactador = threading.Thread(
+                target=self._loop_compactacao,
+                args=(intervalo_compactacao,),
+                name='compactador-journal',
+                daemon=True)
+            self._compactador.start()
+
+    # ---------------- inicialização ----------------
+
+    def _carregar(self):
+        if os.path.exists(self._caminho_snapshot):
+            with open(self._caminho_snapshot, 'rb') as f:
+                snapshot = decodificar_json(f.read())
+            self._seq = snapshot['seq']
+            self._usuarios = snapshot['usuarios']
+            self._historicos = {user_id: HistoricoOrdenado(atividades)
+                                for user_id, atividades in snapshot['historicos'].items()}
+            for usuario in self._usuarios.values():
+                usuario.setdefault('versao', 0)
+                self._indexar_email(usuario['id'], usuario.get('email'))
+
+        for caminho in (self._caminho_journal_antigo, self._caminho_journal):
+            self._reaplicar_journal(caminho)
+
+    def _reaplicar_journal(self, caminho):
+        if not os.path.exists(caminho):
+            return
+        with open(caminho, 'rb') as f:
+            for linha in f:
+                try:
+                    registro = decodificar_json(linha)
+                except ValueError:
+                    # Última linha cortada por queda do processo: ignora
+                    break
+                if registro['seq'] <= self._seq:
+                    continue
+                self._aplicar(registro)
+                self._seq = registro['seq']
+                self._registros_journal += 1
+
+    # ---------------- journal ----------------
+
+    def _registrar(self, registro):
+        """
+        Grava o registro no journal e depois aplica em memória.
+        Deve ser chamado com self._lock adquirido. Levanta ValueError (sem
+        gravar nada) se o registro não puder ser aplicado.
+        """
+        conferir_registro(registro)
+        registro['seq'] = self._seq + 1
+        self._journal.write(codificar_json(registro) + b'\n')
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+        self._aplicar(registro)
+        self._seq = registro['seq']
+        self._registros_journal += 1
+
+    def _conferir_versao(self, user_id, versao_esperada):
+        if versao_esperada is not None and self._usuarios[user_id]['versao'] != versao_esperada:
+            raise ConflitoDeVersao(user_id)
+
+    def _aplicar(self, registro):
+        op = registro['op']
+        if op == 'criar':
+            usuario = dict(registro['usuario'])
+            usuario['categorias'] = {nome: dict(cat) for nome, cat in usuario['categorias'].items()}
+            usuario['termos_aprendidos'] = {
+                cat: {termo: dict(info) for termo, info in termos.items()}
+                for cat, termos in usuario.get('termos_aprendidos', {}).items()
+            }
+            self._historicos[usuario['id']] = HistoricoOrdenado(usuario.pop('historico', []))
+            usuario.setdefault('versao', 0)
+            self._usuarios[usuario['id']] = usuario
+            self._indexar_email(usuario['id'], usuario.get('email'))
+            return
+
+        if op == 'atividades':
+            for alteracao in registro['alteracoes']:
+                self._aplicar_atividades(alteracao['usuario_id'], alteracao['atividades'],
+                                         alteracao['categorias'], alteracao['pontuacao_total'],
+                                         alteracao.get('nivel'))
+            return
+
+        # Todas as outras operações alteram um usuário existente
+        self._usuarios[registro['usuario_id']]['versao'] += 1
+        if op == 'atualizar':
+            self._aplicar_atualizacao(registro)
+
+        elif op == 'termos':
+            self._somar_termos(registro['usuario_id'], registro['categoria'], registro['termos'])
+
+        elif op == 'alterar':
+            self._aplicar_atualizacao(registro)
+            historico = self._historicos[registro['usuario_id']]
+            for atividade_id in registro['removidas']:
+                historico.remover(atividade_id)
+            for atividade in registro['atividades']:
+                historico.adicionar(atividade)
+            for categoria, termos in registro['termos'].items():
+                self._somar_termos(registro['usuario_id'], categoria, termos)
+
+        else:
+            raise ValueError(f"Registro de journal desconhecido: {op}")
+
+    def _aplicar_atividades(self, user_id, atividades, categorias, pontuacao_total, nivel=None):
+        usuario = self._usuarios[user_id]
+        usuario['versao'] += 1
+        historico = self._historicos[user_id]
+        for atividade in atividades:
+            historico.adicionar(atividade)
+        self._aplicar_categorias(user_id, categorias)
+        usuario['pontuacao_total'] = pontuacao_total
+        if nivel is not None:  # registros antigos do journal não têm o nível
+            usuario['nivel'] = nivel
+
+    def _somar_termos(self, user_id, categoria, termos):
+        termos_cat = self._usuarios[user_id]['termos_aprendidos'].setdefault(categoria, {})
+        for termo, info in termos.items():
+            if termo in termos_cat:
+                termos_cat[termo]['contagem'] += info.get('contagem', 1)
+                termos_cat[termo]['peso'] = info.get('peso', 1.0)
+            else:
+                termos_cat[termo] = {
+                    'contagem': info.get('contagem', 1),
+                    'peso': info.get('peso', 1.0)
+                }
+
+    def _aplicar_atualizacao(self, registro):
+        user_id = registro['usuario_id']
+        usuario = self._usuarios[user_id]
+        campos = registro.get('campos') or {}
+        if 'email' in campos:
+            self._emails.pop(normalizar_email(usuario.get('email')), None)
+            self._indexar_email(user_id, campos['email'])
+        usuario.update(campos)
+        self._aplicar_categorias(user_id, registro.get('categorias') or {})
+        if registro.get('historico') is not None:
+            self._historicos[user_id].substituir(registro['historico'])
+        if registro.get('termos_aprendidos') is not None:
+            usuario['termos_aprendidos'] = registro['termos_aprendidos']
+
+    def _indexar_email(self, user_id, email):
+        email = normalizar_email(email)
+        if email:
+            self._emails[email] = user_id
+
+    def _conferir_email(self, email, user_id=None):
+        dono = self._emails.get(normalizar_email(email))
+        if dono is not None and dono != user_id:
+            raise EmailJaCadastrado(email)
+
+    def _aplicar_categorias(self, user_id, categorias):
+        categorias_usuario = self._usuarios[user_id]['categorias']
+        for nome, dados in categorias.items():
+            if nome in categorias_usuario:
+                categorias_usuario[nome].update(dados)
+
+    # ---------------- compactação ----------------
+
+    def _loop_compactacao(self, intervalo):
+        while not self._parar.wait(intervalo):
+            if self._registros_journal >= self.max_registros_journal:
+                self.compactar()
+
+    def compactar(self):
+        """
+        Grava um snapshot com o estado atual e descarta o journal.
+
+        Só a serialização e a troca de journal acontecem com o lock;
+        a escrita do snapshot no disco roda sem bloquear as requisições.
+        """
+        with self._lock:
+            conteudo = self._serializar()
+
+            # Troca de journal: o atual vira ".1" até o snapshot ficar pronto
+            self._journal.close()
+            os.replace(self._caminho_journal, self._caminho_journal_antigo)
+            self._journal = open(self._caminho_journal, 'ab')
+            self._registros_journal = 0
+
+        self._gravar_snapshot(conteudo)
+        os.remove(self._caminho_journal_antigo)
+
+    def _serializar(self):
+        return codificar_json({
+            'seq': self._seq,
+            'usuarios': self._usuarios,
+            'historicos': {user_id: historico.atividades()
+                           for user_id, historico in self._historicos.items()}
+        })
+
+    def _gravar_snapshot(self, conteudo):
+        # Grava num arquivo temporário e troca de uma vez (atômico)
+        temporario = self._caminho_snapshot + '.tmp'
+        with open(temporario, 'wb') as f:
+            f.write(conteudo)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self._caminho_snapshot)
+
+    # ---------------- leitura ----------------
+
+    def _copiar_usuario(self, user_id, completo=False):
+        # Cópia: quem chama pode alterar à vontade sem mexer no estado interno
+        usuario = self._usuarios[user_id]
+        copia = {k: v for k, v in usuario.items() if k != 'termos_aprendidos'}
+        copia['categorias'] = {nome: dict(cat) for nome, cat in usuario['categorias'].items()}
+        if completo:
+            copia['historico'] = self._historicos[user_id].atividades()
+            copia['termos_aprendidos'] = self._copiar_termos(user_id)
+        return copia
+
+    def _copiar_termos(self, user_id):
+        return {
+            cat: {termo: dict(info) for termo, info in termos.items()}
+            for cat, termos in self._usuarios[user_id]['termos_aprendidos'].items()
+        }
+
+    def obter_usuario(self, user_id, completo=False):
+        with self._lock:
+            if user_id not in self._usuarios:
+                return None
+            return self._copiar_usuario(user_id, completo)
+
+    def obter_termos(self, user_id):
+        with self._lock:
+            if user_id not in self._usuarios:
+                return {}
+            return self._copiar_termos(user_id)
+
+    def existe_usuario(self, user_id):
+        return user_id in self._usuarios
+
+    def obter_versao(self, user_id):
+        with self._lock:
+            usuario = self._usuarios.get(user_id)
+            return usuario['versao'] if usuario else None
+
+    def listar_usuarios(self):
+        with self._lock:
+            return [{
+                'id': u['id'],
+                'nome': u['nome'],
+                'email': u['email'],
+                'senha': u['senha'],
+                'nivel': u['nivel'],
+                'pontuacao_total': u['pontuacao_total']
+            } for u in self._usuarios.values()]
+
+    def obter_id_por_email(self, email):
+        return self._emails.get(normalizar_email(email))
+
+    def obter_historico(self, user_id):
+        with self._lock:
+            historico = self._historicos.get(user_id)
+            return historico.atividades() if historico else []
+
+    def listar_historico(self, user_id, limite=None, cursor=None, desde=None,
+                         ate=None, categoria=None):
+        with self._lock:
+            historico = self._historicos.get(user_id)
+            if historico is None:
+                return [], None
+            return historico.pagina(limite, cursor, desde, ate, categoria)
+
+    def obter_atividade(self, user_id, atividade_id):
+        with self._lock:
+            historico = self._historicos.get(user_id)
+            return historico.obter(atividade_id) if historico else None
+
+    def obter_agregados(self, user_id, dia_inicial):
+        with self._lock:
+            historico = self._historicos.get(user_id)
+            if historico is None:
+                return {}, {}
+            return historico.agregados.exportar(dia_inicial)
+
+    # ---------------- escrita ----------------
+
+    def criar_usuario(self, usuario):
+        with self._lock:
+            self._conferir_email(usuario.get('email'))
+            self._registrar({'op': 'criar', 'usuario': usuario})
+
+    def atualizar_usuario(self, user_id, campos=None, categorias=None,
+                          historico=None, termos_aprendidos=None, versao_esperada=None):
+        campos = {k: v for k, v in (campos or {}).items() if k in CAMPOS_EDITAVEIS}
+        categorias = {
+            nome: {k: v for k, v in dados.items() if k in CAMPOS_CATEGORIA}
+            for nome, dados in (categorias or {}).items()
+        }
+        with self._lock:
+            self._conferir_versao(user_id, versao_esperada)
+            if 'email' in campos:
+                self._conferir_email(campos['email'], user_id)
+            self._registrar({
+                'op': 'atualizar',
+                'usuario_id': user_id,
+                'campos': campos,
+                'categorias': categorias,
+                'historico': historico,
+                'termos_aprendidos': termos_aprendidos
+            })
+
+    def aplicar_alteracoes(self, user_id, campos=None, categorias=None, atividades=(),
+                           removidas=(), termos=None, versao_esperada=None):
+        campos = {k: v for k, v in (campos or {}).items() if k in CAMPOS_EDITAVEIS}
+        categorias = {
+            nome: {k: v for k, v in dados.items() if k in CAMPOS_CATEGORIA}
+            for nome, dados in (categorias or {}).items()
+        }
+        with self._lock:
+            self._conferir_versao(user_id, versao_esperada)
+            if 'email' in campos:
+                self._conferir_email(campos['email'], user_id)
+            # Só o que mudou vai pro journal, não o usuário inteiro
+            self._registrar({
+                'op': 'alterar',
+                'usuario_id': user_id,
+                'campos': campos,
+                'categorias': categorias,
+                'removidas': list(removidas),
+                'atividades': list(atividades),
+                'termos': termos or {}
+            })
+
+    def registrar_atividades(self, alteracoes):
+        with self._lock:
+            for alteracao in alteracoes:
+                self._conferir_versao(alteracao['usuario_id'], alteracao.get('versao_esperada'))
+            # Um registro só no journal pro lote todo: ou entra tudo, ou nada
+            self._registrar({
+                'op': 'atividades',
+                'alteracoes': [{
+                    'usuario_id': alteracao['usuario_id'],
+                    'atividades': alteracao['atividades'],
+                    'categorias': alteracao['categorias'],
+                    'pontuacao_total': alteracao['pontuacao_total'],
+                    'nivel': alteracao['nivel']
+                } for alteracao in alteracoes]
+            })
+
+    def atualizar_termos(self, user_id, categoria, termos):
+        with self._lock:
+            self._registrar({
+                'op': 'termos',
+                'usuario_id': user_id,
+                'categoria': categoria,
+                'termos': termos
+            })
+            return self._copiar_termos(user_id)
+
+    def fechar(self):
+        self._parar.set()
+        if self._compactador is not None:
+            self._compactador.join()
+        with self._lock:
+            self._journal.close()
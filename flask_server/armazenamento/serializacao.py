@@ -0,0 +1,34 @@
+"""
+Codificação JSON usada no journal, nos snapshots e nas respostas da API.
+
+Usa o orjson se ele estiver instalado (bem mais rápido pra codificar e
+decodificar usuários grandes); senão cai no json da biblioteca padrão.
+Nos dois casos a saída é compacta (sem espaços nem indentação) e em
+UTF-8, sem escapar acentos.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # opcional: pip install orjson
+    orjson = None
+
+USANDO_ORJSON = orjson is not None
+
+
+def codificar_json(dados):
+    """
+    dados -> bytes UTF-8.
+    """
+    if orjson is not None:
+        return orjson.dumps(dados)
+    return json.dumps(dados, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def decodificar_json(dados):
+    """
+    bytes ou str -> dados. Levanta ValueError se não for JSON válido.
+    """
+    if orjson is not None:
+        return orjson.loads(dados)
+    return json.loads(dados)
@@ -0,0 +1,439 @@
+"""
+Backend SQLite.
+
+Cada parte do usuário fica numa tabela própria (usuarios, categorias,
+historico, termos), com índices por usuário. Assim uma atividade nova é
+um INSERT e alguns UPDATEs, e não uma regravação do arquivo inteiro.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from .base import (ArmazenamentoUsuarios, ConflitoDeVersao, EmailJaCadastrado,
+                   CAMPOS_EDITAVEIS, CAMPOS_CATEGORIA, avisar_email_repetido,
+                   decodificar_cursor, normalizar_email, paginar)
+from .agregados import categoria_da_atividade, dia_da_atividade
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    id TEXT PRIMARY KEY,
+    nome TEXT NOT NULL,
+    email TEXT NOT NULL DEFAULT '',
+    senha TEXT NOT NULL DEFAULT '',
+    nivel INTEGER NOT NULL DEFAULT 1,
+    pontuacao_total INTEGER NOT NULL DEFAULT 0,
+    data_criacao TEXT,
+    versao INTEGER NOT NULL DEFAULT 0,
+    email_normalizado TEXT NOT NULL DEFAULT ''
+);
+-- Email único (usuários sem email ficam de fora)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_usuarios_email
+    ON usuarios (email_normalizado) WHERE email_normalizado != '';
+
+CREATE TABLE IF NOT EXISTS categorias (
+    usuario_id TEXT NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+    nome TEXT NOT NULL,
+    ordem INTEGER NOT NULL DEFAULT 0,
+    pontos INTEGER NOT NULL DEFAULT 0,
+    meta INTEGER NOT NULL DEFAULT 100,
+    nivel INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (usuario_id, nome)
+);
+
+-- O id da atividade vem do cliente: só é único dentro de cada usuário
+CREATE TABLE IF NOT EXISTS historico (
+    id TEXT NOT NULL,
+    usuario_id TEXT NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+    data TEXT NOT NULL,
+    categoria TEXT,
+    descricao TEXT NOT NULL DEFAULT '',
+    pontos INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (usuario_id, id)
+);
+-- Índices na ordem (data, id) usada pela paginação do histórico
+CREATE INDEX IF NOT EXISTS idx_historico_usuario_data_id
+    ON historico (usuario_id, data, id);
+CREATE INDEX IF NOT EXISTS idx_historico_usuario_categoria_data_id
+    ON historico (usuario_id, categoria, data, id);
+
+-- Soma de pontos e de atividades por usuário, dia e categoria.
+-- Atualizada junto com cada INSERT no histórico.
+CREATE TABLE IF NOT EXISTS agregados_diarios (
+    usuario_id TEXT NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+    dia TEXT NOT NULL,
+    categoria TEXT NOT NULL,
+    pontos INTEGER NOT NULL DEFAULT 0,
+    atividades INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (usuario_id, dia, categoria)
+);
+
+CREATE TABLE IF NOT EXISTS termos (
+    usuario_id TEXT NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+    categoria TEXT NOT NULL,
+    termo TEXT NOT NULL,
+    contagem INTEGER NOT NULL DEFAULT 0,
+    peso REAL NOT NULL DEFAULT 1.0,
+    PRIMARY KEY (usuario_id, categoria, termo)
+);
+"""
+
+
+class ArmazenamentoSQLite(ArmazenamentoUsuarios):
+    """
+    Usa uma conexão por thread (o servidor do Flask atende cada requisição
+    numa thread) e o modo WAL, pra leituras não travarem as escritas.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._local = threading.local()
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        conn = self._conexao()
+        conn.executescript(ESQUEMA)
+
+    def _conexao(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.caminho)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._local.conn = conn
+        return conn
+
+    # ---------------- leitura ----------------
+
+    @contextmanager
+    def _leitura(self, conn):
+        # Transação só de leitura: as várias consultas de um usuário enxergam
+        # o mesmo estado do banco, mesmo com escritas acontecendo em paralelo
+        conn.execute('BEGIN')
+        try:
+            yield
+        finally:
+            conn.execute('COMMIT')
+
+    def obter_usuario(self, user_id, completo=False):
+        conn = self._conexao()
+        with self._leitura(conn):
+            return self._montar_usuario(conn, user_id, completo)
+
+    def _montar_usuario(self, conn, user_id, completo):
+        row = conn.execute('SELECT * FROM usuarios WHERE id = ?', (user_id,)).fetchone()
+        if row is None:
+            return None
+
+        usuario = {
+            'id': row['id'],
+            'nome': row['nome'],
+            'email': row['email'],
+            'senha': row['senha'],
+            'nivel': row['nivel'],
+            'pontuacao_total': row['pontuacao_total'],
+            'categorias': self._obter_categorias(conn, user_id),
+            'data_criacao': row['data_criacao'],
+            'versao': row['versao']
+        }
+        if completo:
+            usuario['historico'] = self._obter_historico(conn, user_id)
+            usuario['termos_aprendidos'] = self._obter_termos(conn, user_id)
+        return usuario
+
+    def obter_termos(self, user_id):
+        return self._obter_termos(self._conexao(), user_id)
+
+    def obter_agregados(self, user_id, dia_inicial):
+        conn = self._conexao()
+        with self._leitura(conn):
+            por_dia = {}
+            rows = conn.execute(
+                'SELECT dia, categoria, pontos, atividades FROM agregados_diarios '
+                'WHERE usuario_id = ? AND dia >= ?', (user_id, dia_inicial))
+            for row in rows:
+                por_dia.setdefault(row['dia'], {})[row['categoria']] = {
+                    'pontos': row['pontos'], 'atividades': row['atividades']}
+
+            rows = conn.execute(
+                'SELECT categoria, SUM(pontos) AS pontos, SUM(atividades) AS atividades '
+                'FROM agregados_diarios WHERE usuario_id = ? GROUP BY categoria', (user_id,))
+            por_categoria = {row['categoria']: {'pontos': row['pontos'], 'atividades': row['atividades']}
+                             for row in rows}
+        return por_dia, por_categoria
+
+    def existe_usuario(self, user_id):
+        row = self._conexao().execute(
+            'SELECT 1 FROM usuarios WHERE id = ?', (user_id,)).fetchone()
+        return row is not None
+
+    def obter_versao(self, user_id):
+        row = self._conexao().execute(
+            'SELECT versao FROM usuarios WHERE id = ?', (user_id,)).fetchone()
+        return row['versao'] if row else None
+
+    def listar_usuarios(self):
+        rows = self._conexao().execute(
+            'SELECT id, nome, email, senha, nivel, pontuacao_total FROM usuarios')
+        return [dict(row) for row in rows]
+
+    def obter_id_por_email(self, email):
+        email = normalizar_email(email)
+        if not email:
+            return None
+        row = self._conexao().execute(
+            'SELECT id FROM usuarios WHERE email_normalizado = ?', (email,)).fetchone()
+        return row['id'] if row else None
+
+    def obter_historico(self, user_id):
+        return self._obter_historico(self._conexao(), user_id)
+
+    def listar_historico(self, user_id, limite=None, cursor=None, desde=None,
+                         ate=None, categoria=None):
+        filtros = ['usuario_id = ?']
+        parametros = [user_id]
+        if categoria:
+            filtros.append('categoria = ?')
+            parametros.append(categoria)
+        if desde:
+            filtros.append('data >= ?')
+            parametros.append(desde)
+        if ate:
+            filtros.append('data < ?')
+            parametros.append(ate)
+        if cursor:
+            filtros.append('(data, id) < (?, ?)')
+            parametros.extend(decodificar_cursor(cursor))
+
+        sql = ('SELECT id, data, categoria, descricao, pontos FROM historico '
+               f'WHERE {" AND ".join(filtros)} ORDER BY data DESC, id DESC')
+        if limite is not None:
+            # Um a mais pra saber se existe próxima página
+            sql += ' LIMIT ?'
+            parametros.append(limite + 1)
+
+        rows = self._conexao().execute(sql, parametros)
+        return paginar([dict(row) for row in rows], limite)
+
+    def _obter_categorias(self, conn, user_id):
+        rows = conn.execute(
+            'SELECT nome, pontos, meta, nivel FROM categorias '
+            'WHERE usuario_id = ? ORDER BY ordem', (user_id,))
+        return {row['nome']: {'pontos': row['pontos'],
+                              'meta': row['meta'],
+                              'nivel': row['nivel']} for row in rows}
+
+    def _obter_historico(self, conn, user_id):
+        # rowid mantém a ordem em que as atividades foram registradas
+        rows = conn.execute(
+            'SELECT id, data, categoria, descricao, pontos FROM historico '
+            'WHERE usuario_id = ? ORDER BY rowid', (user_id,))
+        return [dict(row) for row in rows]
+
+    def _obter_termos(self, conn, user_id):
+        termos = {}
+        rows = conn.execute(
+            'SELECT categoria, termo, contagem, peso FROM termos '
+            'WHERE usuario_id = ? ORDER BY rowid', (user_id,))
+        for row in rows:
+            termos.setdefault(row['categoria'], {})[row['termo']] = {
+                'contagem': row['contagem'],
+                'peso': row['peso']
+            }
+        return termos
+
+    # ---------------- escrita ----------------
+
+    def criar_usuario(self, usuario):
+        conn = self._conexao()
+        with conn:
+            self._inserir_usuario(conn, usuario)
+
+    def importar_usuarios(self, usuarios):
+        # Tudo numa transação só: muito mais rápido que uma por usuário
+        importados = 0
+        ignorados = []
+        conn = self._conexao()
+        with conn:
+            for usuario in usuarios.values():
+                try:
+                    self._inserir_usuario(conn, usuario)
+                    importados += 1
+                except EmailJaCadastrado:
+                    avisar_email_repetido(usuario)
+                    ignorados.append(usuario.get('id'))
+        return importados, ignorados
+
+    def _inserir_usuario(self, conn, usuario):
+        user_id = usuario['id']
+        try:
+            conn.execute(
+                'INSERT INTO usuarios (id, nome, email, email_normalizado, senha, nivel, '
+                'pontuacao_total, data_criacao, versao) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (user_id, usuario.get('nome', 'Usuário'), usuario.get('email', ''),
+                 normalizar_email(usuario.get('email')), usuario.get('senha', ''),
+                 usuario.get('nivel', 1), usuario.get('pontuacao_total', 0),
+                 usuario.get('data_criacao'), usuario.get('versao', 0)))
+        except sqlite3.IntegrityError:
+            if self.obter_id_por_email(usuario.get('email')) is not None:
+                raise EmailJaCadastrado(usuario.get('email'))
+            raise
+
+        for ordem, (nome, cat) in enumerate(usuario.get('categorias', {}).items()):
+            conn.execute(
+                'INSERT INTO categorias (usuario_id, nome, ordem, pontos, meta, nivel) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (user_id, nome, ordem, cat.get('pontos', 0),
+                 cat.get('meta', 100), cat.get('nivel', 1)))
+
+        self._inserir_historico(conn, user_id, usuario.get('historico', []))
+        self._inserir_termos(conn, user_id, usuario.get('termos_aprendidos', {}))
+
+    def _inserir_historico(self, conn, user_id, historico):
+        conn.executemany(
+            'INSERT INTO historico (id, usuario_id, data, categoria, descricao, pontos) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [(atv['id'], user_id, atv.get('data', ''), atv.get('categoria'),
+              atv.get('descricao', ''), atv.get('pontos', 0)) for atv in historico])
+        for atv in historico:
+            self._somar_agregado(conn, user_id, atv)
+
+    def _somar_agregado(self, conn, user_id, atividade):
+        conn.execute(
+            'INSERT INTO agregados_diarios (usuario_id, dia, categoria, pontos, atividades) '
+            'VALUES (?, ?, ?, ?, 1) '
+            'ON CONFLICT (usuario_id, dia, categoria) DO UPDATE SET '
+            'pontos = pontos + excluded.pontos, atividades = atividades + 1',
+            (user_id, dia_da_atividade(atividade), categoria_da_atividade(atividade),
+             atividade.get('pontos', 0) or 0))
+
+    def _tirar_agregado(self, conn, user_id, atividade):
+        chave = (user_id, dia_da_atividade(atividade), categoria_da_atividade(atividade))
+        conn.execute(
+            'UPDATE agregados_diarios SET pontos = pontos - ?, atividades = atividades - 1 '
+            'WHERE usuario_id = ? AND dia = ? AND categoria = ?',
+            (atividade.get('pontos', 0) or 0, *chave))
+        conn.execute(
+            'DELETE FROM agregados_diarios '
+            'WHERE usuario_id = ? AND dia = ? AND categoria = ? AND atividades <= 0', chave)
+
+    def _inserir_termos(self, conn, user_id, termos_aprendidos):
+        for categoria, termos in termos_aprendidos.items():
+            conn.executemany(
+                'INSERT INTO termos (usuario_id, categoria, termo, contagem, peso) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(user_id, categoria, termo, info.get('contagem', 1), info.get('peso', 1.0))
+                 for termo, info in termos.items()])
+
+    def _incrementar_versao(self, conn, user_id, versao_esperada=None):
+        # Primeiro comando da transação: já pega a trava de escrita do banco
+        if versao_esperada is None:
+            conn.execute('UPDATE usuarios SET versao = versao + 1 WHERE id = ?', (user_id,))
+            return
+        cursor = conn.execute(
+            'UPDATE usuarios SET versao = versao + 1 WHERE id = ? AND versao = ?',
+            (user_id, versao_esperada))
+        if cursor.rowcount == 0:
+            raise ConflitoDeVersao(user_id)
+
+    def atualizar_usuario(self, user_id, campos=None, categorias=None,
+                          historico=None, termos_aprendidos=None, versao_esperada=None):
+        conn = self._conexao()
+        with conn:
+            self._incrementar_versao(conn, user_id, versao_esperada)
+            self._atualizar_campos(conn, user_id, campos or {})
+            self._atualizar_categorias(conn, user_id, categorias or {})
+
+            if historico is not None:
+                conn.execute('DELETE FROM historico WHERE usuario_id = ?', (user_id,))
+                conn.execute('DELETE FROM agregados_diarios WHERE usuario_id = ?', (user_id,))
+                self._inserir_historico(conn, user_id, historico)
+
+            if termos_aprendidos is not None:
+                conn.execute('DELETE FROM termos WHERE usuario_id = ?', (user_id,))
+                self._inserir_termos(conn, user_id, termos_aprendidos)
+
+    def _atualizar_campos(self, conn, user_id, campos):
+        campos = {k: v for k, v in campos.items() if k in CAMPOS_EDITAVEIS}
+        if 'email' in campos:
+            # Mantém o índice de emails junto com o email
+            campos['email_normalizado'] = normalizar_email(campos['email'])
+        if not campos:
+            return
+        sets = ', '.join(f'{k} = ?' for k in campos)
+        try:
+            conn.execute(f'UPDATE usuarios SET {sets} WHERE id = ?',
+                         (*campos.values(), user_id))
+        except sqlite3.IntegrityError:
+            if 'email' in campos:
+                raise EmailJaCadastrado(campos['email'])
+            raise
+
+    def _atualizar_categorias(self, conn, user_id, categorias):
+        for nome, dados in categorias.items():
+            dados = {k: v for k, v in dados.items() if k in CAMPOS_CATEGORIA}
+            if not dados:
+                continue
+            sets = ', '.join(f'{k} = ?' for k in dados)
+            conn.execute(f'UPDATE categorias SET {sets} WHERE usuario_id = ? AND nome = ?',
+                         (*dados.values(), user_id, nome))
+
+    def obter_atividade(self, user_id, atividade_id):
+        row = self._conexao().execute(
+            'SELECT id, data, categoria, descricao, pontos FROM historico '
+            'WHERE id = ? AND usuario_id = ?', (atividade_id, user_id)).fetchone()
+        return dict(row) if row else None
+
+    def registrar_atividades(self, alteracoes):
+        conn = self._conexao()
+        with conn:
+            for alteracao in alteracoes:
+                user_id = alteracao['usuario_id']
+                self._incrementar_versao(conn, user_id, alteracao.get('versao_esperada'))
+                self._inserir_historico(conn, user_id, alteracao['atividades'])
+                self._atualizar_categorias(conn, user_id, alteracao['categorias'])
+                conn.execute('UPDATE usuarios SET pontuacao_total = ?, nivel = ? WHERE id = ?',
+                             (alteracao['pontuacao_total'], alteracao['nivel'], user_id))
+
+    def aplicar_alteracoes(self, user_id, campos=None, categorias=None, atividades=(),
+                           removidas=(), termos=None, versao_esperada=None):
+        conn = self._conexao()
+        with conn:
+            self._incrementar_versao(conn, user_id, versao_esperada)
+            self._atualizar_campos(conn, user_id, campos or {})
+            self._atualizar_categorias(conn, user_id, categorias or {})
+            for atividade_id in removidas:
+                row = conn.execute(
+                    'SELECT data, categoria, pontos FROM historico WHERE id = ? AND usuario_id = ?',
+                    (atividade_id, user_id)).fetchone()
+                if row is not None:
+                    conn.execute('DELETE FROM historico WHERE id = ? AND usuario_id = ?',
+                                 (atividade_id, user_id))
+                    self._tirar_agregado(conn, user_id, dict(row))
+            self._inserir_historico(conn, user_id, list(atividades))
+            for categoria, termos_categoria in (termos or {}).items():
+                self._somar_termos(conn, user_id, categoria, termos_categoria)
+
+    def atualizar_termos(self, user_id, categoria, termos):
+        conn = self._conexao()
+        with conn:
+            self._incrementar_versao(conn, user_id)
+            self._somar_termos(conn, user_id, categoria, termos)
+        return self._obter_termos(conn, user_id)
+
+    def _somar_termos(self, conn, user_id, categoria, termos):
+        conn.executemany(
+            'INSERT INTO termos (usuario_id, categoria, termo, contagem, peso) '
+            'VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (usuario_id, categoria, termo) DO UPDATE SET '
+            'contagem = contagem + excluded.contagem, peso = excluded.peso',
+            [(user_id, categoria, termo, info.get('contagem', 1), info.get('peso', 1.0))
+             for termo, info in termos.items()])
+
+    def fechar(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
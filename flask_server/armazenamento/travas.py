@@ -0,0 +1,33 @@
+"""
+Travas (locks) por usuário.
+
+Escritas em usuários diferentes rodam em paralelo; escritas no mesmo
+usuário esperam uma pela outra. A trava de um usuário só existe enquanto
+alguém está usando, então o dict não cresce com o número de usuários.
+"""
+import threading
+from contextlib import contextmanager
+
+
+class TravasPorUsuario:
+
+    def __init__(self):
+        self._guarda = threading.Lock()
+        self._travas = {}  # user_id -> [lock, quantidade de threads usando]
+
+    @contextmanager
+    def travar(self, user_id):
+        with self._guarda:
+            entrada = self._travas.get(user_id)
+            if entrada is None:
+                entrada = self._travas[user_id] = [threading.Lock(), 0]
+            entrada[1] += 1
+
+        try:
+            with entrada[0]:
+                yield
+        finally:
+            with self._guarda:
+                entrada[1] -= 1
+                if entrada[1] == 0:
+                    del self._travas[user_id]
@@ -0,0 +1,41 @@
+"""
+Configuração do pytest pros testes do servidor (flask_server/tests).
+
+Ficar nesta pasta faz o pytest pôr flask_server/ no sys.path, então os
+testes importam app, ranking, armazenamento... como o servidor.
+"""
+import importlib
+import sys
+
+import pytest
+
+
+@pytest.fixture(params=['sqlite', 'memoria'])
+def servidor(request, tmp_path, monkeypatch):
+    """
+    O módulo app carregado do zero numa pasta de dados vazia, uma vez com
+    cada backend. Os pontos enviados valem (ECOSCORE_PONTUACAO=cliente),
+    pra os testes não dependerem do motor de pontuação.
+    """
+    monkeypatch.setenv('ECOSCORE_DADOS', str(tmp_path))
+    monkeypatch.setenv('ECOSCORE_ARMAZENAMENTO', request.param)
+    monkeypatch.setenv('ECOSCORE_PONTUACAO', 'cliente')
+    monkeypatch.setenv('ECOSCORE_COMPACTACAO_SEGUNDOS', '0')
+    if 'app' in sys.modules:
+        modulo = importlib.reload(sys.modules['app'])
+    else:
+        modulo = importlib.import_module('app')
+    yield modulo
+    modulo.store.fechar()
+
+
+@pytest.fixture
+def cliente(servidor):
+    return servidor.app.test_client()
+
+
+@pytest.fixture
+def usuario_id(cliente):
+    resposta = cliente.post('/api/cadastrar', json={
+        'nome': 'Ana', 'email': 'ana@exemplo.com', 'senha': 'segredo'})
+    return resposta.get_json()['usuario_id']
@@ -0,0 +1,30 @@
+"""
+Importa o antigo data/usuarios.json para o novo armazenamento.
+
+Uso (de dentro da pasta flask_server):
+    python importar_json.py
+    python importar_json.py --origem outro.json --backend sqlite --pasta data
+"""
+import argparse
+
+from armazenamento import BACKENDS, criar_armazenamento, importar_json
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa usuarios.json para o armazenamento do servidor")
+    parser.add_argument('--origem', default='data/usuarios.json', help="arquivo JSON antigo")
+    parser.add_argument('--backend', default='sqlite', choices=BACKENDS)
+    parser.add_argument('--pasta', default='data', help="pasta onde o backend guarda os dados")
+    args = parser.parse_args()
+
+    store = criar_armazenamento(args.backend, args.pasta)
+    total, ignorados = importar_json(store, args.origem)
+    store.fechar()
+    print(f"{total} usuário(s) importado(s) de {args.origem}")
+    if ignorados:
+        print(f"{len(ignorados)} usuário(s) NÃO importado(s), email já usado por outro: "
+              + ', '.join(map(str, ignorados)))
+
+
+if __name__ == '__main__':
+    main()
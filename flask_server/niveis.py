@@ -0,0 +1,37 @@
+"""
+Regra do nível geral do usuário.
+
+O nível é calculado só aqui no servidor, a partir da pontuação total:
+cada PONTOS_POR_NIVEL pontos sobem um nível.
+
+    0-99    -> nível 1
+    100-199 -> nível 2
+    200-299 -> nível 3
+    ...
+"""
+
+
+class RegraNivel:
+    def __init__(self, pontos_por_nivel=100):
+        if pontos_por_nivel <= 0:
+            raise ValueError('pontos_por_nivel deve ser maior que zero')
+        self.pontos_por_nivel = pontos_por_nivel
+
+    def nivel(self, pontuacao_total):
+        return max(1, int(pontuacao_total) // self.pontos_por_nivel + 1)
+
+    def progresso(self, pontuacao_total):
+        """
+        Nível e faixas de pontos que o cliente mostra:
+        - pontos_nivel_atual: pontuação em que o nível atual começou
+        - pontos_proximo_nivel: pontuação que leva ao próximo nível
+        - faltam_proximo_nivel: quanto falta pra chegar lá
+        """
+        nivel = self.nivel(pontuacao_total)
+        proximo = nivel * self.pontos_por_nivel
+        return {
+            'nivel': nivel,
+            'pontos_nivel_atual': (nivel - 1) * self.pontos_por_nivel,
+            'pontos_proximo_nivel': proximo,
+            'faltam_proximo_nivel': max(0, proximo - pontuacao_total)
+        }
@@ -0,0 +1,45 @@
+"""
+Pontuação das atividades no servidor.
+
+Usa o mesmo motor do cliente (motor_pontuacao.py, na raiz do projeto),
+então a estimativa que o usuário vê na tela é a pontuação que vale.
+O vocabulário é compilado uma vez, quando o servidor sobe; por
+requisição só entram os termos aprendidos do usuário.
+"""
+import json
+
+import raiz_projeto  # noqa: F401  (motor_pontuacao fica na raiz do projeto)
+from motor_pontuacao import VOCABULARIO_PADRAO, MotorPontuacao
+
+
+def carregar_vocabulario(caminho=None):
+    """
+    Vocabulário {categoria: {termo: bônus}} de um arquivo JSON, ou o
+    padrão do motor se nenhum caminho for informado.
+    """
+    if not caminho:
+        return VOCABULARIO_PADRAO
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class ServicoPontuacao:
+    def __init__(self, store, vocabulario=VOCABULARIO_PADRAO):
+        self.store = store
+        self.motor = MotorPontuacao(vocabulario=vocabulario)
+
+    def motor_do_usuario(self, user_id):
+        """
+        Motor com os termos aprendidos do usuário (None = só o vocabulário).
+        """
+        if user_id is None:
+            return self.motor
+        return self.motor.com_termos(self.store.obter_termos(user_id))
+
+    def pontuar_atividades(self, user_id, atividades):
+        """
+        Troca os pontos de cada atividade pelos calculados aqui.
+        """
+        motor = self.motor_do_usuario(user_id)
+        for atividade, pontos in zip(atividades, motor.repontuar(atividades)):
+            atividade['pontos'] = pontos
@@ -0,0 +1,14 @@
+"""
+Põe a raiz do projeto no sys.path do servidor.
+
+Os módulos que o servidor divide com o cliente (motor_pontuacao.py e
+historico_colunar.py) ficam só na raiz, num arquivo cada; quem usa um
+deles importa este módulo antes. Então o servidor precisa da raiz do
+projeto junto (não só da pasta flask_server) pra rodar.
+"""
+import os
+import sys
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ_PROJETO not in sys.path:
+    sys.path.append(RAIZ_PROJETO)
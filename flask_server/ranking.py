@@ -0,0 +1,183 @@
+"""
+Ranking de usuários mantido em memória e atualizado a cada mudança de
+pontuação, em vez de ser reconstruído e ordenado em todo GET /api/ranking.
+"""
+import threading
+from bisect import bisect_left, insort
+
+
+class ListaOrdenada:
+    """
+    Lista sempre ordenada, dividida em blocos pequenos (no máximo
+    TAMANHO_BLOCO itens cada). Inserir/remover mexe só num bloco, e achar
+    a posição de um item só soma o tamanho dos blocos anteriores.
+    """
+
+    TAMANHO_BLOCO = 512
+
+    def __init__(self, valores=()):
+        valores = sorted(valores)
+        self._blocos = [valores[i:i + self.TAMANHO_BLOCO]
+                        for i in range(0, len(valores), self.TAMANHO_BLOCO)]
+        self._maximos = [bloco[-1] for bloco in self._blocos]
+        self._tamanho = len(valores)
+
+    def __len__(self):
+        return self._tamanho
+
+    def adicionar(self, valor):
+        if not self._blocos:
+            self._blocos.append([valor])
+            self._maximos.append(valor)
+        else:
+            i = min(bisect_left(self._maximos, valor), len(self._blocos) - 1)
+            bloco = self._blocos[i]
+            insort(bloco, valor)
+            self._maximos[i] = bloco[-1]
+            if len(bloco) > 2 * self.TAMANHO_BLOCO:
+                # Bloco grande demais: divide em dois
+                metade = bloco[self.TAMANHO_BLOCO:]
+                del bloco[self.TAMANHO_BLOCO:]
+                self._blocos.insert(i + 1, metade)
+                self._maximos[i] = bloco[-1]
+                self._maximos.insert(i + 1, metade[-1])
+        self._tamanho += 1
+
+    def remover(self, valor):
+        i = bisect_left(self._maximos, valor)
+        if i == len(self._blocos):
+            raise ValueError(valor)
+        bloco = self._blocos[i]
+        j = bisect_left(bloco, valor)
+        if j == len(bloco) or bloco[j] != valor:
+            raise ValueError(valor)
+        del bloco[j]
+        if bloco:
+            self._maximos[i] = bloco[-1]
+        else:
+            del self._blocos[i]
+            del self._maximos[i]
+        self._tamanho -= 1
+
+    def indice(self, valor):
+        """
+        Posição (a partir de 0) do valor na lista. ValueError se não existir.
+        """
+        i = bisect_left(self._maximos, valor)
+        if i == len(self._blocos):
+            raise ValueError(valor)
+        bloco = self._blocos[i]
+        j = bisect_left(bloco, valor)
+        if j == len(bloco) or bloco[j] != valor:
+            raise ValueError(valor)
+        return sum(len(b) for b in self._blocos[:i]) + j
+
+    def fatia(self, inicio, fim):
+        """
+        Itens das posições [inicio, fim), sem copiar a lista inteira.
+        """
+        inicio = max(0, inicio)
+        fim = min(self._tamanho, fim)
+        resultado = []
+        pos = 0
+        for bloco in self._blocos:
+            if pos + len(bloco) <= inicio:
+                pos += len(bloco)
+                continue
+            if pos >= fim:
+                break
+            resultado.extend(bloco[max(0, inicio - pos):fim - pos])
+            pos += len(bloco)
+        return resultado
+
+
+class Ranking:
+    """
+    Ordem: maior pontuação primeiro; empate desempata pelo id.
+    Cada chave na ListaOrdenada é (-pontuacao_total, user_id).
+
+    'versao' sobe a cada mudança no ranking (útil pra cache/ETag).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ordem = ListaOrdenada()
+        self._usuarios = {}  # user_id -> {'nome', 'nivel', 'pontuacao_total'}
+        self.versao = 0
+
+    def carregar(self, usuarios):
+        """
+        Monta o ranking do zero a partir de store.listar_usuarios().
+        """
+        with self._lock:
+            self._usuarios = {
+                u['id']: {'nome': u['nome'], 'nivel': u['nivel'], 'pontuacao_total': u['pontuacao_total']}
+                for u in usuarios
+            }
+            self._ordem = ListaOrdenada(
+                (-info['pontuacao_total'], user_id) for user_id, info in self._usuarios.items())
+            self.versao += 1
+
+    def atualizar(self, usuario):
+        """
+        Insere ou atualiza um usuário (precisa de id, nome, nivel e
+        pontuacao_total). Só reposiciona se a pontuação mudou.
+        """
+        user_id = usuario['id']
+        novo = {'nome': usuario['nome'], 'nivel': usuario['nivel'],
+                'pontuacao_total': usuario['pontuacao_total']}
+        with self._lock:
+            atual = self._usuarios.get(user_id)
+            if atual == novo:
+                return
+            if atual is None:
+                self._ordem.adicionar((-novo['pontuacao_total'], user_id))
+            elif atual['pontuacao_total'] != novo['pontuacao_total']:
+                self._ordem.remover((-atual['pontuacao_total'], user_id))
+                self._ordem.adicionar((-novo['pontuacao_total'], user_id))
+            self._usuarios[user_id] = novo
+            self.versao += 1
+
+    @property
+    def total(self):
+        return len(self._ordem)
+
+    def posicao(self, user_id):
+        """
+        Posição (1 = primeiro lugar) ou None se o usuário não está no ranking.
+        """
+        with self._lock:
+            info = self._usuarios.get(user_id)
+            if info is None:
+                return None
+            return self._ordem.indice((-info['pontuacao_total'], user_id)) + 1
+
+    def pagina(self, offset, limit):
+        with self._lock:
+            return self._montar(offset, self._ordem.fatia(offset, offset + limit))
+
+    def ao_redor(self, user_id, raio):
+        """
+        Janela com 'raio' usuários antes e depois de user_id.
+        Retorna None se o usuário não está no ranking.
+        """
+        with self._lock:
+            info = self._usuarios.get(user_id)
+            if info is None:
+                return None
+            indice = self._ordem.indice((-info['pontuacao_total'], user_id))
+            inicio = max(0, indice - raio)
+            return self._montar(inicio, self._ordem.fatia(inicio, indice + raio + 1))
+
+    def _montar(self, inicio, chaves):
+        linhas = []
+        for posicao, (_, user_id) in enumerate(chaves, inicio + 1):
+            info = self._usuarios[user_id]
+            linhas.append({
+                'id': user_id,
+                'nome': info['nome'],
+                'nivel': info['nivel'],
+                'pontuacao_total': info['pontuacao_total'],
+                'posicao': posicao
+            })
+        return linhas
@@ -0,0 +1,133 @@
+"""
+Índice global dos termos aprendidos, somando todos os usuários.
+
+Para cada categoria guarda termo -> contagem total, quantos usuários
+têm o termo e a soma dos pesos (o peso do termo é a média entre esses
+usuários). É mantido em memória e atualizado a cada mudança nos termos
+de um usuário, sem varrer os outros. Os termos mais usados de cada
+categoria ficam numa ListaOrdenada (a mesma do ranking), então o top-K
+é só uma fatia.
+"""
+import threading
+
+from ranking import ListaOrdenada
+
+
+class IndiceTermos:
+    """
+    Ordem do top-K: maior contagem primeiro; empate pelo termo.
+    Cada chave na ListaOrdenada é (-contagem, termo).
+
+    'versao' sobe a cada mudança (útil pra cache/ETag).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._termos = {}  # categoria -> {termo: {'contagem', 'usuarios', 'soma_pesos'}}
+        self._ordem = {}   # categoria -> ListaOrdenada de (-contagem, termo)
+        self.versao = 0
+
+    def carregar(self, termos_por_usuario):
+        """
+        Monta o índice do zero a partir dos termos de cada usuário
+        ({categoria: {termo: {contagem, peso}}}, como em store.obter_termos).
+        """
+        with self._lock:
+            self._termos = {}
+            for termos_aprendidos in termos_por_usuario:
+                self._somar(termos_aprendidos, 1)
+            self._ordem = {
+                categoria: ListaOrdenada((-info['contagem'], termo) for termo, info in termos.items())
+                for categoria, termos in self._termos.items()
+            }
+            self.versao += 1
+
+    def atualizar(self, antes, depois):
+        """
+        Aplica a mudança nos termos de um usuário: tira o que ele tinha
+        ('antes') e soma o que tem agora ('depois'). Só os termos que
+        mudaram são mexidos e reposicionados.
+        """
+        alterados = set()
+        for categoria in set(antes) | set(depois):
+            termos_antes = antes.get(categoria, {})
+            termos_depois = depois.get(categoria, {})
+            for termo in set(termos_antes) | set(termos_depois):
+                if termos_antes.get(termo) != termos_depois.get(termo):
+                    alterados.add((categoria, termo))
+        if not alterados:
+            return
+
+        with self._lock:
+            contagens = {(categoria, termo): self._contagem(categoria, termo)
+                         for categoria, termo in alterados}
+            self._somar(self._so(antes, alterados), -1)
+            self._somar(self._so(depois, alterados), 1)
+            for (categoria, termo), anterior in contagens.items():
+                atual = self._contagem(categoria, termo)
+                if anterior == atual:
+                    continue
+                ordem = self._ordem.setdefault(categoria, ListaOrdenada())
+                if anterior is not None:
+                    ordem.remover((-anterior, termo))
+                if atual is not None:
+                    ordem.adicionar((-atual, termo))
+            self.versao += 1
+
+    def categorias(self):
+        with self._lock:
+            return sorted(categoria for categoria, ordem in self._ordem.items() if len(ordem))
+
+    def total(self, categoria):
+        with self._lock:
+            ordem = self._ordem.get(categoria)
+            return len(ordem) if ordem else 0
+
+    def top(self, categoria, limite):
+        """
+        Os 'limite' termos mais usados da categoria, com contagem total,
+        número de usuários e peso médio.
+        """
+        with self._lock:
+            ordem = self._ordem.get(categoria)
+            if not ordem:
+                return []
+            termos = self._termos[categoria]
+            linhas = []
+            for _, termo in ordem.fatia(0, limite):
+                info = termos[termo]
+                linhas.append({
+                    'termo': termo,
+                    'contagem': info['contagem'],
+                    'usuarios': info['usuarios'],
+                    'peso': info['soma_pesos'] / info['usuarios']
+                })
+            return linhas
+
+    def _contagem(self, categoria, termo):
+        info = self._termos.get(categoria, {}).get(termo)
+        return info['contagem'] if info else None
+
+    @staticmethod
+    def _so(termos_aprendidos, alterados):
+        return {
+            categoria: {termo: info for termo, info in termos.items() if (categoria, termo) in alterados}
+            for categoria, termos in termos_aprendidos.items()
+        }
+
+    def _somar(self, termos_aprendidos, sinal):
+        """
+        Soma (sinal=1) ou tira (sinal=-1) os termos de um usuário.
+        Termos que ficam sem nenhum usuário saem do índice.
+        """
+        for categoria, termos in termos_aprendidos.items():
+            termos_cat = self._termos.setdefault(categoria, {})
+            for termo, info in termos.items():
+                total = termos_cat.setdefault(termo, {'contagem': 0, 'usuarios': 0, 'soma_pesos': 0.0})
+                total['contagem'] += sinal * info.get('contagem', 1)
+                total['usuarios'] += sinal
+                total['soma_pesos'] += sinal * info.get('peso', 1.0)
+                if total['usuarios'] <= 0:
+                    del termos_cat[termo]
+            if not termos_cat:
+                del self._termos[categoria]
@@ -0,0 +1,80 @@
+"""
+GET /api/usuarios/<id>/historico: filtros since/until e paginação,
+iguais nos dois backends.
+"""
+import uuid
+
+import pytest
+
+
+def atividade(data, categoria='Água', pontos=1):
+    return {'id': str(uuid.uuid4()), 'data': data, 'categoria': categoria,
+            'descricao': 'teste', 'pontos': pontos}
+
+
+@pytest.fixture
+def historico(cliente, usuario_id):
+    datas = ['2024-05-01T08:00:00', '2024-05-01T23:59:59', '2024-05-02T00:00:00',
+             '2024-05-03T12:00:00', '2024-05-04T09:30:00']
+    itens = [atividade(data, ('Água', 'Energia')[n % 2]) for n, data in enumerate(datas)]
+    resposta = cliente.post(f'/api/usuarios/{usuario_id}/atividades/lote', json=itens)
+    assert resposta.get_json()['aceitas'] == len(itens)
+    return sorted(itens, key=lambda a: (a['data'], a['id']), reverse=True)
+
+
+def datas(resposta):
+    assert resposta.status_code == 200
+    return [a['data'] for a in resposta.get_json()]
+
+
+def test_since_until(cliente, usuario_id, historico):
+    url = f'/api/usuarios/{usuario_id}/historico'
+    assert datas(cliente.get(url)) == [a['data'] for a in historico]
+    assert datas(cliente.get(url + '?since=2024-05-02&until=2024-05-04')) == [
+        '2024-05-03T12:00:00', '2024-05-02T00:00:00']
+    # Data e hora, com fuso (o fuso é ignorado, como nas datas gravadas)
+    assert datas(cliente.get(url, query_string={'since': '2024-05-01T23:59:59+03:00',
+                                                'until': '2024-05-02T00:00:01'})) == [
+        '2024-05-02T00:00:00', '2024-05-01T23:59:59']
+    assert datas(cliente.get(url + '?since=2024-05-04&categoria=Água')) == ['2024-05-04T09:30:00']
+    assert datas(cliente.get(url + '?since=2024-05-05')) == []
+
+
+def test_since_until_invalidos(cliente, usuario_id, historico):
+    url = f'/api/usuarios/{usuario_id}/historico'
+    for parametros in ('since=ontem', 'until=2024-13-01', 'since=01/05/2024', 'limit=abc'):
+        resposta = cliente.get(f'{url}?{parametros}')
+        assert resposta.status_code == 400, parametros
+        assert resposta.get_json()['erro'] == 'Parâmetros de paginação inválidos'
+
+
+def test_paginas_com_filtro(cliente, usuario_id, historico):
+    url = f'/api/usuarios/{usuario_id}/historico'
+    vistas, cursor = [], None
+    while True:
+        parametros = {'limit': 2, 'since': '2024-05-01T12:00:00'}
+        if cursor:
+            parametros['cursor'] = cursor
+        resposta = cliente.get(url, query_string=parametros)
+        vistas += datas(resposta)
+        cursor = resposta.headers.get('X-Proximo-Cursor')
+        if not cursor:
+            break
+    assert vistas == [a['data'] for a in historico if a['data'] >= '2024-05-01T12:00:00']
+
+
+def test_mesmo_id_em_dois_usuarios(cliente, usuario_id):
+    # O id da atividade é único por usuário, não no banco todo
+    outro_id = cliente.post('/api/cadastrar', json={'nome': 'Bia', 'email': 'bia@exemplo.com',
+                                                    'senha': 's'}).get_json()['usuario_id']
+    item = atividade('2024-05-01T08:00:00', pontos=10)
+    for user_id in (usuario_id, outro_id):
+        resposta = cliente.post(f'/api/usuarios/{user_id}/atividades/lote', json=[item])
+        assert resposta.get_json()['resultados'][0]['repetida'] is False
+        assert resposta.get_json()['usuario']['pontuacao_total'] == 10
+
+    # Remover de um não mexe no outro
+    resposta = cliente.patch(f'/api/usuarios/{usuario_id}', json=[{'op': 'remover_atividade', 'id': item['id']}])
+    assert resposta.get_json()['pontuacao_total'] == 0
+    assert cliente.get(f'/api/usuarios/{usuario_id}/historico').get_json() == []
+    assert [a['id'] for a in cliente.get(f'/api/usuarios/{outro_id}/historico').get_json()] == [item['id']]
@@ -0,0 +1,118 @@
+"""
+HistoricoColunar: a conversão pras colunas não perde nada, a ordem é
+sempre (data, id) e as somas batem com AgregadosUsuario.
+"""
+import random
+import uuid
+
+import raiz_projeto  # noqa: F401
+from armazenamento.agregados import AgregadosUsuario
+from historico_colunar import HistoricoColunar
+
+# Atividades no formato atual da API
+CANONICAS = [
+    {'id': str(uuid.UUID(int=n, version=4)), 'data': f'2024-05-{1 + n % 5:02d}T{n % 24:02d}:30:00',
+     'categoria': ('Água', 'Energia', 'Mobilidade')[n % 3], 'descricao': f'atividade {n} çã',
+     'pontos': n * 3}
+    for n in range(1, 40)
+]
+
+# O que dados antigos ou importados trazem e não cabe nas colunas
+LEGADAS = [
+    {'id': 'legado-1', 'data': '02/05/2024 14:00', 'categoria': 'Água', 'descricao': 'formato antigo', 'pontos': 4},
+    {'id': str(uuid.uuid4()), 'data': '2024-05-03T09:00:00+03:00', 'categoria': 'Energia',
+     'descricao': 'com fuso', 'pontos': 6},
+    {'id': str(uuid.uuid4()).upper(), 'data': '2024-05-03T09:00:00', 'categoria': 'Energia',
+     'descricao': 'uuid maiúsculo', 'pontos': 1},
+    {'id': 7, 'data': '2024-05-04T10:00:00.250000', 'categoria': None, 'descricao': None, 'pontos': 2.5},
+    {'id': str(uuid.uuid4()), 'data': 'ontem', 'categoria': 'Resíduos', 'descricao': 'data inválida', 'pontos': None},
+    {'data': '2024-05-01T07:00:00', 'categoria': 'Água', 'pontos': 3},
+    {'id': str(uuid.uuid4()), 'data': '2024-05-02T07:00:00', 'categoria': 'Água', 'descricao': 'extra',
+     'pontos': 2 ** 70, 'origem': 'importação'},
+]
+
+TODAS = CANONICAS + LEGADAS
+
+
+def ordenadas(atividades):
+    return sorted(atividades, key=repr)
+
+
+def somas(agregados):
+    return agregados.por_dia, agregados.por_categoria
+
+
+def test_ida_e_volta_sem_perdas():
+    colunas = HistoricoColunar(TODAS)
+    assert len(colunas) == len(TODAS)
+    assert ordenadas(colunas.para_atividades()) == ordenadas(TODAS)
+
+
+def test_ordem_por_data_e_id():
+    colunas = HistoricoColunar(CANONICAS)
+    esperado = sorted(CANONICAS, key=lambda a: (a['data'], a['id']))
+    assert colunas.para_atividades() == esperado
+    chaves = [colunas.chave(i) for i in range(len(colunas))]
+    assert chaves == sorted(chaves)
+
+
+def test_adicionar_fora_de_ordem():
+    embaralhadas = list(TODAS)
+    random.Random(1).shuffle(embaralhadas)
+    colunas = HistoricoColunar()
+    for atividade in embaralhadas:
+        colunas.adicionar(atividade)
+    assert colunas.para_atividades() == HistoricoColunar(TODAS).para_atividades()
+
+
+def test_indice_do_id():
+    colunas = HistoricoColunar(TODAS)
+    for atividade in TODAS:
+        if 'id' in atividade:
+            assert colunas.atividade(colunas.indice_do_id(atividade['id'])) == atividade
+    assert colunas.indice_do_id(str(uuid.uuid4())) is None
+    assert colunas.indice_do_id('nao-existe') is None
+    # O UUID maiúsculo ficou à parte: a forma minúscula é outro id
+    assert colunas.indice_do_id(LEGADAS[2]['id'].lower()) is None
+
+
+def test_remover():
+    colunas = HistoricoColunar(TODAS)
+    restantes = list(TODAS)
+    sorteio = random.Random(2)
+    while restantes:
+        atividade = restantes.pop(sorteio.randrange(len(restantes)))
+        i = next(i for i in range(len(colunas)) if colunas.atividade(i) == atividade)
+        assert colunas.remover(i) == atividade
+        assert ordenadas(colunas.para_atividades()) == ordenadas(restantes)
+    assert len(colunas) == 0
+
+
+def test_somas_batem_com_agregados():
+    # Categoria que não é texto não tem coluna própria (vira 'Outros'): fica de fora
+    atividades = [a for a in TODAS if a.get('categoria') is None or isinstance(a['categoria'], str)]
+    colunas = HistoricoColunar(atividades)
+    assert somas(AgregadosUsuario.de_colunas(colunas)) == somas(AgregadosUsuario(atividades))
+
+    # Depois de alterações, refazer das colunas dá o mesmo que manter junto
+    agregados = AgregadosUsuario(atividades)
+    sorteio = random.Random(3)
+    for n in range(20):
+        if n % 3 == 2:
+            agregados.remover(colunas.remover(sorteio.randrange(len(colunas))))
+        else:
+            nova = {'id': str(uuid.uuid4()), 'data': f'2024-06-{1 + n % 4:02d}T12:00:00',
+                    'categoria': 'Consumo Consciente', 'descricao': '', 'pontos': n}
+            colunas.adicionar(nova)
+            agregados.adicionar(nova)
+        assert somas(AgregadosUsuario.de_colunas(colunas)) == somas(agregados)
+
+
+def test_faixa_de_dias():
+    colunas = HistoricoColunar(CANONICAS)
+    dia = colunas.somar_por_dia()
+    primeiro, ultimo = min(dia), max(dia)
+    assert colunas.faixa_de_dias(primeiro, ultimo) == (0, len(colunas))
+    inicio, fim = colunas.faixa_de_dias(ultimo, ultimo)
+    assert all(colunas.atividade(i)['data'].startswith(ultimo.isoformat()) for i in range(inicio, fim))
+    assert fim - inicio == sum(1 for a in CANONICAS if a['data'].startswith(ultimo.isoformat()))
@@ -0,0 +1,165 @@
+"""
+Backend em memória: o estado depois de reiniciar (snapshot + journal)
+tem que ser o mesmo de antes.
+"""
+import os
+
+import pytest
+
+from armazenamento.base import ConflitoDeVersao
+from armazenamento.memoria import (ARQUIVO_JOURNAL, ARQUIVO_JOURNAL_ANTIGO,
+                                   ARQUIVO_SNAPSHOT, ArmazenamentoMemoria)
+
+
+def abrir(pasta):
+    return ArmazenamentoMemoria(str(pasta), intervalo_compactacao=0)
+
+
+def novo_usuario(user_id, email):
+    return {
+        'id': user_id, 'nome': user_id, 'email': email, 'senha': 's',
+        'nivel': 1, 'pontuacao_total': 0,
+        'categorias': {'Água': {'pontos': 0, 'meta': 100, 'nivel': 1}},
+        'historico': [], 'termos_aprendidos': {}
+    }
+
+
+def atividade(n, pontos=10):
+    return {'id': f'00000000-0000-4000-8000-{n:012d}', 'data': f'2024-05-0{n}T08:00:00',
+            'categoria': 'Água', 'descricao': f'atividade {n}', 'pontos': pontos}
+
+
+def estado(store, user_id):
+    return (store.obter_usuario(user_id, completo=True),
+            store.listar_historico(user_id),
+            store.obter_agregados(user_id, '2024-05-01'))
+
+
+def popular(store):
+    store.criar_usuario(novo_usuario('u1', 'u1@exemplo.com'))
+    store.criar_usuario(novo_usuario('u2', 'u2@exemplo.com'))
+    store.registrar_atividades([{
+        'usuario_id': 'u1', 'atividades': [atividade(1), atividade(2)],
+        'categorias': {'Água': {'pontos': 20}}, 'pontuacao_total': 20, 'nivel': 1
+    }])
+    store.aplicar_alteracoes('u1', campos={'nome': 'Ana', 'email': 'ana@exemplo.com'},
+                             atividades=[atividade(3, 5)], removidas=[atividade(1)['id']],
+                             termos={'Água': {'banho': {'contagem': 2, 'peso': 1.5}}})
+    store.atualizar_termos('u1', 'Água', {'banho': {'contagem': 1, 'peso': 2.0}})
+    store.atualizar_usuario('u2', campos={'pontuacao_total': 7})
+
+
+def test_reaplica_journal_ao_reiniciar(tmp_path):
+    store = abrir(tmp_path)
+    popular(store)
+    antes = estado(store, 'u1')
+    store.fechar()
+    assert not os.path.exists(tmp_path / ARQUIVO_SNAPSHOT)
+
+    store = abrir(tmp_path)
+    assert estado(store, 'u1') == antes
+    usuario = store.obter_usuario('u1', completo=True)
+    assert usuario['nome'] == 'Ana'
+    assert usuario['versao'] == 3
+    assert [a['id'] for a in usuario['historico']] == [atividade(2)['id'], atividade(3)['id']]
+    assert usuario['termos_aprendidos'] == {'Água': {'banho': {'contagem': 3, 'peso': 2.0}}}
+    assert store.obter_id_por_email('ANA@exemplo.com') == 'u1'
+    assert store.obter_id_por_email('u1@exemplo.com') is None
+    assert store.obter_usuario('u2')['pontuacao_total'] == 7
+    store.fechar()
+
+
+def test_snapshot_mais_journal(tmp_path):
+    store = abrir(tmp_path)
+    popular(store)
+    store.compactar()
+    assert os.path.getsize(tmp_path / ARQUIVO_JOURNAL) == 0
+    # Escritas depois do snapshot ficam só no journal
+    store.aplicar_alteracoes('u1', removidas=[atividade(2)['id']])
+    antes = estado(store, 'u1')
+    store.fechar()
+
+    store = abrir(tmp_path)
+    assert estado(store, 'u1') == antes
+    assert [a['id'] for a in store.obter_historico('u1')] == [atividade(3)['id']]
+    store.fechar()
+
+
+def test_compactacao_interrompida(tmp_path):
+    store = abrir(tmp_path)
+    popular(store)
+    antes = estado(store, 'u1')
+    store.fechar()
+    # Queda logo depois da troca de journal, antes do snapshot ficar pronto
+    os.replace(tmp_path / ARQUIVO_JOURNAL, tmp_path / ARQUIVO_JOURNAL_ANTIGO)
+
+    store = abrir(tmp_path)
+    assert estado(store, 'u1') == antes
+    assert not os.path.exists(tmp_path / ARQUIVO_JOURNAL_ANTIGO)
+    assert os.path.exists(tmp_path / ARQUIVO_SNAPSHOT)
+    store.fechar()
+
+
+def test_ultima_linha_cortada(tmp_path):
+    store = abrir(tmp_path)
+    popular(store)
+    antes = estado(store, 'u1')
+    store.atualizar_usuario('u1', campos={'nome': 'perdido'})
+    store.fechar()
+    caminho = tmp_path / ARQUIVO_JOURNAL
+    conteudo = caminho.read_bytes()
+    caminho.write_bytes(conteudo[:-10])
+
+    store = abrir(tmp_path)
+    assert estado(store, 'u1') == antes
+    store.fechar()
+
+
+def test_conflito_de_versao_nao_grava(tmp_path):
+    store = abrir(tmp_path)
+    popular(store)
+    versao = store.obter_versao('u1')
+    with pytest.raises(ConflitoDeVersao):
+        store.aplicar_alteracoes('u1', campos={'nome': 'x'}, versao_esperada=versao - 1)
+    store.fechar()
+
+    store = abrir(tmp_path)
+    assert store.obter_versao('u1') == versao
+    assert store.obter_usuario('u1')['nome'] == 'Ana'
+    store.fechar()
+
+
+@pytest.mark.parametrize('alteracao', [
+    {'historico': 'abc'},
+    {'historico': [{'id': 'a', 'data': 5}]},
+    {'historico': [{'id': 'a', 'pontos': 'x'}]},
+    {'termos_aprendidos': {'Água': {'banho': {'contagem': 'x'}}}},
+])
+def test_registro_invalido_nao_vai_pro_journal(tmp_path, alteracao):
+    store = abrir(tmp_path)
+    popular(store)
+    antes = estado(store, 'u1')
+    tamanho = os.path.getsize(tmp_path / ARQUIVO_JOURNAL)
+    with pytest.raises(ValueError):
+        store.atualizar_usuario('u1', **alteracao)
+    assert os.path.getsize(tmp_path / ARQUIVO_JOURNAL) == tamanho
+    assert estado(store, 'u1') == antes
+    store.fechar()
+
+    store = abrir(tmp_path)
+    assert estado(store, 'u1') == antes
+    store.fechar()
+
+
+@pytest.mark.parametrize('servidor', ['memoria'], indirect=True)
+def test_reinicia_depois_de_put_recusado(servidor):
+    cliente = servidor.app.test_client()
+    user_id = cliente.post('/api/cadastrar', json={'email': 'ana@exemplo.com', 'senha': 's'}).get_json()['usuario_id']
+    for corpo in ({'historico': 'abc'}, {'categorias': [1]}, {'historico': [{'data': '2024-01-01'}]}):
+        assert cliente.put(f'/api/usuarios/{user_id}', json=corpo).status_code == 400
+    antes = servidor.store.obter_usuario(user_id, completo=True)
+    servidor.store.fechar()
+
+    store = abrir(servidor.store.pasta)
+    assert store.obter_usuario(user_id, completo=True) == antes
+    store.fechar()
@@ -0,0 +1,124 @@
+"""
+PATCH /api/usuarios/<id>: operações aplicadas em ordem e gravadas juntas
+(ou nenhuma), nos dois backends.
+"""
+import uuid
+
+
+def atividade(pontos, categoria='Água', data='2024-05-01T10:00:00'):
+    return {'id': str(uuid.uuid4()), 'categoria': categoria,
+            'descricao': 'banho curto', 'pontos': pontos, 'data': data}
+
+
+def alterar(cliente, usuario_id, operacoes, **kwargs):
+    return cliente.patch(f'/api/usuarios/{usuario_id}', json=operacoes, **kwargs)
+
+
+def test_operacoes_aplicadas_em_ordem(cliente, usuario_id):
+    primeira, segunda = atividade(30), atividade(20, 'Energia')
+    resposta = alterar(cliente, usuario_id, [
+        {'op': 'adicionar_atividades', 'atividades': [primeira, segunda]},
+        {'op': 'incrementar_pontos', 'pontos': 5},
+        {'op': 'definir', 'campos': {'nome': 'Ana Maria'}},
+        {'op': 'mesclar_termos', 'categoria': 'Água', 'termos': {'banho': {'contagem': 2, 'peso': 1.5}}},
+        {'op': 'remover_atividade', 'id': segunda['id']},
+    ])
+    assert resposta.status_code == 200
+    perfil = resposta.get_json()
+    assert perfil['nome'] == 'Ana Maria'
+    assert perfil['pontuacao_total'] == 35
+    assert perfil['categorias']['Água']['pontos'] == 30
+    assert perfil['categorias']['Energia']['pontos'] == 0
+
+    historico = cliente.get(f'/api/usuarios/{usuario_id}/historico').get_json()
+    assert [a['id'] for a in historico] == [primeira['id']]
+    termos = cliente.get(f'/api/usuarios/{usuario_id}/termos').get_json()
+    assert termos['Água']['banho'] == {'contagem': 2, 'peso': 1.5}
+
+
+def test_reenvio_nao_duplica(cliente, usuario_id):
+    item = atividade(10)
+    for _ in range(2):
+        resposta = alterar(cliente, usuario_id, [{'op': 'adicionar_atividades', 'atividades': [item]}])
+        assert resposta.status_code == 200
+    assert resposta.get_json()['pontuacao_total'] == 10
+
+
+def test_remover_atividade_gravada(cliente, usuario_id):
+    item = atividade(40)
+    alterar(cliente, usuario_id, [{'op': 'adicionar_atividades', 'atividades': [item]}])
+    resposta = alterar(cliente, usuario_id, [{'op': 'remover_atividade', 'id': item['id']},
+                                             {'op': 'remover_atividade', 'id': 'nao-existe'}])
+    assert resposta.status_code == 200
+    assert resposta.get_json()['pontuacao_total'] == 0
+    assert resposta.get_json()['categorias']['Água']['pontos'] == 0
+
+
+def test_erros_de_operacao(cliente, usuario_id):
+    casos = [
+        ({'op': 'definir', 'campos': {'nivel': 9}}, 'Operação 0: Campo não pode ser alterado: nivel'),
+        ({'op': 'apagar_tudo'}, 'Operação 0: Operação desconhecida: apagar_tudo'),
+        ({'op': 'incrementar_pontos', 'pontos': '5'}, 'Operação 0: pontos deve ser um número'),
+        ({'op': 'incrementar_pontos', 'pontos': 5, 'categoria': 'Xadrez'},
+         'Operação 0: Categoria desconhecida: Xadrez'),
+        ({'op': 'definir', 'campos': {'email': 123}}, 'Operação 0: email deve ser um texto'),
+        ({'op': 'definir', 'campos': {'pontuacao_total': True}},
+         'Operação 0: pontuacao_total deve ser um número'),
+        ({'op': 'mesclar_termos', 'categoria': 'Água', 'termos': {'banho': {'contagem': '2'}}},
+         'Operação 0: contagem do termo banho deve ser um número'),
+        ({'op': 'mesclar_termos', 'categoria': 'Água', 'termos': {'banho': {'peso': 'a'}}},
+         'Operação 0: peso do termo banho deve ser um número'),
+        ({'op': 'adicionar_atividades', 'atividades': {}}, 'Operação 0: atividades deve ser uma lista'),
+        ({'op': 'remover_atividade', 'id': [1]}, 'Operação 0: id deve ser um texto'),
+        ({'op': 'remover_atividade'}, 'Operação 0: id deve ser um texto'),
+    ]
+    for operacao, erro in casos:
+        resposta = alterar(cliente, usuario_id, [operacao])
+        assert resposta.status_code == 400, operacao
+        assert resposta.get_json()['erro'] == erro
+
+
+def test_erro_nao_grava_nada(cliente, usuario_id):
+    antes = cliente.get(f'/api/usuarios/{usuario_id}')
+    resposta = alterar(cliente, usuario_id, [
+        {'op': 'incrementar_pontos', 'pontos': 50},
+        {'op': 'adicionar_atividades', 'atividades': [atividade(10)]},
+        {'op': 'definir', 'campos': {'nome': None}},
+    ])
+    assert resposta.status_code == 400
+    assert resposta.get_json()['erro'] == 'Operação 2: nome deve ser um texto'
+
+    depois = cliente.get(f'/api/usuarios/{usuario_id}')
+    assert depois.headers['ETag'] == antes.headers['ETag']
+    assert depois.get_json() == antes.get_json()
+    historico = cliente.get(f'/api/usuarios/{usuario_id}/historico').get_json()
+    assert historico == []
+    assert cliente.get(f'/api/usuarios/{usuario_id}/termos').get_json() == {}
+
+
+def test_corpo_precisa_ser_lista(cliente, usuario_id):
+    for corpo in ({'op': 'incrementar_pontos', 'pontos': 1}, [1], 'x'):
+        resposta = alterar(cliente, usuario_id, corpo)
+        assert resposta.status_code == 400
+        assert resposta.get_json()['erro'] == 'O corpo deve ser uma lista de operações'
+
+
+def test_usuario_inexistente(cliente):
+    assert alterar(cliente, 'nao-existe', []).status_code == 404
+
+
+def test_email_repetido(cliente, usuario_id):
+    cliente.post('/api/cadastrar', json={'nome': 'Bia', 'email': 'bia@exemplo.com', 'senha': 's'})
+    resposta = alterar(cliente, usuario_id, [{'op': 'definir', 'campos': {'email': 'BIA@exemplo.com'}}])
+    assert resposta.status_code == 409
+    assert cliente.get(f'/api/usuarios/{usuario_id}').get_json()['email'] == 'ana@exemplo.com'
+
+
+def test_if_match(cliente, usuario_id):
+    etag = cliente.get(f'/api/usuarios/{usuario_id}').headers['ETag']
+    operacoes = [{'op': 'incrementar_pontos', 'pontos': 1}]
+    assert alterar(cliente, usuario_id, operacoes, headers={'If-Match': etag}).status_code == 200
+    # A mesma ETag agora está velha
+    resposta = alterar(cliente, usuario_id, operacoes, headers={'If-Match': etag})
+    assert resposta.status_code == 409
+    assert cliente.get(f'/api/usuarios/{usuario_id}').get_json()['pontuacao_total'] == 1
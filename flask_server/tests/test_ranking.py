@@ -0,0 +1,109 @@
+"""
+ListaOrdenada e Ranking comparados com uma lista comum ordenada a cada
+passo. Blocos pequenos pra que divisões e blocos vazios aconteçam.
+"""
+import random
+
+import pytest
+
+from ranking import ListaOrdenada, Ranking
+
+
+@pytest.fixture(autouse=True)
+def blocos_pequenos(monkeypatch):
+    monkeypatch.setattr(ListaOrdenada, 'TAMANHO_BLOCO', 4)
+
+
+def conferir(lista, esperado):
+    assert len(lista) == len(esperado)
+    assert lista.fatia(0, len(esperado)) == esperado
+    for valor in esperado:
+        # Com repetidos, indice é a primeira ocorrência
+        assert lista.indice(valor) == esperado.index(valor)
+
+
+def test_inicial_ordena():
+    valores = [random.Random(1).randrange(100) for _ in range(30)]
+    conferir(ListaOrdenada(valores), sorted(valores))
+    conferir(ListaOrdenada(), [])
+
+
+def test_adicionar_e_remover():
+    sorteio = random.Random(2)
+    lista, esperado = ListaOrdenada(), []
+    for passo in range(600):
+        if esperado and sorteio.random() < 0.4:
+            valor = sorteio.choice(esperado)
+            lista.remover(valor)
+            esperado.remove(valor)
+        else:
+            valor = sorteio.randrange(50)
+            lista.adicionar(valor)
+            esperado.append(valor)
+            esperado.sort()
+        if passo % 25 == 0:
+            conferir(lista, esperado)
+    conferir(lista, esperado)
+    # Esvazia tudo: blocos vazios somem e a lista volta a aceitar valores
+    for valor in list(esperado):
+        lista.remover(valor)
+    conferir(lista, [])
+    lista.adicionar(7)
+    conferir(lista, [7])
+
+
+def test_fatia_fora_dos_limites():
+    lista = ListaOrdenada(range(10))
+    assert lista.fatia(-5, 3) == [0, 1, 2]
+    assert lista.fatia(8, 50) == [8, 9]
+    assert lista.fatia(4, 6) == [4, 5]
+    assert lista.fatia(12, 20) == []
+    assert lista.fatia(5, 5) == []
+
+
+def test_valor_inexistente():
+    lista = ListaOrdenada([1, 3, 5, 7, 9, 11])
+    for valor in (0, 4, 12):
+        with pytest.raises(ValueError):
+            lista.remover(valor)
+        with pytest.raises(ValueError):
+            lista.indice(valor)
+    assert lista.fatia(0, 6) == [1, 3, 5, 7, 9, 11]
+    with pytest.raises(ValueError):
+        ListaOrdenada().remover(1)
+
+
+def usuario(user_id, pontos):
+    return {'id': user_id, 'nome': user_id, 'nivel': 1, 'pontuacao_total': pontos}
+
+
+def test_ranking_acompanha_pontuacao():
+    ranking = Ranking()
+    ranking.carregar([usuario(f'u{n:02d}', n % 7) for n in range(20)])
+    pontos = {f'u{n:02d}': n % 7 for n in range(20)}
+    sorteio = random.Random(3)
+    for _ in range(100):
+        user_id = sorteio.choice(sorted(pontos))
+        pontos[user_id] = sorteio.randrange(10)
+        ranking.atualizar(usuario(user_id, pontos[user_id]))
+
+    esperado = sorted(pontos, key=lambda u: (-pontos[u], u))
+    assert [linha['id'] for linha in ranking.pagina(0, 100)] == esperado
+    assert [linha['posicao'] for linha in ranking.pagina(5, 3)] == [6, 7, 8]
+    for posicao, user_id in enumerate(esperado, 1):
+        assert ranking.posicao(user_id) == posicao
+    janela = ranking.ao_redor(esperado[0], 2)
+    assert [linha['id'] for linha in janela] == esperado[:3]
+    assert ranking.posicao('ninguem') is None
+    assert ranking.ao_redor('ninguem', 2) is None
+
+
+def test_ranking_versao_so_muda_com_alteracao():
+    ranking = Ranking()
+    ranking.atualizar(usuario('a', 10))
+    versao = ranking.versao
+    ranking.atualizar(usuario('a', 10))
+    assert ranking.versao == versao
+    ranking.atualizar(dict(usuario('a', 10), nome='Ana'))
+    assert ranking.versao == versao + 1
+    assert ranking.pagina(0, 1)[0]['nome'] == 'Ana'
@@ -0,0 +1,82 @@
+"""
+Cadastro e PUT /api/usuarios/<id>: tipos dos campos e nível calculado
+pelo servidor, nos dois backends.
+"""
+
+
+def test_put_recalcula_nivel(cliente, usuario_id):
+    resposta = cliente.put(f'/api/usuarios/{usuario_id}', json={'pontuacao_total': 250, 'nivel': 99})
+    assert resposta.status_code == 200
+    perfil = resposta.get_json()
+    assert perfil['pontuacao_total'] == 250
+    assert perfil['nivel'] == 3
+
+
+def test_put_rejeita_tipos_errados(cliente, usuario_id):
+    casos = [
+        ({'pontuacao_total': '150'}, 'pontuacao_total deve ser um número'),
+        ({'pontuacao_total': True}, 'pontuacao_total deve ser um número'),
+        ({'pontuacao_total': None}, 'pontuacao_total deve ser um número'),
+        ({'email': 123}, 'email deve ser um texto'),
+        ({'nome': None}, 'nome deve ser um texto'),
+        ({'termos_aprendidos': {'Água': {'banho': {'peso': 'a'}}}}, 'peso do termo banho deve ser um número'),
+        ({'termos_aprendidos': []}, 'termos_aprendidos deve ser um objeto {categoria: termos}'),
+        ({'categorias': [1]}, 'categorias deve ser um objeto {categoria: {pontos, meta, nivel}}'),
+        ({'categorias': {'Água': 5}}, 'categorias deve ser um objeto {categoria: {pontos, meta, nivel}}'),
+        ({'categorias': {'Água': {'pontos': 'x'}}}, 'pontos da categoria Água deve ser um número'),
+        ({'categorias': {'Água': {'meta': None}}}, 'meta da categoria Água deve ser um número'),
+        ({'categorias': {'Xadrez': {'pontos': 1}}}, 'Categoria desconhecida: Xadrez'),
+        ({'historico': 'abc'}, 'historico deve ser uma lista de atividades'),
+        ({'historico': [1]}, 'historico deve ser uma lista de atividades'),
+        ({'historico': [{'data': '2024-01-01', 'pontos': 1}]}, 'Atividade 0 do historico: id deve ser um texto'),
+        ({'historico': [{'id': 'a', 'data': 5, 'pontos': 1}]},
+         'Atividade 0 do historico: data deve estar no formato ISO 8601'),
+        ({'historico': [{'id': 'a', 'data': '01/05/2024 10:00', 'pontos': 1}]},
+         'Atividade 0 do historico: data deve estar no formato ISO 8601'),
+        ({'historico': [{'id': 'a', 'data': '2024-01-01', 'pontos': '3'}]},
+         'Atividade 0 do historico: pontos deve ser um número'),
+        ({'historico': [{'id': 'a', 'data': '2024-01-01', 'pontos': 1, 'categoria': 3}]},
+         'Atividade 0 do historico: categoria deve ser um texto'),
+        ({'historico': [{'id': 'a', 'data': '2024-01-01', 'pontos': 1},
+                        {'id': 'a', 'data': '2024-01-02', 'pontos': 1}]},
+         'Atividade 1 do historico: id repetido: a'),
+        ([1], 'O corpo deve ser um objeto JSON'),
+    ]
+    antes = cliente.get(f'/api/usuarios/{usuario_id}')
+    for corpo, erro in casos:
+        resposta = cliente.put(f'/api/usuarios/{usuario_id}', json=corpo)
+        assert resposta.status_code == 400, corpo
+        assert resposta.get_json()['erro'] == erro
+    depois = cliente.get(f'/api/usuarios/{usuario_id}')
+    assert depois.headers['ETag'] == antes.headers['ETag']
+    assert depois.get_json() == antes.get_json()
+
+
+def test_put_historico_e_categorias(cliente, usuario_id):
+    historico = [{'id': 'legado-1', 'data': '2024-05-01T10:00:00', 'categoria': 'Água',
+                  'descricao': 'banho curto', 'pontos': 15}]
+    resposta = cliente.put(f'/api/usuarios/{usuario_id}', json={
+        'historico': historico, 'categorias': {'Água': {'pontos': 15, 'meta': 100, 'nivel': 1}}})
+    assert resposta.status_code == 200
+    assert resposta.get_json()['categorias']['Água']['pontos'] == 15
+    assert cliente.get(f'/api/usuarios/{usuario_id}/historico').get_json() == historico
+    # A categoria continua aceitando atividades
+    resposta = cliente.post(f'/api/usuarios/{usuario_id}/atividades/lote', json=[
+        {'categoria': 'Água', 'descricao': 'chuveiro', 'pontos': 5}])
+    assert resposta.get_json()['usuario']['categorias']['Água']['pontos'] == 20
+
+
+def test_cadastro_rejeita_tipos_errados(cliente):
+    for corpo in ({'nome': 'a', 'email': 5, 'senha': 's'}, {'nome': None, 'email': 'a@b'}, [1]):
+        resposta = cliente.post('/api/cadastrar', json=corpo)
+        assert resposta.status_code == 400, corpo
+        assert resposta.get_json()['sucesso'] is False
+    assert cliente.get('/api/ranking').get_json() == []
+
+
+def test_login(cliente, usuario_id):
+    resposta = cliente.post('/api/login', json={'email': ' ANA@exemplo.com', 'senha': 'segredo'})
+    assert resposta.status_code == 200
+    assert resposta.get_json()['usuario_id'] == usuario_id
+    for corpo in ({'email': 'ana@exemplo.com', 'senha': 'errada'}, {'email': ['x']}, {'email': 5}, [1]):
+        assert cliente.post('/api/login', json=corpo).status_code == 401
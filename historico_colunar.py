@@ -0,0 +1,381 @@
+"""
+Histórico de atividades em colunas, usado pelo cliente e pelo servidor.
+
+Em vez de um dict por atividade (id, data, categoria, descricao e pontos
+como objetos Python, centenas de bytes cada), cada campo vira uma coluna
+compacta do módulo array:
+- momento: microssegundos desde 1970-01-01 (int64, hora local, sem fuso)
+- id: os 16 bytes do UUID, num bytearray
+- categoria: código pequeno (uint16) numa tabela de nomes
+- pontos: int64
+- descrição: trecho (início, tamanho) de um bytearray UTF-8 único
+
+As linhas ficam ordenadas por (momento, id), então "mais recentes",
+períodos e paginação são buscas binárias, e as somas por dia e categoria
+são contas com inteiros, sem reinterpretar a data de cada atividade.
+
+A conversão é sem perdas: atividade(i) devolve exatamente o dict que
+entrou. O que não cabe nas colunas (id que não é UUID, data em outro
+formato ou com fuso, pontos fracionários, campos a mais ou faltando)
+fica guardado à parte só para aquela linha.
+"""
+import re
+from array import array
+from datetime import datetime, timedelta
+
+EPOCA = datetime(1970, 1, 1)
+DIA_EPOCA = EPOCA.date()
+US_POR_DIA = 86400 * 1000000
+UM_US = timedelta(microseconds=1)
+
+# Momento das atividades com data não reconhecida (ficam no começo)
+MOMENTO_DESCONHECIDO = (datetime.min - EPOCA) // UM_US
+
+# Campos que têm coluna, na ordem do JSON da API
+CAMPOS = ('id', 'data', 'categoria', 'descricao', 'pontos')
+_CONJUNTO_CAMPOS = frozenset(CAMPOS)
+
+# Em _ajustes: o campo não existia no dict original
+AUSENTE = object()
+
+_ID_VAZIO = bytes(16)
+
+# Forma canônica de um UUID (a que str(uuid.uuid4()) gera)
+_UUID_CANONICO = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+
+def _id_para_bytes(texto):
+    """
+    Id -> 16 bytes, ou None se não for um UUID na forma canônica.
+    """
+    if isinstance(texto, str) and _UUID_CANONICO.fullmatch(texto):
+        return bytes.fromhex(texto.replace('-', ''))
+    return None
+
+
+def _bytes_para_id(dados):
+    h = dados.hex()
+    return f'{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}'
+
+
+def interpretar_data(texto):
+    """
+    Data de uma atividade como datetime (sem fuso), ou None se não for
+    reconhecida. Aceita ISO 8601 e o formato antigo do cliente
+    ("dd/mm/AAAA HH:MM").
+    """
+    if not isinstance(texto, str):
+        return None
+    try:
+        return datetime.fromisoformat(texto).replace(tzinfo=None)
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(texto, "%d/%m/%Y %H:%M")
+    except ValueError:
+        return None
+
+
+def momento_de(texto):
+    """
+    Texto de data -> momento (int), na mesma escala da coluna.
+    """
+    data = interpretar_data(texto)
+    if data is None:
+        return MOMENTO_DESCONHECIDO
+    return (data - EPOCA) // UM_US
+
+
+def data_do_momento(momento):
+    return EPOCA + timedelta(microseconds=momento)
+
+
+def dia_do_momento(momento):
+    """
+    date do momento, ou None se a data não foi reconhecida.
+    """
+    if momento == MOMENTO_DESCONHECIDO:
+        return None
+    return DIA_EPOCA + timedelta(days=momento // US_POR_DIA)
+
+
+class HistoricoColunar:
+    def __init__(self, atividades=()):
+        self.substituir(atividades)
+
+    def substituir(self, atividades):
+        self._momentos = array('q')
+        self._ids = bytearray()
+        self._categorias = array('H')
+        self._pontos = array('q')
+        self._desc_inicio = array('q')
+        self._desc_tamanho = array('q')
+        self._textos = bytearray()
+        self._textos_removidos = 0
+        self._ajustes = {}          # linha -> {campo: valor original ou AUSENTE}
+        self.nomes_categorias = []  # código -> nome (pode ter None)
+        self._codigos = {}          # nome -> código
+        linhas = [self._converter(atividade) for atividade in atividades]
+        linhas.sort(key=lambda linha: (linha[0], linha[6]))
+        for i, (momento, id_bytes, categoria, pontos, descricao, ajustes, _) in enumerate(linhas):
+            if ajustes:
+                self._ajustes[i] = ajustes
+            self._momentos.append(momento)
+            self._ids += id_bytes
+            self._categorias.append(categoria)
+            self._pontos.append(pontos)
+            self._desc_inicio.append(len(self._textos))
+            self._desc_tamanho.append(len(descricao))
+            self._textos += descricao
+
+    def __len__(self):
+        return len(self._momentos)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.atividade(i)
+
+    # ---------------- conversão ----------------
+
+    def codigo_categoria(self, nome):
+        """
+        Código da categoria, ou None se nenhuma atividade a usa.
+        """
+        return self._codigos.get(nome)
+
+    def _codificar_categoria(self, nome):
+        codigo = self._codigos.get(nome)
+        if codigo is None:
+            codigo = self._codigos[nome] = len(self.nomes_categorias)
+            self.nomes_categorias.append(nome)
+        return codigo
+
+    def _converter(self, atividade):
+        """
+        Dict -> (momento, id_bytes, categoria, pontos, descricao_bytes,
+        ajustes, id_texto); id_texto é o id usado na ordem.
+        """
+        ajustes = {}
+        if atividade.keys() != _CONJUNTO_CAMPOS:
+            ajustes = {campo: valor for campo, valor in atividade.items() if campo not in CAMPOS}
+            for campo in CAMPOS:
+                if campo not in atividade:
+                    ajustes[campo] = AUSENTE
+
+        atividade_id = atividade.get('id')
+        id_bytes = _id_para_bytes(atividade_id)
+        if id_bytes is None:
+            id_bytes = _ID_VAZIO
+            if 'id' in atividade:
+                ajustes['id'] = atividade_id
+
+        texto_data = atividade.get('data')
+        data = interpretar_data(texto_data)
+        momento = MOMENTO_DESCONHECIDO if data is None else (data - EPOCA) // UM_US
+        if (data is None or data.isoformat() != texto_data) and 'data' in atividade:
+            ajustes['data'] = texto_data
+
+        categoria = atividade.get('categoria')
+        if categoria is not None and not isinstance(categoria, str):
+            ajustes['categoria'] = categoria
+            categoria = None
+
+        pontos = atividade.get('pontos', 0)
+        if type(pontos) is not int or not -2 ** 63 <= pontos < 2 ** 63:
+            if 'pontos' in atividade:
+                ajustes['pontos'] = pontos
+            pontos = 0
+
+        descricao = atividade.get('descricao')
+        if not isinstance(descricao, str):
+            if 'descricao' in atividade:
+                ajustes['descricao'] = descricao
+            descricao = ''
+
+        return (momento, id_bytes, self._codificar_categoria(categoria), pontos,
+                descricao.encode('utf-8', 'surrogatepass'), ajustes,
+                atividade_id if isinstance(atividade_id, str) else '')
+
+    def atividade(self, i):
+        """
+        A linha i no formato da API (o mesmo dict que entrou).
+        """
+        inicio = self._desc_inicio[i]
+        momento = self._momentos[i]
+        atividade = {
+            'id': _bytes_para_id(self._ids[16 * i:16 * i + 16]),
+            'data': data_do_momento(momento).isoformat() if momento != MOMENTO_DESCONHECIDO else None,
+            'categoria': self.nomes_categorias[self._categorias[i]],
+            'descricao': self._textos[inicio:inicio + self._desc_tamanho[i]].decode('utf-8', 'surrogatepass'),
+            'pontos': self._pontos[i]
+        }
+        for campo, valor in self._ajustes.get(i, {}).items():
+            if valor is AUSENTE:
+                del atividade[campo]
+            else:
+                atividade[campo] = valor
+        return atividade
+
+    def para_atividades(self):
+        return list(self)
+
+    # ---------------- ordem e busca ----------------
+
+    def id_da_linha(self, i):
+        ajustes = self._ajustes.get(i)
+        if ajustes and 'id' in ajustes:
+            valor = ajustes['id']
+            return valor if isinstance(valor, str) else ''
+        return _bytes_para_id(self._ids[16 * i:16 * i + 16])
+
+    def chave(self, i):
+        """
+        (momento, id) da linha i: a ordem do histórico.
+        """
+        return self._momentos[i], self.id_da_linha(i)
+
+    def momento(self, i):
+        return self._momentos[i]
+
+    def codigo_da_linha(self, i):
+        """
+        Código da categoria da linha i (ver codigo_categoria).
+        """
+        return self._categorias[i]
+
+    def posicao(self, momento, atividade_id=''):
+        """
+        Primeira linha com chave >= (momento, atividade_id) (como bisect_left).
+        """
+        inicio, fim = 0, len(self)
+        while inicio < fim:
+            meio = (inicio + fim) // 2
+            atual = self._momentos[meio]
+            if atual < momento or (atual == momento and self.id_da_linha(meio) < atividade_id):
+                inicio = meio + 1
+            else:
+                fim = meio
+        return inicio
+
+    def indice_do_id(self, atividade_id):
+        """
+        Linha da atividade com esse id, ou None.
+        """
+        alvo = _id_para_bytes(atividade_id)
+        if alvo is not None:
+            pos = self._ids.find(alvo)
+            while pos != -1:
+                # Só vale alinhado a uma linha (e não numa linha cujo id ficou à parte)
+                if pos % 16 == 0 and 'id' not in self._ajustes.get(pos // 16, {}):
+                    return pos // 16
+                pos = self._ids.find(alvo, pos + 1)
+            return None
+        for i, ajustes in self._ajustes.items():
+            if ajustes.get('id', AUSENTE) == atividade_id:
+                return i
+        return None
+
+    # ---------------- alteração ----------------
+
+    def adicionar(self, atividade):
+        """
+        Insere na posição certa (quase sempre no fim). Retorna a linha.
+        """
+        linha = self._converter(atividade)
+        if not len(self) or (linha[0], linha[6]) > self.chave(len(self) - 1):
+            i = len(self)
+        else:
+            i = self.posicao(linha[0], linha[6])
+        self._inserir(i, linha)
+        return i
+
+    def _inserir(self, i, linha):
+        momento, id_bytes, categoria, pontos, descricao, ajustes, _ = linha
+        if i < len(self) and self._ajustes:
+            self._ajustes = {j + 1 if j >= i else j: valor for j, valor in self._ajustes.items()}
+        if ajustes:
+            self._ajustes[i] = ajustes
+        self._momentos.insert(i, momento)
+        self._ids[16 * i:16 * i] = id_bytes
+        self._categorias.insert(i, categoria)
+        self._pontos.insert(i, pontos)
+        self._desc_inicio.insert(i, len(self._textos))
+        self._desc_tamanho.insert(i, len(descricao))
+        self._textos += descricao
+
+    def remover(self, i):
+        """
+        Tira a linha i e retorna a atividade que estava nela.
+        """
+        atividade = self.atividade(i)
+        self._textos_removidos += self._desc_tamanho[i]
+        del self._momentos[i]
+        del self._ids[16 * i:16 * i + 16]
+        del self._categorias[i]
+        del self._pontos[i]
+        del self._desc_inicio[i]
+        del self._desc_tamanho[i]
+        if self._ajustes:
+            self._ajustes = {j - 1 if j > i else j: valor
+                             for j, valor in self._ajustes.items() if j != i}
+        if self._textos_removidos > len(self._textos) // 2:
+            self._compactar_textos()
+        return atividade
+
+    def _compactar_textos(self):
+        textos = bytearray()
+        for i in range(len(self)):
+            inicio = self._desc_inicio[i]
+            self._desc_inicio[i] = len(textos)
+            textos += self._textos[inicio:inicio + self._desc_tamanho[i]]
+        self._textos = textos
+        self._textos_removidos = 0
+
+    # ---------------- somas ----------------
+
+    def pontos_da_linha(self, i):
+        """
+        Pontos que a linha soma nas estatísticas (None/ausente contam 0).
+        """
+        ajustes = self._ajustes.get(i)
+        if ajustes and 'pontos' in ajustes:
+            valor = ajustes['pontos']
+            return 0 if valor is AUSENTE else (valor or 0)
+        return self._pontos[i]
+
+    def somar_por_dia(self, inicio=0, fim=None):
+        """
+        Somas das linhas [inicio, fim): {dia: {categoria: [pontos, atividades]}},
+        com dia = date (None se a data não foi reconhecida) e categoria =
+        nome como está na atividade (pode ser None).
+        """
+        fim = len(self) if fim is None else fim
+        somas = {}  # (número do dia, código) -> [pontos, atividades]
+        for i in range(inicio, fim):
+            chave = (self._momentos[i] // US_POR_DIA, self._categorias[i])
+            soma = somas.get(chave)
+            if soma is None:
+                soma = somas[chave] = [0, 0]
+            soma[0] += self._pontos[i]
+            soma[1] += 1
+        # Linhas com pontos fora da coluna (raras): soma o valor original
+        for i, ajustes in self._ajustes.items():
+            if inicio <= i < fim and 'pontos' in ajustes:
+                chave = (self._momentos[i] // US_POR_DIA, self._categorias[i])
+                somas[chave][0] += self.pontos_da_linha(i)
+
+        desconhecido = MOMENTO_DESCONHECIDO // US_POR_DIA
+        por_dia = {}
+        for (numero, codigo), soma in somas.items():
+            dia = None if numero == desconhecido else DIA_EPOCA + timedelta(days=numero)
+            por_dia.setdefault(dia, {})[self.nomes_categorias[codigo]] = soma
+        return por_dia
+
+    def faixa_de_dias(self, primeiro_dia, ultimo_dia):
+        """
+        Linhas [inicio, fim) com data de primeiro_dia até ultimo_dia (inclusive).
+        """
+        inicio = self.posicao((primeiro_dia - DIA_EPOCA).days * US_POR_DIA)
+        fim = self.posicao(((ultimo_dia - DIA_EPOCA).days + 1) * US_POR_DIA)
+        return inicio, fim
+
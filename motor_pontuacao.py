@@ -0,0 +1,132 @@
+"""
+Motor de pontuação das atividades do EcoScore.
+
+Transforma a descrição de uma atividade (mais a categoria) em pontos:
+- PONTOS_POR_PALAVRA por palavra digitada
+- bônus da categoria (BONUS_POR_CATEGORIA)
+- bônus de cada termo conhecido da categoria: o vocabulário padrão
+  (VOCABULARIO_PADRAO) e os termos aprendidos do usuário
+- resultado entre PONTOS_MINIMO e PONTOS_MAXIMO
+
+Os pesos são compilados uma vez em dicionários termo -> bônus por
+categoria (termos já normalizados: minúsculos e sem acento), então cada
+pontuação é só quebrar o texto em palavras e consultar os dicionários.
+O mesmo motor pontua lotes (ex: repontuar o histórico inteiro) e é usado
+pelo cliente (estimativa na tela) e pelo servidor (pontos que valem).
+"""
+import copy
+import re
+import unicodedata
+
+PONTOS_POR_PALAVRA = 2
+PONTOS_MINIMO = 1
+PONTOS_MAXIMO = 50
+
+# Bônus de cada termo aprendido: PONTOS_TERMO_APRENDIDO * peso do termo
+PONTOS_TERMO_APRENDIDO = 3
+
+BONUS_POR_CATEGORIA = {
+    'Água': 7,
+    'Energia': 7,
+    'Mobilidade': 5,
+    'Alimentação': 4,
+    'Resíduos': 5,
+    'Bem-estar': 2,
+    'Consumo Consciente': 4,
+    'Educação Ambiental': 3,
+    'Tecnologia Verde': 4
+}
+
+# Termos que valem pontos extras em cada categoria (bônus por ocorrência)
+VOCABULARIO_PADRAO = {
+    'Água': {'chuveiro': 2, 'torneira': 2, 'vazamento': 3, 'chuva': 2, 'reaproveitei': 3,
+             'reuso': 3, 'cisterna': 4, 'banho': 1},
+    'Energia': {'solar': 4, 'lampada': 2, 'led': 2, 'desliguei': 2, 'tomada': 1,
+                'standby': 2, 'ar-condicionado': 2},
+    'Mobilidade': {'bicicleta': 4, 'bike': 4, 'caminhei': 3, 'onibus': 2, 'metro': 2,
+                   'carona': 3, 'patinete': 2},
+    'Alimentação': {'organico': 3, 'vegetariano': 3, 'vegano': 3, 'horta': 4, 'feira': 2,
+                    'local': 1, 'desperdicio': 2},
+    'Resíduos': {'reciclei': 4, 'reciclagem': 4, 'compostagem': 4, 'separei': 2,
+                 'coleta': 2, 'pilhas': 3, 'oleo': 3},
+    'Bem-estar': {'parque': 2, 'natureza': 2, 'trilha': 2, 'meditacao': 1},
+    'Consumo Consciente': {'reutilizei': 3, 'consertei': 4, 'usado': 2, 'brecho': 3,
+                           'refil': 3, 'sacola': 2, 'doei': 3},
+    'Educação Ambiental': {'palestra': 3, 'ensinei': 3, 'curso': 2, 'mutirao': 4,
+                           'voluntario': 3},
+    'Tecnologia Verde': {'solar': 3, 'eficiente': 2, 'inteligente': 1, 'eletrico': 3,
+                         'sensor': 2}
+}
+
+_PALAVRA = re.compile(r"[\w-]+")
+
+
+def normalizar_termo(texto):
+    """
+    Minúsculo e sem acentos ("Lâmpada" -> "lampada").
+    """
+    decomposto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def palavras(texto):
+    return _PALAVRA.findall(normalizar_termo(texto))
+
+
+class MotorPontuacao:
+    """
+    - termos_aprendidos: {categoria: {termo: {contagem, peso}}}, o formato
+      de GET /usuarios/<id>/termos (pode ser trocado depois)
+    - vocabulario: {categoria: {termo: bônus}}
+    """
+
+    def __init__(self, termos_aprendidos=None, vocabulario=VOCABULARIO_PADRAO):
+        self._padrao = {categoria: {normalizar_termo(t): bonus for t, bonus in termos.items()}
+                        for categoria, termos in vocabulario.items()}
+        self.atualizar_termos(termos_aprendidos or {})
+
+    def atualizar_termos(self, termos_aprendidos):
+        """
+        Recompila só os pesos dos termos aprendidos (o vocabulário fica).
+        """
+        compilado = {}
+        for categoria, termos in termos_aprendidos.items():
+            pesos = compilado.setdefault(categoria, {})
+            for termo, info in termos.items():
+                termo = normalizar_termo(termo)
+                pesos[termo] = pesos.get(termo, 0) + PONTOS_TERMO_APRENDIDO * info.get('peso', 1.0)
+        self._aprendidos = compilado
+
+    def com_termos(self, termos_aprendidos):
+        """
+        Motor com o mesmo vocabulário já compilado e outros termos
+        aprendidos (ex: no servidor, um por usuário).
+        """
+        motor = copy.copy(self)
+        motor.atualizar_termos(termos_aprendidos)
+        return motor
+
+    def pontuar(self, descricao, categoria):
+        lista = palavras(descricao or '')
+        if not lista:
+            return 0
+        padrao = self._padrao.get(categoria, {})
+        aprendidos = self._aprendidos.get(categoria, {})
+        pontos = len(lista) * PONTOS_POR_PALAVRA + BONUS_POR_CATEGORIA.get(categoria, 0)
+        pontos += sum(padrao.get(palavra, 0) + aprendidos.get(palavra, 0) for palavra in lista)
+        return max(PONTOS_MINIMO, min(round(pontos), PONTOS_MAXIMO))
+
+    def pontuar_lote(self, itens):
+        """
+        Pontua vários (descricao, categoria) de uma vez; retorna os pontos
+        na mesma ordem.
+        """
+        return [self.pontuar(descricao, categoria) for descricao, categoria in itens]
+
+    def repontuar(self, atividades):
+        """
+        Pontos que cada atividade (dicts com descricao e categoria, como no
+        histórico) teria com os pesos atuais, na mesma ordem.
+        """
+        return self.pontuar_lote((atv.get('descricao', ''), atv.get('categoria'))
+                                 for atv in atividades)
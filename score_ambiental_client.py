@@ -1,8 +1,28 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, font
+import copy
+import heapq
+import json
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import quote
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
 
+from historico_colunar import HistoricoColunar, dia_do_momento
+from motor_pontuacao import MotorPontuacao
+
 # ========================
 # CONFIGURAÇÕES GERAIS
 # ========================
@@ -10,6 +30,69 @@ from datetime import datetime, timedelta
 # URL base da sua API (backend Flask/FastAPI/etc)
 API_BASE_URL = "http://localhost:5000/api"
 
+# Conexão com a API: segundos pra conectar e pra esperar a resposta.
+# Sem isso um servidor travado congelava a janela pra sempre.
+HTTP_TIMEOUT_CONEXAO = 3.05
+HTTP_TIMEOUT_LEITURA = 15
+
+# Novas tentativas automáticas em falha de conexão e em 502/503/504
+# (só métodos idempotentes são repetidos depois de enviados)
+HTTP_TENTATIVAS = 2
+HTTP_ESPERA_TENTATIVA = 0.3  # fator de backoff: 0.3s, 0.6s, ...
+
+# Conexões keep-alive mantidas abertas com o servidor (dá pras
+# requisições simultâneas de uma tela usarem conexões já abertas)
+HTTP_POOL_TAMANHO = 8
+
+# Log das requisições. Nível por ECOSCORE_LOG (DEBUG, INFO, WARNING...):
+# - INFO: uma linha por requisição (método, endpoint, status, tempo, bytes)
+# - DEBUG: também os corpos, cortados em LOG_CORPO_MAXIMO caracteres
+log = logging.getLogger('ecoscore.cliente')
+LOG_NIVEL_PADRAO = 'WARNING'
+LOG_CORPO_MAXIMO = 300
+
+# Limites (ms) das faixas do histograma de latência por endpoint
+FAIXAS_LATENCIA_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Quantas respostas de GET (com ETag) o cliente guarda pra reaproveitar
+CACHE_TAMANHO = 64
+
+# Cabeçalhos extras da API que as telas usam (guardados junto no cache,
+# já que a resposta 304 não traz de novo)
+HEADERS_EXTRAS = ('X-Total-Count', 'X-Proximo-Cursor')
+
+# Requisições em segundo plano: threads trabalhando e de quantos em
+# quantos milissegundos a thread do Tk confere se chegaram respostas
+REQUISICOES_SIMULTANEAS = HTTP_POOL_TAMANHO
+INTERVALO_RESPOSTAS_MS = 30
+
+# Pasta de dados do usuário (a do executável é temporária no EXE do
+# PyInstaller e some ao fechar): %APPDATA%\EcoScore no Windows,
+# ~/.ecoscore nos outros sistemas
+PASTA_DADOS = (os.path.join(os.environ['APPDATA'], 'EcoScore') if os.environ.get('APPDATA')
+               else os.path.join(os.path.expanduser('~'), '.ecoscore'))
+
+# Atividades registradas ainda não enviadas ficam nesse arquivo SQLite
+# (na PASTA_DADOS, ou onde ECOSCORE_FILA mandar) até o servidor
+# confirmar. São enviadas em lotes de até FILA_LOTE; se falhar, a próxima
+# tentativa espera FILA_ESPERA_INICIAL segundos, dobrando até FILA_ESPERA_MAXIMA.
+FILA_ARQUIVO = os.environ.get('ECOSCORE_FILA', os.path.join(PASTA_DADOS, 'fila_atividades.sqlite3'))
+FILA_LOTE = 50
+FILA_ESPERA_INICIAL = 2
+FILA_ESPERA_MAXIMA = 120
+
+# Ranking: a tela busca os usuários em páginas desse tamanho, conforme
+# a rolagem chega nelas, e guarda no máximo RANKING_PAGINAS_EM_MEMORIA
+RANKING_TAMANHO_PAGINA = 100
+RANKING_PAGINAS_EM_MEMORIA = 20
+
+# Espera (ms) depois da última tecla antes de recalcular a pontuação
+# estimada no formulário de atividade
+ATRASO_PONTUACAO_MS = 250
+
+# Linhas roladas por "clique" da roda do mouse nas listas
+LINHAS_POR_RODA = 3
+
 # Paleta de cores da interface.
 # Isso garante consistência visual e facilita manutenção de tema.
 COLORS = {
@@ -27,6 +110,573 @@ COLORS = {
 }
 
 
+def criar_sessao_http():
+    """
+    Sessão HTTP reaproveitada por todas as chamadas à API: mantém as
+    conexões abertas (keep-alive) em vez de abrir uma nova por requisição.
+    """
+    sessao = requests.Session()
+    tentativas = Retry(
+        total=HTTP_TENTATIVAS,
+        backoff_factor=HTTP_ESPERA_TENTATIVA,
+        status_forcelist=(502, 503, 504),
+        raise_on_status=False  # esgotou as tentativas: devolve a última resposta
+    )
+    adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_TAMANHO,
+                            max_retries=tentativas)
+    sessao.mount('http://', adaptador)
+    sessao.mount('https://', adaptador)
+    return sessao
+
+
+class ErroRequisicao(tuple):
+    """
+    (titulo, mensagem) pra mostrar ao usuário, com o status HTTP da
+    resposta em .status (None se nem chegou ao servidor).
+    """
+
+    def __new__(cls, titulo, mensagem, status=None):
+        erro = super().__new__(cls, (titulo, mensagem))
+        erro.status = status
+        return erro
+
+    @property
+    def definitivo(self):
+        """
+        True se o servidor recusou a requisição em si (400, 404, 413):
+        repetir a mesma daria o mesmo erro. Conflito de versão (409),
+        timeout, excesso de requisições, 5xx e falta de conexão valem uma
+        nova tentativa.
+        """
+        return self.status in (400, 404, 413)
+
+
+def resumir_corpo(corpo):
+    """
+    Texto curto pro log: corta o que passar de LOG_CORPO_MAXIMO.
+    """
+    texto = corpo if isinstance(corpo, str) else repr(corpo)
+    if len(texto) > LOG_CORPO_MAXIMO:
+        return f"{texto[:LOG_CORPO_MAXIMO]}... ({len(texto)} caracteres)"
+    return texto
+
+
+def mascarar_headers(headers):
+    """
+    Cópia dos headers sem o token do Authorization.
+    """
+    return {nome: ('Bearer ***' if nome == 'Authorization' else valor)
+            for nome, valor in headers.items()}
+
+
+def mascarar_corpo(dados):
+    """
+    Cópia do corpo enviado sem a senha (login, cadastro).
+    """
+    if isinstance(dados, dict) and 'senha' in dados:
+        return dict(dados, senha='***')
+    return dados
+
+
+# IDs (uuid) no caminho viram <id>, pra agrupar as métricas por rota
+_PADRAO_ID = re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}')
+
+
+def rota_do_endpoint(metodo, endpoint):
+    """
+    'GET', '/usuarios/<uuid>/historico?limit=5' -> 'GET /usuarios/<id>/historico'
+    """
+    return f"{metodo} {_PADRAO_ID.sub('<id>', endpoint.split('?', 1)[0])}"
+
+
+class MetricasRequisicoes:
+    """
+    Tempos e tamanhos das requisições, agrupados por rota:
+    quantidade, erros, bytes recebidos, tempo total e até os cabeçalhos
+    (conexão + servidor) e um histograma do tempo total por faixa
+    (FAIXAS_LATENCIA_MS). Fica só em memória; ver texto() e a tela de
+    diagnóstico. Usado por várias threads ao mesmo tempo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rotas = {}
+
+    def registrar(self, rota, total_s, cabecalhos_s, num_bytes, erro):
+        total_ms = total_s * 1000
+        faixa = next((i for i, limite in enumerate(FAIXAS_LATENCIA_MS) if total_ms <= limite),
+                     len(FAIXAS_LATENCIA_MS))
+        with self._lock:
+            m = self._rotas.get(rota)
+            if m is None:
+                m = self._rotas[rota] = {
+                    'quantidade': 0, 'erros': 0, 'bytes': 0,
+                    'total_ms': 0.0, 'cabecalhos_ms': 0.0, 'max_ms': 0.0,
+                    'faixas': [0] * (len(FAIXAS_LATENCIA_MS) + 1)
+                }
+            m['quantidade'] += 1
+            m['erros'] += 1 if erro else 0
+            m['bytes'] += num_bytes
+            m['total_ms'] += total_ms
+            m['cabecalhos_ms'] += cabecalhos_s * 1000
+            m['max_ms'] = max(m['max_ms'], total_ms)
+            m['faixas'][faixa] += 1
+
+    @staticmethod
+    def _percentil(faixas, quantidade, p):
+        """
+        Limite superior da faixa onde cai o percentil p (estimativa).
+        """
+        alvo = quantidade * p / 100
+        acumulado = 0
+        for i, n in enumerate(faixas):
+            acumulado += n
+            if acumulado >= alvo:
+                return FAIXAS_LATENCIA_MS[i] if i < len(FAIXAS_LATENCIA_MS) else float('inf')
+        return float('inf')
+
+    def resumo(self):
+        """
+        Uma linha (dict) por rota, da mais lenta no total pra mais rápida.
+        """
+        with self._lock:
+            rotas = {rota: dict(m, faixas=list(m['faixas'])) for rota, m in self._rotas.items()}
+        linhas = []
+        for rota, m in rotas.items():
+            n = m['quantidade']
+            linhas.append({
+                'rota': rota,
+                'quantidade': n,
+                'erros': m['erros'],
+                'media_ms': m['total_ms'] / n,
+                'cabecalhos_media_ms': m['cabecalhos_ms'] / n,
+                'p50_ms': self._percentil(m['faixas'], n, 50),
+                'p95_ms': self._percentil(m['faixas'], n, 95),
+                'max_ms': m['max_ms'],
+                'bytes_media': m['bytes'] / n,
+                'faixas': m['faixas']
+            })
+        linhas.sort(key=lambda linha: linha['media_ms'] * linha['quantidade'], reverse=True)
+        return linhas
+
+    def texto(self):
+        """
+        Tabela em texto puro (pro log na saída e pra tela de diagnóstico).
+        p50/p95 são o limite da faixa do histograma (ex: "<=50").
+        """
+        linhas = [f"{'Rota':<40} {'N':>5} {'Erros':>5} {'Média':>8} {'Cab.':>8} "
+                  f"{'p50':>7} {'p95':>7} {'Máx':>8} {'Bytes':>8}"]
+        for m in self.resumo():
+            linhas.append(
+                f"{m['rota'][:40]:<40} {m['quantidade']:>5} {m['erros']:>5} "
+                f"{m['media_ms']:>6.1f}ms {m['cabecalhos_media_ms']:>6.1f}ms "
+                f"{'<=' + format(m['p50_ms'], 'g'):>7} {'<=' + format(m['p95_ms'], 'g'):>7} "
+                f"{m['max_ms']:>6.1f}ms {m['bytes_media']:>8.0f}")
+        if len(linhas) == 1:
+            linhas.append("Nenhuma requisição feita ainda.")
+        return "\n".join(linhas)
+
+
+class CacheValidado:
+    """
+    Últimas respostas de GET por URL, junto com a ETag e os
+    HEADERS_EXTRAS de cada uma.
+    O cliente manda a ETag no If-None-Match; se o servidor responder 304,
+    reaproveita o corpo guardado. As mais antigas saem quando passa de
+    'tamanho'. Usado por várias threads ao mesmo tempo.
+
+    Guarda e devolve cópias: as telas alteram os dicts que recebem
+    (ex: self.usuario['nivel']) e isso não pode mudar o que está guardado.
+    """
+
+    def __init__(self, tamanho=CACHE_TAMANHO):
+        self.tamanho = tamanho
+        self._lock = threading.Lock()
+        self._itens = OrderedDict()  # url -> (etag, corpo, extras)
+
+    def obter(self, url):
+        with self._lock:
+            item = self._itens.get(url)
+            if item is None:
+                return None
+            self._itens.move_to_end(url)
+            etag, corpo, extras = item
+        return etag, copy.deepcopy(corpo), extras
+
+    def guardar(self, url, etag, corpo, extras):
+        with self._lock:
+            self._itens[url] = (etag, copy.deepcopy(corpo), extras)
+            self._itens.move_to_end(url)
+            while len(self._itens) > self.tamanho:
+                self._itens.popitem(last=False)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+
+class IndiceHistorico:
+    """
+    Atividades que o cliente já tem em mãos, guardadas em colunas
+    (HistoricoColunar) e sempre ordenadas por (data, id), com somas de
+    pontos por dia e por categoria.
+
+    A data de cada atividade é interpretada uma vez só, quando ela entra;
+    inserir costuma ser um append (as novas são as mais recentes), e as
+    telas só leem: últimas N, soma de um período, totais por categoria.
+    """
+
+    def __init__(self, atividades=()):
+        self.colunas = HistoricoColunar()
+        self.por_dia = {}        # date -> {categoria: [pontos, atividades]}
+        self.por_categoria = {}  # categoria -> [pontos, atividades]
+        for atividade in atividades:
+            self.adicionar(atividade)
+
+    def __len__(self):
+        return len(self.colunas)
+
+    def __iter__(self):
+        return iter(self.colunas)
+
+    def adicionar(self, atividade):
+        """
+        Insere a atividade; se o id já está no índice, não faz nada.
+        Retorna True se inseriu.
+        """
+        if self.colunas.indice_do_id(atividade['id']) is not None:
+            return False
+        i = self.colunas.adicionar(atividade)
+        self._somar(dia_do_momento(self.colunas.momento(i)), atividade, 1)
+        return True
+
+    def remover(self, atividade_id):
+        """
+        Tira a atividade do índice e a retorna (None se não estava).
+        """
+        i = self.colunas.indice_do_id(atividade_id)
+        if i is None:
+            return None
+        dia = dia_do_momento(self.colunas.momento(i))
+        atividade = self.colunas.remover(i)
+        self._somar(dia, atividade, -1)
+        return atividade
+
+    def _somar(self, dia, atividade, sinal):
+        categoria = atividade.get('categoria') or 'Outros'
+        for soma in (self.por_dia.setdefault(dia, {}).setdefault(categoria, [0, 0]),
+                     self.por_categoria.setdefault(categoria, [0, 0])):
+            soma[0] += sinal * (atividade.get('pontos', 0) or 0)
+            soma[1] += sinal
+
+    def mais_recente(self):
+        return self.colunas.atividade(len(self.colunas) - 1) if len(self.colunas) else None
+
+    def recentes(self):
+        """
+        (chave, atividade) da mais recente pra mais antiga.
+        """
+        for i in range(len(self.colunas) - 1, -1, -1):
+            yield self.colunas.chave(i), self.colunas.atividade(i)
+
+    def ultimas(self, n):
+        fim = len(self.colunas)
+        return [self.colunas.atividade(i) for i in range(fim - 1, max(fim - n, 0) - 1, -1)]
+
+    def pontos_periodo(self, primeiro_dia, ultimo_dia):
+        """
+        Soma dos pontos de primeiro_dia até ultimo_dia (datas, inclusive).
+        """
+        total = 0
+        dia = primeiro_dia
+        while dia <= ultimo_dia:
+            total += sum(pontos for pontos, _ in self.por_dia.get(dia, {}).values())
+            dia += timedelta(days=1)
+        return total
+
+    def totais(self):
+        """
+        (pontos, atividades) de tudo que está no índice.
+        """
+        return (sum(p for p, _ in self.por_categoria.values()),
+                sum(n for _, n in self.por_categoria.values()))
+
+
+def ultimas_de(indices, n):
+    """
+    As n atividades mais recentes de vários IndiceHistorico juntos.
+    """
+    juntas = heapq.merge(*(indice.recentes() for indice in indices),
+                         key=lambda item: item[0], reverse=True)
+    return [atividade for _, atividade in islice(juntas, max(0, n))]
+
+
+class FilaOffline:
+    """
+    Atividades registradas que ainda não chegaram ao servidor, gravadas
+    num SQLite local: fechar o app ou ficar sem conexão não perde nada.
+
+    Cada atividade leva o id (UUID) gerado pelo cliente. Se um envio
+    chegar ao servidor mas a resposta se perder, o reenvio tem o mesmo
+    id e o servidor não grava de novo.
+    """
+
+    def __init__(self, caminho=FILA_ARQUIVO):
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS pendentes ('
+                'ordem INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'id TEXT NOT NULL UNIQUE, '
+                'usuario_id TEXT NOT NULL, '
+                'atividade TEXT NOT NULL)')
+            # Recusadas pelo servidor: saem da fila mas ficam guardadas
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS recusadas ('
+                'id TEXT PRIMARY KEY, '
+                'usuario_id TEXT NOT NULL, '
+                'atividade TEXT NOT NULL, '
+                'motivo TEXT, '
+                'data TEXT NOT NULL)')
+
+    def adicionar(self, usuario_id, atividade):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR IGNORE INTO pendentes (id, usuario_id, atividade) VALUES (?, ?, ?)',
+                (atividade['id'], usuario_id, json.dumps(atividade, ensure_ascii=False)))
+
+    def pendentes(self, usuario_id, limite=None):
+        """
+        Atividades do usuário ainda não enviadas, na ordem em que foram
+        registradas.
+        """
+        with self._lock:
+            linhas = self._conn.execute(
+                'SELECT atividade FROM pendentes WHERE usuario_id = ? ORDER BY ordem LIMIT ?',
+                (usuario_id, -1 if limite is None else limite)).fetchall()
+        return [json.loads(atividade) for (atividade,) in linhas]
+
+    def remover(self, ids):
+        with self._lock, self._conn:
+            self._conn.executemany('DELETE FROM pendentes WHERE id = ?', [(i,) for i in ids])
+
+    def recusar(self, ids, motivo):
+        """
+        Tira da fila atividades que o servidor recusou (reenviar daria o
+        mesmo erro), guardando-as com o motivo na tabela recusadas.
+        """
+        agora = datetime.now().isoformat(timespec='seconds')
+        with self._lock, self._conn:
+            for atividade_id in ids:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO recusadas (id, usuario_id, atividade, motivo, data) '
+                    'SELECT id, usuario_id, atividade, ?, ? FROM pendentes WHERE id = ?',
+                    (motivo, agora, atividade_id))
+                self._conn.execute('DELETE FROM pendentes WHERE id = ?', (atividade_id,))
+
+    def fechar(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ListaVirtual:
+    """
+    Lista rolável pra muitas linhas (ex: ranking com milhares de usuários).
+
+    Só existem widgets pras linhas que cabem na tela: ao rolar, os mesmos
+    labels recebem o texto de outras linhas. Os dados chegam em páginas
+    de tamanho_pagina linhas, pedidas só quando a rolagem chega nelas:
+    a lista chama pedir_pagina(indice_pagina) e quem buscou entrega com
+    receber_pagina(indice_pagina, linhas). Até lá a linha mostra "…".
+
+    - colunas: [(titulo, largura, anchor)]
+    - formatar(linha): textos das colunas de uma linha
+    - destacar(linha): True pra linha ganhar fundo azul claro
+    """
+
+    def __init__(self, parent, colunas, formatar, pedir_pagina, destacar=None,
+                 tamanho_pagina=100, max_paginas=20):
+        self.colunas = colunas
+        self.formatar = formatar
+        self.pedir_pagina = pedir_pagina
+        self.destacar = destacar or (lambda linha: False)
+        self.tamanho_pagina = tamanho_pagina
+        self.max_paginas = max_paginas
+
+        self.total = 0
+        self.topo = 0            # índice da primeira linha visível
+        self.paginas = OrderedDict()  # indice_pagina -> linhas (LRU)
+        self.pedidas = set()     # páginas esperando resposta
+        self.vencidas = set()    # páginas guardadas que devem ser buscadas de novo
+        self.linhas = []         # widgets reciclados: [(frame, [labels])]
+        self.altura_linha = None
+        self._alvo = None        # rolar_para() antes da lista ter tamanho
+
+        self.frame = ttk.Frame(parent, style='Card.TFrame')
+
+        cabecalho = ttk.Frame(self.frame, style='Card.TFrame')
+        cabecalho.pack(fill='x', pady=(0, 5))
+        for coluna, (titulo, largura, anchor) in enumerate(colunas):
+            ttk.Label(cabecalho, text=titulo, style='FormLabel.TLabel', background='white',
+                      width=largura, anchor=anchor).grid(row=0, column=coluna, padx=5, sticky='ew')
+
+        self.scrollbar = ttk.Scrollbar(self.frame, orient='vertical', command=self._ao_rolar)
+        self.scrollbar.pack(side='right', fill='y')
+        self.corpo = tk.Frame(self.frame, bg='white')
+        self.corpo.pack(side='left', fill='both', expand=True)
+        self.corpo.bind('<Configure>', self._ao_redimensionar)
+        self._ligar_roda(self.corpo)
+
+    def definir_total(self, total):
+        self.total = total
+        self.topo = max(0, min(self.topo, total - len(self.linhas)))
+
+    def receber_pagina(self, indice, linhas):
+        """
+        Entrega uma página pedida; linhas=None quando a busca falhou
+        (ela volta a ser pedida na próxima rolagem).
+        """
+        self.pedidas.discard(indice)
+        if linhas is None:
+            return
+        self.paginas[indice] = linhas
+        self.paginas.move_to_end(indice)
+        self.vencidas.discard(indice)
+        while len(self.paginas) > self.max_paginas:
+            self.paginas.popitem(last=False)
+        # Só redesenha se a página está na tela (a rolagem pode ter ido embora)
+        primeira = indice * self.tamanho_pagina
+        if primeira < self.topo + len(self.linhas) and self.topo < primeira + self.tamanho_pagina:
+            self._desenhar()
+
+    def invalidar(self):
+        """
+        Os dados podem ter mudado: as páginas guardadas continuam na tela
+        até a nova versão de cada uma chegar.
+        """
+        self.vencidas = set(self.paginas)
+        self.pedidas.clear()
+
+    def rolar_para(self, indice):
+        """
+        Rola até a linha 'indice', deixando ela no meio da lista.
+        """
+        if not self.linhas:
+            self._alvo = indice
+            return
+        self._ir_para(indice - len(self.linhas) // 2)
+        self._desenhar()
+
+    def _ir_para(self, topo):
+        self.topo = max(0, min(topo, self.total - len(self.linhas)))
+
+    def _linha(self, indice):
+        pagina = self.paginas.get(indice // self.tamanho_pagina)
+        deslocamento = indice % self.tamanho_pagina
+        if pagina is None or deslocamento >= len(pagina):
+            return None
+        return pagina[deslocamento]
+
+    def _desenhar(self):
+        """
+        Põe nas linhas visíveis os dados de topo .. topo + visíveis e pede
+        as páginas que faltam pra isso.
+        """
+        vazia = ('',) * len(self.colunas)
+        for i, (frame, labels) in enumerate(self.linhas):
+            indice = self.topo + i
+            linha = self._linha(indice) if indice < self.total else None
+            if linha is not None:
+                textos = self.formatar(linha)
+                bg = '#E3F2FD' if self.destacar(linha) else 'white'
+            else:
+                textos = ('…',) + vazia[1:] if indice < self.total else vazia
+                bg = 'white'
+            frame.configure(bg=bg)
+            for label, texto in zip(labels, textos):
+                label.configure(text=texto, bg=bg)
+
+        if self.total:
+            self.scrollbar.set(self.topo / self.total,
+                               min(1.0, (self.topo + len(self.linhas)) / self.total))
+        else:
+            self.scrollbar.set(0, 1)
+
+        if not self.linhas or not self.total:
+            return
+        ultima = min(self.topo + len(self.linhas), self.total) - 1
+        for pagina in range(self.topo // self.tamanho_pagina, ultima // self.tamanho_pagina + 1):
+            if pagina in self.pedidas:
+                continue
+            if pagina not in self.paginas or pagina in self.vencidas:
+                self.pedidas.add(pagina)
+                self.pedir_pagina(pagina)
+
+    def _criar_linha(self):
+        frame = tk.Frame(self.corpo, bg='white')
+        frame.pack(fill='x')
+        labels = []
+        for coluna, (_, largura, anchor) in enumerate(self.colunas):
+            label = tk.Label(frame, text='', anchor=anchor, width=largura, bg='white')
+            label.grid(row=0, column=coluna, padx=5, pady=2, sticky='ew')
+            labels.append(label)
+            self._ligar_roda(label)
+        self._ligar_roda(frame)
+        self.linhas.append((frame, labels))
+
+    def _ao_redimensionar(self, evento):
+        """
+        Cria (ou descarta) linhas pra preencher a altura disponível.
+        """
+        if self.altura_linha is None:
+            self._criar_linha()
+            self.corpo.update_idletasks()
+            self.altura_linha = max(1, self.linhas[0][0].winfo_reqheight())
+
+        visiveis = max(1, evento.height // self.altura_linha)
+        while len(self.linhas) < visiveis:
+            self._criar_linha()
+        while len(self.linhas) > visiveis:
+            frame, _ = self.linhas.pop()
+            frame.destroy()
+
+        if self._alvo is not None:
+            alvo, self._alvo = self._alvo, None
+            self._ir_para(alvo - len(self.linhas) // 2)
+        else:
+            self._ir_para(self.topo)
+        self._desenhar()
+
+    def _ao_rolar(self, acao, quantidade, unidade=None):
+        """
+        Comando da scrollbar: ('moveto', fração) ou ('scroll', n, 'units'/'pages').
+        """
+        if acao == 'moveto':
+            topo = int(float(quantidade) * self.total)
+        else:
+            passo = max(1, len(self.linhas) - 1) if unidade == 'pages' else 1
+            topo = self.topo + int(quantidade) * passo
+        self._rolar(topo)
+
+    def _rolar(self, topo):
+        anterior = self.topo
+        self._ir_para(topo)
+        if self.topo != anterior:
+            self._desenhar()
+
+    def _ao_girar_roda(self, evento):
+        # Windows/macOS: <MouseWheel> com delta; Linux: botões 4 (cima) e 5 (baixo)
+        para_cima = evento.num == 4 or (getattr(evento, 'delta', 0) or 0) > 0
+        self._rolar(self.topo + (-LINHAS_POR_RODA if para_cima else LINHAS_POR_RODA))
+        return 'break'
+
+    def _ligar_roda(self, widget):
+        for sequencia in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            widget.bind(sequencia, self._ao_girar_roda)
+
+
 class ScoreAmbientalClient:
     """
     Essa classe é a aplicação inteira do lado do desktop (Tkinter).
@@ -42,12 +692,55 @@ class ScoreAmbientalClient:
         self.root = root
 
         # Dados do usuário logado:
-        self.usuario = None        # dict com dados completos do usuário
+        self.usuario = None        # dict com o perfil do usuário (sem histórico)
         self.usuario_id = None     # ID único do usuário (token simples)
 
+        # Sessão HTTP com pool de conexões (ver criar_sessao_http)
+        self.sessao = criar_sessao_http()
+
+        # Respostas de GET guardadas pra GETs condicionais (ETag / 304)
+        self.cache = CacheValidado()
+
+        # Atividades esperando envio (ver sincronizar_fila)
+        self.fila = FilaOffline()
+        self._sincronizando = False
+        self._espera_fila = FILA_ESPERA_INICIAL
+        self._fila_um_a_um = set()  # ids de lotes recusados inteiros
+
+        # Atividades do usuário que o cliente já tem: as recentes vindas da
+        # API e as que ainda estão na fila (ver carregar_historico_local)
+        self.historico_recente = IndiceHistorico()
+        self.historico_pendente = IndiceHistorico()
+
+        # Pontuação das atividades (ver motor_pontuacao.py); os termos
+        # aprendidos do usuário chegam depois do login
+        self.motor = MotorPontuacao()
+
+        # Tempos das requisições por rota (Ctrl+Shift+D abre o diagnóstico)
+        self.metricas = MetricasRequisicoes()
+        self.root.bind_all('<Control-Shift-D>', lambda e: self.mostrar_diagnostico())
+
+        # Requisições rodam nessas threads e as respostas voltam pro Tk
+        # pela fila (ver em_segundo_plano). 'geracao_tela' sobe a cada troca
+        # de tela: resposta que chega depois disso é descartada.
+        self.executor = ThreadPoolExecutor(max_workers=REQUISICOES_SIMULTANEAS,
+                                           thread_name_prefix='api')
+        self._respostas = queue.Queue()
+        self._pendentes = 0
+        self._futuros_tela = []
+        self.geracao_tela = 0
+
         # Guarda qual tela está ativa (opcional, útil p/ navegação)
         self.current_screen = None
 
+        # Layout base (header + sidebar) e telas já montadas. As telas
+        # ficam empilhadas no layout e a navegação só traz uma pra frente.
+        self.layout = None            # área onde as telas ficam
+        self.titulo_header = None     # label do título no header
+        self.telas = {}               # nome -> frame da tela
+        self.widgets = {}             # nome -> widgets que mudam com os dados
+        self.dados_desenhados = {}    # chave -> dados do último desenho
+
         # Configuração inicial da janela
         self.root.title("EcoScore - Seu Score Ambiental")
         self.root.geometry("1000x700")
@@ -83,13 +776,34 @@ class ScoreAmbientalClient:
         y = (self.root.winfo_screenheight() // 2) - (height // 2)
         self.root.geometry(f'{width}x{height}+{x}+{y}')
 
+    def trocar_tela(self):
+        """
+        Chamado a cada troca de tela: cancela as requisições da tela
+        anterior que ainda não começaram; as que já estão em andamento
+        têm a resposta ignorada.
+        """
+        self.geracao_tela += 1
+        for futuro in self._futuros_tela:
+            futuro.cancel()
+        self._futuros_tela = []
+
     def limpar_tela(self):
         """
-        Remove TODOS os widgets atuais da janela principal.
-        Isso é usado antes de desenhar cada tela.
+        Remove TODOS os widgets da janela principal, inclusive o layout
+        base e as telas guardadas (janelas à parte, como a de diagnóstico,
+        ficam). Usado pelas telas de login e cadastro.
         """
+        self.trocar_tela()
+        self.layout = None
+        self.titulo_header = None
+        self.telas = {}
+        self.widgets = {}
+        self.dados_desenhados = {}
+        self.current_screen = None
+
         for widget in self.root.winfo_children():
-            widget.destroy()
+            if not isinstance(widget, tk.Toplevel):
+                widget.destroy()
 
     def setup_styles(self):
         """
@@ -282,7 +996,16 @@ class ScoreAmbientalClient:
     # COMUNICAÇÃO COM A API (BACKEND)
     # -------------------------------------------------
 
-    def fazer_requisicao(self, metodo, endpoint, dados=None, auth_required=True):
+    def executar_requisicao(self, metodo, endpoint, dados=None, auth_required=True):
+        """
+        Faz a chamada e retorna (resposta, erro); ver
+        executar_requisicao_com_headers.
+        """
+        resposta, erro, _ = self.executar_requisicao_com_headers(metodo, endpoint, dados,
+                                                                 auth_required)
+        return resposta, erro
+
+    def executar_requisicao_com_headers(self, metodo, endpoint, dados=None, auth_required=True):
         """
         Essa função centraliza TODAS as chamadas HTTP.
         - metodo: 'GET', 'POST', 'PUT'
@@ -290,7 +1013,13 @@ class ScoreAmbientalClient:
         - dados: corpo JSON em POST/PUT
         - auth_required: se True, manda Authorization com o ID do usuário
 
-        Ela também faz prints de debug antes e depois da requisição.
+        Não mexe na interface, então pode rodar fora da thread do Tk.
+        Retorna (resposta, erro, extras):
+        - resposta: JSON devolvido pela API ({} se veio 2xx sem corpo) ou None
+        - erro: None, ou ErroRequisicao (titulo, mensagem) pra mostrar ao usuário
+        - extras: {cabeçalho: valor} dos HEADERS_EXTRAS que vieram
+
+        Cada chamada vai pro log (ver ECOSCORE_LOG) e pras métricas.
         """
         headers = {}
         if auth_required and self.usuario_id:
@@ -299,238 +1028,410 @@ class ScoreAmbientalClient:
 
         url = f"{API_BASE_URL}{endpoint}"
 
-        # DEBUG - mostra requisição no terminal
-        print("=== REQUISIÇÃO ===")
-        print("Método :", metodo)
-        print("URL    :", url)
-        print("Headers:", headers)
-        print("Body   :", dados)
-        print("==================")
+        # GET que já temos guardado: pergunta se mudou (If-None-Match)
+        em_cache = self.cache.obter(url) if metodo == 'GET' else None
+        if em_cache:
+            headers['If-None-Match'] = em_cache[0]
 
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("-> %s %s headers=%s corpo=%s", metodo, url,
+                      mascarar_headers(headers), resumir_corpo(mascarar_corpo(dados)))
+
+        rota = rota_do_endpoint(metodo, endpoint)
+        timeout = (HTTP_TIMEOUT_CONEXAO, HTTP_TIMEOUT_LEITURA)
+        inicio = time.perf_counter()
         try:
             # Escolhe método HTTP
             if metodo == 'GET':
-                response = requests.get(url, headers=headers)
+                response = self.sessao.get(url, headers=headers, timeout=timeout)
             elif metodo == 'POST':
-                response = requests.post(url, json=dados, headers=headers)
+                response = self.sessao.post(url, json=dados, headers=headers, timeout=timeout)
             elif metodo == 'PUT':
-                response = requests.put(url, json=dados, headers=headers)
+                response = self.sessao.put(url, json=dados, headers=headers, timeout=timeout)
             else:
                 raise ValueError(f"Método {metodo} não suportado")
-
-            # DEBUG - mostra resposta no terminal
-            print("=== RESPOSTA ===")
-            print("Status code:", response.status_code)
-            print("Texto bruto :", response.text)
-            print("================")
-
-            # Se foi 2xx, tentamos ler JSON
-            if 200 <= response.status_code < 300:
-                if response.text.strip():
-                    try:
-                        return response.json()
-                    except ValueError:
-                        # Retorno 2xx mas não é JSON válido
-                        print("⚠ Resposta 2xx mas não é JSON parseável.")
-                        return {}
-                # Sem corpo
-                return {}
-            else:
-                # Status de erro -> mostra popup
-                messagebox.showerror("Erro", f"Erro na requisição: {response.text}")
-                return None
-
         except requests.exceptions.RequestException as e:
             # Erro de conexão com o servidor
-            print("XXX EXCEPTION XXX")
-            print(e)
-            messagebox.showerror("Erro de Conexão",
-                                 f"Não foi possível conectar ao servidor: {e}")
-            return None
-
-    def fazer_logout(self):
+            self.metricas.registrar(rota, time.perf_counter() - inicio, 0, 0, erro=True)
+            log.warning("%s %s falhou: %s", metodo, url, e)
+            return None, ErroRequisicao("Erro de Conexão", f"Não foi possível conectar ao servidor: {e}"), {}
+
+        # total: até o corpo chegar inteiro; elapsed: até os cabeçalhos
+        # (conexão, se precisou abrir uma, + tempo do servidor)
+        total = time.perf_counter() - inicio
+        self.metricas.registrar(rota, total, response.elapsed.total_seconds(),
+                                len(response.content), erro=response.status_code >= 400)
+        log.info("%s %s -> %s em %.1fms (%d bytes)", metodo, endpoint,
+                 response.status_code, total * 1000, len(response.content))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("<- %s", resumir_corpo(response.text))
+
+        # Não mudou desde a última vez: usa o corpo guardado
+        if response.status_code == 304 and em_cache:
+            return em_cache[1], None, em_cache[2]
+
+        extras = {nome: response.headers[nome] for nome in HEADERS_EXTRAS if nome in response.headers}
+
+        # Se foi 2xx, tentamos ler JSON
+        if 200 <= response.status_code < 300:
+            if response.content.strip():
+                try:
+                    corpo = response.json()
+                    etag = response.headers.get('ETag')
+                    if metodo == 'GET' and etag:
+                        self.cache.guardar(url, etag, corpo, extras)
+                    return corpo, None, extras
+                except ValueError:
+                    # Retorno 2xx mas não é JSON válido
+                    log.warning("%s %s: resposta 2xx mas não é JSON parseável", metodo, url)
+                    return {}, None, extras
+            # Sem corpo
+            return {}, None, extras
+
+        # Status de erro -> quem chamou mostra o popup
+        log.warning("%s %s -> %s: %s", metodo, url, response.status_code,
+                    resumir_corpo(response.text))
+        return None, ErroRequisicao("Erro", f"Erro na requisição: {response.text}",
+                                    response.status_code), extras
+
+    def em_segundo_plano(self, funcao, ao_concluir=None, cancelavel=True):
         """
-        Reseta dados locais de usuário e volta pra tela de login.
+        Roda funcao() numa thread do pool e chama ao_concluir(resultado)
+        na thread do Tk quando terminar.
+
+        Com cancelavel=True o trabalho pertence à tela atual: se o usuário
+        trocar de tela antes, ele é cancelado (ou a resposta descartada).
+        Escritas (salvar atividade, atualizar nível) usam cancelavel=False
+        pra sempre chegarem ao servidor.
         """
-        self.usuario = None
-        self.usuario_id = None
-        self.mostrar_tela_login()
+        geracao = self.geracao_tela if cancelavel else None
+        futuro = self.executor.submit(funcao)
+        if cancelavel:
+            self._futuros_tela.append(futuro)
 
-    # -------------------------------------------------
-    # LÓGICA DE NÍVEL
-    # -------------------------------------------------
+        self._pendentes += 1
+        if self._pendentes == 1:
+            self.root.after(INTERVALO_RESPOSTAS_MS, self._processar_respostas)
+
+        # Chamado na thread que terminou o trabalho: só enfileira
+        futuro.add_done_callback(lambda f: self._respostas.put((f, ao_concluir, geracao)))
+        return futuro
 
-    def atualizar_nivel_local_e_api(self):
+    def _processar_respostas(self):
+        """
+        Entrega as respostas que chegaram (roda na thread do Tk, via after)
+        e continua conferindo enquanto houver trabalho pendente. Um erro
+        num trabalho ou no seu ao_concluir vai pro log e não para os outros.
         """
-        Garante que o nível do usuário bate com a pontuação total.
-        Regra: cada 100 pontos sobe 1 nível.
+        try:
+            while True:
+                try:
+                    futuro, ao_concluir, geracao = self._respostas.get_nowait()
+                except queue.Empty:
+                    break
+                self._pendentes -= 1
+                if futuro.cancelled() or (geracao is not None and geracao != self.geracao_tela):
+                    continue
+                if geracao is not None and futuro in self._futuros_tela:
+                    self._futuros_tela.remove(futuro)
+                try:
+                    resultado = futuro.result()
+                    if ao_concluir:
+                        ao_concluir(resultado)
+                except Exception:
+                    log.exception("Erro ao processar resposta em segundo plano")
+        finally:
+            if self._pendentes > 0:
+                self.root.after(INTERVALO_RESPOSTAS_MS, self._processar_respostas)
 
-        Exemplo:
-            0-99   -> nível 1
-            100-199-> nível 2
-            200-299-> nível 3
-            ...
+    def requisitar_async(self, metodo, endpoint, dados=None, ao_concluir=None,
+                         auth_required=True, cancelavel=True):
         """
-        if not self.usuario:
-            return
+        Faz a chamada em segundo plano, sem travar a janela: a resposta (ou
+        None se falhou, depois de mostrar o popup de erro) é entregue em
+        ao_concluir(resposta) na thread do Tk.
+        """
+        def concluir(resultado):
+            resposta, erro = resultado
+            if erro:
+                messagebox.showerror(*erro)
+            if ao_concluir:
+                ao_concluir(resposta)
+
+        return self.em_segundo_plano(
+            lambda: self.executar_requisicao(metodo, endpoint, dados, auth_required),
+            concluir, cancelavel)
+
+    def encerrar(self):
+        """
+        Chamado quando a janela fecha: descarta o que ainda não começou e
+        encerra as conexões abertas com a API.
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.sessao.close()
+        self.fila.fechar()
+        log.info("Tempos das requisições:\n%s", self.metricas.texto())
 
-        pontos_totais = self.usuario.get('pontuacao_total', 0)
-        nivel_atual = self.usuario.get('nivel', 1)
+    def mostrar_diagnostico(self):
+        """
+        Janela escondida (Ctrl+Shift+D) com a tabela de tempos por rota.
+        É uma janela à parte pra não mexer na tela atual.
+        """
+        janela = tk.Toplevel(self.root)
+        janela.title("EcoScore - Diagnóstico")
+        janela.geometry("900x400")
 
-        # calcula nível correto a partir dos pontos
-        nivel_calculado = max(1, (pontos_totais // 100) + 1)
+        texto = tk.Text(janela, wrap='none', font=('Consolas', 9))
+        texto.pack(expand=True, fill='both', padx=10, pady=(10, 0))
 
-        # se já está igual, não precisa fazer nada
-        if nivel_calculado == nivel_atual:
-            return
+        def atualizar():
+            texto.configure(state='normal')
+            texto.delete('1.0', tk.END)
+            texto.insert('1.0', self.metricas.texto())
+            texto.configure(state='disabled')
 
-        # Atualiza localmente
-        self.usuario['nivel'] = nivel_calculado
-
-        # Tenta atualizar no backend também (se sua API aceitar PUT /usuarios/<id>)
-        payload = {
-            'nivel': nivel_calculado
-        }
-        _ = self.fazer_requisicao(
-            'PUT',
-            f'/usuarios/{self.usuario_id}',
-            payload
-        )
+        ttk.Button(janela,
+                   text="Atualizar",
+                   style='Secondary.TButton',
+                   command=atualizar).pack(anchor='e', padx=10, pady=10)
+        atualizar()
 
-    def calcular_pontos_para_proximo_nivel(self):
+    def carregar_historico_local(self):
         """
-        Calcula quantos pontos faltam pra subir de nível.
-        Regra: cada nível exige (nivel_atual * 100) pontos totais.
-        Usa self.usuario['pontuacao_total'] que vem da API.
+        Começa os índices de histórico do usuário logado: vazio pras
+        recentes (vêm da API conforme as telas pedem) e com o que sobrou
+        na fila pras pendentes.
         """
-        nivel_atual = self.usuario.get('nivel', 1)
-        pontos_totais = self.usuario.get('pontuacao_total', 0)
-        alvo = nivel_atual * 100
-        faltam = max(0, alvo - pontos_totais)
-        return faltam
+        self.historico_recente = IndiceHistorico()
+        self.historico_pendente = IndiceHistorico(
+            dict(atividade, pendente=True) for atividade in self.fila.pendentes(self.usuario_id))
 
-    # -------------------------------------------------
-    # CÁLCULO DE ESTATÍSTICAS (para tela Estatísticas)
-    # -------------------------------------------------
+    def definir_usuario(self, usuario):
+        """
+        Guarda o perfil vindo da API somando os pontos das atividades que
+        ainda estão na fila, pra tela já mostrar o que o usuário registrou.
+        """
+        for atividade in self.historico_pendente:
+            self.somar_atividade(usuario, atividade)
+        self.usuario = usuario
 
-    def calcular_estatisticas_usuario(self):
+    def somar_atividade(self, usuario, atividade):
         """
-        Monta estatísticas do usuário baseado no histórico de atividades.
-
-        Retorna um dicionário:
-        - pontos_hoje: soma só de hoje
-        - pontos_7dias: soma dos últimos 7 dias
-        - media_pontos: média de pontos por atividade
-        - categoria_top: categoria que mais pontuou no total
-        - ultimas_atividades: últimas 10 atividades ordenadas desc
-
-        OBS: Antes de calcular, atualiza self.usuario consultando a API
-        /usuarios/<id>.
-        """
-        # Atualiza dados do usuário pegando versão mais recente da API
-        dados = self.fazer_requisicao('GET', f'/usuarios/{self.usuario_id}')
-        if dados:
-            self.usuario = dados
-            # >>> NOVO: garante que nivel bate com pontos <<<
-            self.atualizar_nivel_local_e_api()
-
-        historico = self.usuario.get('historico', [])
-        if not isinstance(historico, list):
-            historico = []
-
-        # Função interna pra converter string de data pra datetime
-        def parse_dt(dt_str):
-            # Tenta ISO completo, ex: 2025-10-30T15:33:58.639381
-            try:
-                return datetime.fromisoformat(dt_str)
-            except Exception:
-                # Fallback pra formato "dd/mm/YYYY HH:MM"
-                try:
-                    return datetime.strptime(dt_str, "%d/%m/%Y %H:%M")
-                except Exception:
-                    return None
-
-        agora = datetime.now()
-        hoje_data = agora.date()
-        sete_dias_atras = agora - timedelta(days=7)
-
-        pontos_hoje = 0
-        pontos_7dias = 0
-        soma_pontos_total = 0
-        total_atividades = 0
-        pontos_por_categoria = {}
-
-        # Ordena histórico do mais recente pro mais antigo
-        historico_ordenado = sorted(
-            historico,
-            key=lambda x: x.get('data', ''),
-            reverse=True
-        )
+        Soma os pontos de uma atividade ainda não confirmada no perfil
+        local (total e categoria). O nível só muda quando o servidor
+        responder.
+        """
+        usuario['pontuacao_total'] = usuario.get('pontuacao_total', 0) + atividade['pontos']
+        categoria = usuario.get('categorias', {}).get(atividade['categoria'])
+        if categoria:
+            categoria['pontos'] += atividade['pontos']
 
-        for atv in historico_ordenado:
-            pts = atv.get('pontos', 0) or 0
-            cat = atv.get('categoria', 'Outros')
-            data_raw = atv.get('data')
-            dt = parse_dt(data_raw)
+    def sincronizar_fila(self):
+        """
+        Envia as atividades da fila em segundo plano, um lote por vez, até
+        ela esvaziar. Sem conexão, com conflito (409) ou erro 5xx do
+        servidor tenta de novo mais tarde, esperando cada vez mais (até
+        FILA_ESPERA_MAXIMA).
+        Um lote recusado inteiro (ErroRequisicao.definitivo) é reenviado
+        uma atividade por vez, e só a que for recusada sozinha sai da fila
+        e vai pra FilaOffline.recusadas.
+        """
+        if self._sincronizando or not self.usuario_id:
+            return
+        usuario_id = self.usuario_id
+        lote = self.fila.pendentes(usuario_id, FILA_LOTE)
+        if not lote:
+            return
+        if lote[0]['id'] in self._fila_um_a_um:
+            lote = lote[:1]
+        ids = [atividade['id'] for atividade in lote]
+        self._sincronizando = True
+
+        def ao_enviar(resultado):
+            self._sincronizando = False
+            resposta, erro = resultado
+            if erro and erro.definitivo and len(lote) > 1:
+                log.warning("Fila: lote de %s atividade(s) recusado pelo servidor (%s), "
+                            "enviando uma por vez", len(lote), erro.status)
+                self._fila_um_a_um.update(ids)
+                self.sincronizar_fila()
+                return
+            if erro and erro.definitivo:
+                log.error("Fila: atividade %s recusada pelo servidor (%s), guardada em recusadas",
+                          ids[0], erro.status)
+                self.fila.recusar(ids, erro[1])
+                self._fila_um_a_um.difference_update(ids)
+                self._espera_fila = FILA_ESPERA_INICIAL
+                if usuario_id == self.usuario_id:
+                    for atividade in lote:
+                        self.historico_pendente.remover(atividade['id'])
+                    if self.current_screen == 'principal':
+                        self.mostrar_tela_principal()
+                    self.sincronizar_fila()
+                return
+            if erro or not resposta:
+                log.warning("Fila: %s atividade(s) não enviada(s), nova tentativa em %ss",
+                            len(lote), self._espera_fila)
+                self.root.after(int(self._espera_fila * 1000), self.sincronizar_fila)
+                self._espera_fila = min(self._espera_fila * 2, FILA_ESPERA_MAXIMA)
+                return
+            self._espera_fila = FILA_ESPERA_INICIAL
+            self._fila_um_a_um.difference_update(ids)
+
+            # Aceitas (ou já gravadas antes) saem da fila. As recusadas
+            # também (mandar de novo daria o mesmo erro), mas ficam guardadas.
+            aceitas = []
+            for item in resposta.get('resultados', []):
+                if item.get('sucesso'):
+                    aceitas.append(item['atividade'])
+                else:
+                    log.warning("Fila: atividade %s recusada pelo servidor: %s",
+                                lote[item['indice']]['id'], item.get('erro'))
+                    self.fila.recusar([lote[item['indice']]['id']], item.get('erro'))
+            self.fila.remover(ids)
+
+            if usuario_id == self.usuario_id:
+                for atividade in lote:
+                    self.historico_pendente.remover(atividade['id'])
+                for atividade in aceitas:
+                    self.historico_recente.adicionar(atividade)
+                if resposta.get('usuario'):
+                    self.definir_usuario(resposta['usuario'])
+                if self.current_screen == 'principal':
+                    self.mostrar_tela_principal()
+                self.sincronizar_fila()
+
+        self.em_segundo_plano(
+            lambda: self.executar_requisicao('POST', f'/usuarios/{usuario_id}/atividades/lote', lote),
+            ao_enviar, cancelavel=False)
+
+    def carregar_termos(self):
+        """
+        Busca os termos aprendidos do usuário e recompila o motor de
+        pontuação com eles (em segundo plano).
+        """
+        self.motor = MotorPontuacao()
 
-            soma_pontos_total += pts
-            total_atividades += 1
+        def ao_buscar(termos):
+            if isinstance(termos, dict):
+                self.motor.atualizar_termos(termos)
 
-            # Agrupa pontuação por categoria
-            pontos_por_categoria[cat] = pontos_por_categoria.get(cat, 0) + pts
+        self.em_segundo_plano(
+            lambda: self.executar_requisicao('GET', f'/usuarios/{self.usuario_id}/termos')[0],
+            ao_buscar, cancelavel=False)
 
-            # Se a data é válida, conta no "hoje" e "7 dias"
-            if dt:
-                if dt.date() == hoje_data:
-                    pontos_hoje += pts
-                if dt >= sete_dias_atras:
-                    pontos_7dias += pts
+    def fazer_logout(self):
+        """
+        Reseta dados locais de usuário e volta pra tela de login.
+        """
+        self.usuario = None
+        self.usuario_id = None
+        self.cache.limpar()
+        self.carregar_historico_local()
+        self.motor = MotorPontuacao()
+        self.mostrar_tela_login()
 
-        # Média de pontos por atividade
-        if total_atividades > 0:
-            media_pontos = soma_pontos_total / total_atividades
-        else:
-            media_pontos = 0
+    # -------------------------------------------------
+    # NÍVEL (calculado pelo servidor a partir da pontuação)
+    # -------------------------------------------------
 
-        # Categoria com mais pontos acumulados
-        if pontos_por_categoria:
-            categoria_top = max(pontos_por_categoria, key=pontos_por_categoria.get)
-        else:
-            categoria_top = "—"
+    def calcular_pontos_para_proximo_nivel(self):
+        """
+        Quantos pontos faltam pra subir de nível. A regra fica no
+        servidor, que manda a conta pronta junto com o perfil.
+        """
+        return self.usuario.get('faltam_proximo_nivel', 0)
 
-        # Últimas 10 atividades
-        ultimas_atividades = historico_ordenado[:10]
+    # -------------------------------------------------
+    # CÁLCULO DE ESTATÍSTICAS (para tela Estatísticas)
+    # -------------------------------------------------
 
-        return {
-            'pontos_hoje': pontos_hoje,
-            'pontos_7dias': pontos_7dias,
-            'media_pontos': media_pontos,
-            'categoria_top': categoria_top,
-            'ultimas_atividades': ultimas_atividades
-        }
+    def calcular_estatisticas_usuario(self):
+        """
+        Busca o usuário atualizado e as estatísticas dele, já calculadas
+        pelo servidor. Roda fora da thread do Tk (ver mostrar_estatisticas).
+
+        Retorna (usuario, stats, erro):
+        - usuario: perfil atualizado (ou None se a requisição falhou)
+        - stats: dicionário com
+            - pontos_hoje: soma só de hoje
+            - pontos_7dias: soma dos últimos 7 dias (hoje incluso)
+            - media_pontos: média de pontos por atividade
+            - categoria_top: categoria que mais pontuou no total
+            - ultimas_atividades: últimas 10 atividades ordenadas desc
+        - erro: primeiro erro das requisições, ou None
+        """
+        usuario, erro_usuario = self.executar_requisicao('GET', f'/usuarios/{self.usuario_id}')
+
+        # O servidor mantém os totais por dia/categoria; manda o "hoje" local
+        hoje = datetime.now().date().isoformat()
+        stats, erro_stats = self.executar_requisicao(
+            'GET', f'/usuarios/{self.usuario_id}/estatisticas?ultimas=10&hoje={hoje}')
+        if not isinstance(stats, dict):
+            stats = {}
+
+        return usuario, {
+            'pontos_hoje': stats.get('pontos_hoje', 0),
+            'pontos_7dias': stats.get('pontos_7dias', 0),
+            'media_pontos': stats.get('media_pontos', 0),
+            'total_atividades': stats.get('total_atividades', 0),
+            'categoria_top': stats.get('categoria_top', "—"),
+            'pontos_por_categoria': stats.get('pontos_por_categoria', {}),
+            'ultimas_atividades': stats.get('ultimas_atividades', [])
+        }, erro_usuario or erro_stats
+
+    def somar_pendentes(self, stats):
+        """
+        Junta às estatísticas do servidor as atividades que ainda estão na
+        fila, usando as somas por dia e categoria do índice local. A tabela
+        de últimas atividades também sai do índice.
+        """
+        for atividade in stats['ultimas_atividades']:
+            self.historico_recente.adicionar(atividade)
+        stats['ultimas_atividades'] = ultimas_de(
+            (self.historico_pendente, self.historico_recente), len(stats['ultimas_atividades']) or 10)
+
+        pendente = self.historico_pendente
+        if not len(pendente):
+            return stats
+
+        hoje = datetime.now().date()
+        stats['pontos_hoje'] += pendente.pontos_periodo(hoje, hoje)
+        stats['pontos_7dias'] += pendente.pontos_periodo(hoje - timedelta(days=6), hoje)
+
+        pontos, quantidade = pendente.totais()
+        total = stats['total_atividades']
+        stats['media_pontos'] = (stats['media_pontos'] * total + pontos) / (total + quantidade)
+        stats['total_atividades'] = total + quantidade
+
+        por_categoria = dict(stats['pontos_por_categoria'])
+        for categoria, (pontos_cat, _) in pendente.por_categoria.items():
+            por_categoria[categoria] = por_categoria.get(categoria, 0) + pontos_cat
+        stats['pontos_por_categoria'] = por_categoria
+        stats['categoria_top'] = max(por_categoria, key=por_categoria.get)
+        return stats
 
     # -------------------------------------------------
     # COMPONENTES DE UI REUTILIZÁVEIS
     # -------------------------------------------------
 
-    def montar_layout_base(self, titulo_header):
+    def montar_layout_base(self):
         """
-        Monta a estrutura padrão da tela:
+        Monta a estrutura fixa das telas, uma vez só por login:
         - header superior (azul escuro)
         - sidebar lateral com botões de navegação
-        - área branca principal (content)
-
-        Retorna: o frame 'content' onde a tela específica vai desenhar coisas.
+        - área branca principal, onde as telas ficam empilhadas
         """
-        # limpa tela antes
+        # limpa tela antes (login/cadastro)
         self.limpar_tela()
 
         # HEADER (barra do topo com título da tela)
         header = ttk.Frame(self.root, style='Header.TFrame')
         header.pack(fill='x')
-        ttk.Label(header,
-                  text=titulo_header,
-                  style='Title.TLabel').pack(pady=15)
+        self.titulo_header = ttk.Label(header,
+                                       text="",
+                                       style='Title.TLabel')
+        self.titulo_header.pack(pady=15)
 
         # FRAME PRINCIPAL (sidebar + conteúdo)
         main_frame = ttk.Frame(self.root, style='ContentOuter.TFrame')
@@ -560,16 +1461,73 @@ class ScoreAmbientalClient:
                        style='Nav.TButton',
                        command=comando).pack(fill='x', pady=2, ipady=8)
 
-        # ÁREA DE CONTEÚDO PRINCIPAL (card branco grande)
-        content = ttk.Frame(main_frame, style='Card.TFrame')
-        content.pack(expand=True, fill='both')
+        # ÁREA DE CONTEÚDO PRINCIPAL (card branco grande); todas as telas
+        # ocupam a mesma célula do grid
+        self.layout = ttk.Frame(main_frame, style='Card.TFrame')
+        self.layout.pack(expand=True, fill='both')
+        self.layout.grid_rowconfigure(0, weight=1)
+        self.layout.grid_columnconfigure(0, weight=1)
 
-        return content
+    def abrir_tela(self, nome, titulo_header, recriar=False):
+        """
+        Traz a tela 'nome' pra frente, criando o frame dela só na primeira
+        vez (e o layout base, se ainda não existe).
+
+        Retorna (frame, nova): nova=True quando o frame acabou de ser
+        criado e a tela precisa montar os widgets fixos dela. Com
+        recriar=True o frame antigo é descartado (ex: formulário que deve
+        voltar limpo).
+        """
+        self.trocar_tela()
+        if self.layout is None:
+            self.montar_layout_base()
+        self.titulo_header.configure(text=titulo_header)
+
+        frame = self.telas.get(nome)
+        if frame is not None and recriar:
+            frame.destroy()
+            frame = None
+
+        nova = frame is None
+        if nova:
+            frame = ttk.Frame(self.layout, style='Card.TFrame')
+            frame.grid(row=0, column=0, sticky='nsew')
+            self.telas[nome] = frame
+            self.widgets[nome] = {}
+
+        frame.tkraise()
+        self.current_screen = nome
+        return frame, nova
+
+    def redesenhar_se_mudou(self, chave, dados, frame, desenhar):
+        """
+        Apaga o conteúdo de 'frame' e chama desenhar(frame, dados), mas
+        só se 'dados' mudou desde o último desenho com essa chave.
+        """
+        if chave in self.dados_desenhados and self.dados_desenhados[chave] == dados:
+            return
+        self.dados_desenhados[chave] = dados
+        for filho in frame.winfo_children():
+            filho.destroy()
+        desenhar(frame, dados)
+
+    def mostrar_carregando(self, parent, texto="Carregando..."):
+        """
+        Texto provisório enquanto os dados da tela chegam da API.
+        Some no primeiro redesenho do frame (ver redesenhar_se_mudou).
+        """
+        label = ttk.Label(parent,
+                          text=texto,
+                          style='Muted.TLabel')
+        label.pack(anchor='w', padx=20, pady=20)
+        return label
 
     def criar_metric_card(self, parent, title, value, subtitle, color_hex):
         """
         Cria um card pequeno de métrica (título, valor grande, subtítulo).
         Usado no dashboard e na tela Estatísticas.
+
+        Retorna os labels (valor, subtítulo), pra atualizar depois.
         """
         card = ttk.Frame(parent, style='Card.TFrame')
         card.pack(side='left', expand=True, fill='both', padx=5, pady=5)
@@ -580,27 +1538,30 @@ class ScoreAmbientalClient:
                   foreground=color_hex,
                   background='white').pack(anchor='w', padx=15, pady=(15, 5))
 
-        ttk.Label(card,
-                  text=value,
-                  style='MetricValue.TLabel',
-                  foreground=color_hex,
-                  background='white').pack(anchor='w', padx=15, pady=5)
+        valor = ttk.Label(card,
+                          text=value,
+                          style='MetricValue.TLabel',
+                          foreground=color_hex,
+                          background='white')
+        valor.pack(anchor='w', padx=15, pady=5)
 
-        ttk.Label(card,
-                  text=subtitle,
-                  style='Subtitle.TLabel',
-                  background='white').pack(anchor='w', padx=15, pady=(0, 15))
+        subtitulo = ttk.Label(card,
+                              text=subtitle,
+                              style='Subtitle.TLabel',
+                              background='white')
+        subtitulo.pack(anchor='w', padx=15, pady=(0, 15))
 
         # Barrinha de cor no rodapé do card
         bar = ttk.Frame(card, style='ColorBar.TFrame', height=4)
         bar.pack(side='bottom', fill='x')
 
-        return card
+        return valor, subtitulo
 
-    def bloc_atividades_recentes(self, parent, limit=5):
+    def bloc_atividades_recentes(self, parent):
         """
         Bloco que mostra uma lista das atividades mais recentes do usuário
-        (dentro da Home/dashboard).
+        (dentro da Home/dashboard). Retorna o frame da lista, que
+        atualizar_atividades_recentes preenche.
         """
         bloco = ttk.Frame(parent, style='Card.TFrame')
         bloco.pack(fill='both', expand=True, padx=10, pady=10)
@@ -609,34 +1570,50 @@ class ScoreAmbientalClient:
                   text="📅 Atividades Recentes",
                   style='SectionTitle.TLabel').pack(anchor='w', pady=(10, 5), padx=10)
 
-        # A API pode mandar 'historico' (lista de atividades)
-        # ou 'atividades' dependendo de como você estruturou
-        atividades = []
-        if self.usuario and self.usuario.get('atividades'):
-            atividades = self.usuario.get('atividades', [])
-        elif self.usuario and self.usuario.get('historico'):
-            atividades = self.usuario.get('historico', [])
+        lista = ttk.Frame(bloco, style='Card.TFrame')
+        lista.pack(fill='both', expand=True)
+        self.mostrar_carregando(lista)
+        return lista
+
+    def atualizar_atividades_recentes(self, lista, limit=5):
+        """
+        Pede à API só o que é mais novo que a atividade mais recente já no
+        índice (até 'limit'), junta com as que ainda estão na fila
+        (marcadas como pendentes) e redesenha a lista se algo mudou.
+        """
+        endpoint = f'/usuarios/{self.usuario_id}/historico?limit={limit}'
+        mais_recente = self.historico_recente.mais_recente()
+        if mais_recente:
+            endpoint += f"&since={quote(mais_recente['data'])}"
+
+        def ao_buscar(atividades):
+            for atividade in atividades or []:
+                self.historico_recente.adicionar(atividade)
+            recentes = ultimas_de((self.historico_pendente, self.historico_recente), limit)
+            self.redesenhar_se_mudou('atividades_recentes', recentes, lista,
+                                     self.preencher_atividades_recentes)
+
+        self.requisitar_async('GET', endpoint, ao_concluir=ao_buscar)
 
+    def preencher_atividades_recentes(self, bloco, atividades):
+        """
+        Desenha as linhas do bloco de atividades recentes.
+        """
         # Se não tem nada ainda
         if not atividades:
             ttk.Label(bloco,
                       text="Nenhuma atividade registrada ainda.",
                       style='Text.TLabel',
                       background='white').pack(pady=20, padx=10, anchor='w')
-            return bloco
-
-        # Ordena mais recentes primeiro e limita
-        atividades_ordenadas = sorted(
-            atividades,
-            key=lambda x: x.get('data', ''),
-            reverse=True
-        )[:limit]
+            return
 
         # Monta linha a linha
-        for atv in atividades_ordenadas:
+        for atv in atividades:
             data_iso = atv.get('data', '')
             # só mostra AAAA-MM-DD
             data_fmt = data_iso.split('T')[0] if 'T' in data_iso else data_iso
+            if atv.get('pendente'):
+                data_fmt += " · aguardando envio"
 
             desc = atv.get('descricao', 'Sem descrição')
             pontos = atv.get('pontos', 0)
@@ -662,8 +1639,6 @@ class ScoreAmbientalClient:
                       wraplength=600,
                       justify='left').pack(anchor='w', pady=(2, 0))
 
-        return bloco
-
     # -------------------------------------------------
     # TELAS
     # -------------------------------------------------
@@ -735,7 +1710,6 @@ class ScoreAmbientalClient:
         Dispara POST /login com email e senha.
         Se sucesso:
           - salva self.usuario_id e self.usuario
-          - atualiza nível do usuário com base nos pontos
           - mostra o dashboard principal
         Se falha:
           - mostra popup de erro
@@ -745,19 +1719,23 @@ class ScoreAmbientalClient:
             return
 
         dados = {'email': email, 'senha': senha}
-        response = self.fazer_requisicao('POST', '/login', dados, auth_required=False)
 
-        if response and response.get('sucesso'):
-            # API precisa devolver: {sucesso: True, usuario_id: "...", usuario: {...}}
-            self.usuario_id = response.get('usuario_id')
-            self.usuario = response.get('usuario', {})
+        def ao_responder(response):
+            if response and response.get('sucesso'):
+                # API precisa devolver: {sucesso: True, usuario_id: "...", usuario: {...}}
+                self.usuario_id = response.get('usuario_id')
+                self.carregar_historico_local()
+                self.definir_usuario(response.get('usuario', {}))
+                self.carregar_termos()
 
-            # >>> NOVO: garante que nivel bate com pontos <<<
-            self.atualizar_nivel_local_e_api()
+                # Manda o que ficou na fila de outra sessão
+                self.sincronizar_fila()
+                self.mostrar_tela_principal()
+            else:
+                messagebox.showerror("Erro de Login", "Email ou senha inválidos.")
 
-            self.mostrar_tela_principal()
-        else:
-            messagebox.showerror("Erro de Login", "Email ou senha inválidos.")
+        self.requisitar_async('POST', '/login', dados, ao_concluir=ao_responder,
+                              auth_required=False)
 
     # CADASTRO ----------------------------------------
     def mostrar_tela_cadastro(self):
@@ -826,13 +1804,16 @@ class ScoreAmbientalClient:
                 return
 
             dados = {'nome': nome, 'email': email, 'senha': senha}
-            resposta = self.fazer_requisicao('POST', '/cadastrar', dados, auth_required=False)
 
-            if resposta and resposta.get('sucesso'):
-                messagebox.showinfo("Sucesso", "Cadastro realizado! Faça login.")
-                self.mostrar_tela_login()
-            else:
-                messagebox.showerror("Erro", "Falha ao cadastrar. Tente novamente.")
+            def ao_responder(resposta):
+                if resposta and resposta.get('sucesso'):
+                    messagebox.showinfo("Sucesso", "Cadastro realizado! Faça login.")
+                    self.mostrar_tela_login()
+                else:
+                    messagebox.showerror("Erro", "Falha ao cadastrar. Tente novamente.")
+
+            self.requisitar_async('POST', '/cadastrar', dados, ao_concluir=ao_responder,
+                                  auth_required=False)
 
         # Botões de ação
         btn_frame = ttk.Frame(form_frame, style='Card.TFrame')
@@ -863,83 +1844,93 @@ class ScoreAmbientalClient:
         - Métricas básicas (pontuação total / nível / quanto falta p/ próximo nível)
         - Atividades recentes
         - Rodapé
-        """
-        content = self.montar_layout_base("🌱 Meu Score Ambiental")
 
-        # Boas-vindas
-        welcome_frame = ttk.Frame(content, style='Card.TFrame')
-        welcome_frame.pack(fill='x', padx=10, pady=10)
-
-        nome_user = self.usuario.get('nome', 'Usuário')
-        ttk.Label(welcome_frame,
-                  text=f"Olá, {nome_user}!",
-                  style='SectionTitle.TLabel').pack(anchor='w', pady=(10, 5), padx=10)
+        Os widgets são montados na primeira vez; depois só os valores mudam.
+        """
+        content, nova = self.abrir_tela('principal', "🌱 Meu Score Ambiental")
+        w = self.widgets['principal']
 
-        ttk.Label(welcome_frame,
-                  text="Bem-vindo ao seu painel de controle ambiental.",
-                  style='Text.TLabel',
-                  background='white').pack(anchor='w', padx=10, pady=(0, 10))
+        if nova:
+            # Boas-vindas
+            welcome_frame = ttk.Frame(content, style='Card.TFrame')
+            welcome_frame.pack(fill='x', padx=10, pady=10)
 
-        # Métricas principais
-        metrics_frame = ttk.Frame(content, style='Card.TFrame')
-        metrics_frame.pack(fill='x', padx=10, pady=10)
+            w['ola'] = ttk.Label(welcome_frame,
+                                 text="",
+                                 style='SectionTitle.TLabel')
+            w['ola'].pack(anchor='w', pady=(10, 5), padx=10)
 
-        ttk.Label(metrics_frame,
-                  text="📊 Suas Métricas",
-                  style='SectionTitle.TLabel').pack(anchor='w', pady=(10, 5), padx=10)
-
-        metrics_row = ttk.Frame(metrics_frame, style='Card.TFrame')
-        metrics_row.pack(fill='x', padx=10, pady=(0, 10))
+            ttk.Label(welcome_frame,
+                      text="Bem-vindo ao seu painel de controle ambiental.",
+                      style='Text.TLabel',
+                      background='white').pack(anchor='w', padx=10, pady=(0, 10))
+
+            # Métricas principais
+            metrics_frame = ttk.Frame(content, style='Card.TFrame')
+            metrics_frame.pack(fill='x', padx=10, pady=10)
+
+            ttk.Label(metrics_frame,
+                      text="📊 Suas Métricas",
+                      style='SectionTitle.TLabel').pack(anchor='w', pady=(10, 5), padx=10)
+
+            metrics_row = ttk.Frame(metrics_frame, style='Card.TFrame')
+            metrics_row.pack(fill='x', padx=10, pady=(0, 10))
+
+            # Card: Pontuação Total
+            w['pontos'], _ = self.criar_metric_card(
+                metrics_row,
+                "Pontuação Total",
+                "",
+                "Pontos acumulados",
+                COLORS['primary']
+            )
+
+            # Card: Nível Atual
+            w['nivel'], w['nivel_sub'] = self.criar_metric_card(
+                metrics_row,
+                "Nível Atual",
+                "",
+                "",
+                COLORS['secondary']
+            )
+
+            # Card: Quanto falta pro próximo nível
+            w['faltam'], _ = self.criar_metric_card(
+                metrics_row,
+                "Próximo Nível",
+                "",
+                "Faltam para subir de nível",
+                COLORS['success']
+            )
+
+            # Rodapé fixo embaixo
+            footer = ttk.Frame(content, style='Footer.TFrame')
+            footer.pack(side='bottom', fill='x')
+            ttk.Label(footer,
+                      text="© 2025 EcoScore - Todos os direitos reservados",
+                      style='Footer.TLabel').pack(pady=5)
+
+            # Bloco de atividades recentes
+            w['recentes'] = self.bloc_atividades_recentes(content)
 
-        pontos_totais = self.usuario.get('pontuacao_total', 0)
         nivel_atual = self.usuario.get('nivel', 1)
-        faltam = self.calcular_pontos_para_proximo_nivel()
-
-        # Card: Pontuação Total
-        self.criar_metric_card(
-            metrics_row,
-            "Pontuação Total",
-            str(pontos_totais),
-            "Pontos acumulados",
-            COLORS['primary']
-        )
+        w['ola'].configure(text=f"Olá, {self.usuario.get('nome', 'Usuário')}!")
+        w['pontos'].configure(text=str(self.usuario.get('pontuacao_total', 0)))
+        w['nivel'].configure(text=str(nivel_atual))
+        w['nivel_sub'].configure(text=f"Nível {nivel_atual}")
+        w['faltam'].configure(text=f"+{self.calcular_pontos_para_proximo_nivel()} pts")
 
-        # Card: Nível Atual
-        self.criar_metric_card(
-            metrics_row,
-            "Nível Atual",
-            str(nivel_atual),
-            f"Nível {nivel_atual}",
-            COLORS['secondary']
-        )
-
-        # Card: Quanto falta pro próximo nível
-        self.criar_metric_card(
-            metrics_row,
-            "Próximo Nível",
-            f"+{faltam} pts",
-            "Faltam para subir de nível",
-            COLORS['success']
-        )
-
-        # Bloco de atividades recentes
-        self.bloc_atividades_recentes(content, limit=5)
-
-        # Rodapé fixo embaixo
-        footer = ttk.Frame(self.root, style='Footer.TFrame')
-        footer.pack(side='bottom', fill='x')
-        ttk.Label(footer,
-                  text="© 2025 EcoScore - Todos os direitos reservados",
-                  style='Footer.TLabel').pack(pady=5)
+        self.atualizar_atividades_recentes(w['recentes'], limit=5)
 
     # REGISTRAR ATIVIDADE ----------------------------
     def mostrar_tela_registro(self):
         """
-        Tela para criar uma nova atividade e mandar pro backend.
-        Faz POST /usuarios/<id>/atividades
-        e depois atualiza os dados do usuário.
+        Tela para criar uma nova atividade. Ela entra na fila local e é
+        enviada pro backend em segundo plano (ver sincronizar_fila).
+
+        O formulário é remontado a cada visita, pra sempre começar limpo.
         """
-        content = self.montar_layout_base("📝 Registrar Atividade")
+        content, _ = self.abrir_tela('registro', "📝 Registrar Atividade", recriar=True)
 
         form_frame = ttk.Frame(content, style='Card.TFrame')
         form_frame.pack(padx=40, pady=30, fill='both', expand=True)
@@ -998,42 +1989,30 @@ class ScoreAmbientalClient:
                                  background='white')
         pontos_label.grid(row=3, column=1, pady=5, sticky='w')
 
-        # Função local: gera pontuação com base em descrição+categoria
-        def calcular_pontuacao_descricao(descricao, categoria):
-            """
-            Regrinha simples para gerar pontos:
-            - 2 pontos por palavra digitada
-            - bônus dependendo da categoria
-            - mínimo 1 e máximo 50
-            """
-            PONTOS_POR_PALAVRA = 2
-            BONUS_POR_CATEGORIA = {
-                'reciclagem': 5,
-                'reutilizacao': 5,
-                'economia_agua': 7,
-                'economia_energia': 7,
-                'mobilidade': 5,
-                'outros': 2
-            }
-            num_palavras = len(descricao.split())
-            pontos_local = num_palavras * PONTOS_POR_PALAVRA
-            pontos_local += BONUS_POR_CATEGORIA.get(categoria.lower().replace(" ", "_"), 0)
-            pontos_local = max(1, min(pontos_local, 50))
-            return pontos_local
+        # Atualiza label de pontos enquanto o usuário digita. O cálculo
+        # espera ATRASO_PONTUACAO_MS sem teclas novas, em vez de rodar a
+        # cada tecla.
+        agendado = [None]
 
-        # Atualiza label de pontos em tempo real
         def atualizar_pontuacao(event=None):
+            agendado[0] = None
             descricao = descricao_text.get("1.0", tk.END).strip()
             categoria = categoria_var.get()
+
             if descricao and categoria:
-                pontos_calc = calcular_pontuacao_descricao(descricao, categoria)
+                pontos_calc = self.motor.pontuar(descricao, categoria)
                 pontos_var.set(str(pontos_calc))
                 pontos_label.config(text=f"{pontos_calc} pontos")
             else:
                 pontos_var.set("0")
                 pontos_label.config(text="0 pontos")
 
-        descricao_text.bind('<KeyRelease>', atualizar_pontuacao)
+        def agendar_pontuacao(event=None):
+            if agendado[0] is not None:
+                self.root.after_cancel(agendado[0])
+            agendado[0] = self.root.after(ATRASO_PONTUACAO_MS, atualizar_pontuacao)
+
+        descricao_text.bind('<KeyRelease>', agendar_pontuacao)
         categoria_combo.bind('<<ComboboxSelected>>', atualizar_pontuacao)
 
         # Botões Salvar / Cancelar
@@ -1042,12 +2021,14 @@ class ScoreAmbientalClient:
 
         def salvar_atividade():
             """
-            Monta o objeto da atividade e envia pro backend.
-            Depois atualiza o usuário e volta pro dashboard.
+            Monta o objeto da atividade, guarda na fila e volta pro
+            dashboard, que já mostra os pontos novos. O envio pro backend
+            acontece em segundo plano, mesmo sem conexão agora.
             """
             descricao = descricao_text.get("1.0", tk.END).strip()
             categoria = categoria_var.get()
-            pontos = int(pontos_var.get()) if pontos_var.get().isdigit() else 0
+            # Calcula na hora: a estimativa na tela pode estar esperando o atraso
+            pontos = self.motor.pontuar(descricao, categoria) if descricao and categoria else 0
 
             # Valida
             if not descricao or not categoria:
@@ -1058,38 +2039,23 @@ class ScoreAmbientalClient:
                 return
 
             dados = {
+                'id': str(uuid.uuid4()),  # o servidor usa pra ignorar reenvios
                 'categoria': categoria,
                 'descricao': descricao,
                 'pontos': pontos,
                 'data': datetime.now().isoformat()
             }
 
-            # POST /usuarios/<id>/atividades
-            resposta = self.fazer_requisicao('POST',
-                                             f'/usuarios/{self.usuario_id}/atividades',
-                                             dados)
-
-            # Se a API devolveu um objeto com 'id', assumimos sucesso
-            if resposta and resposta.get('id'):
-                # Atualiza dados do usuário localmente
-                user_atualizado = self.fazer_requisicao('GET', f'/usuarios/{self.usuario_id}')
-                if user_atualizado:
-                    self.usuario = user_atualizado
-
-                # >>> NOVO: garante que nivel bate com pontos <<<
-                self.atualizar_nivel_local_e_api()
-
-                messagebox.showinfo(
-                    "Sucesso",
-                    f"Atividade registrado! (+{pontos} pts)"
-                )
-                self.mostrar_tela_principal()
-            else:
-                # Falha: alertar usuário mas instruir a olhar terminal (onde tem debug)
-                messagebox.showerror(
-                    "Erro",
-                    "Não foi possível registrar a atividade. Veja o terminal para detalhes."
-                )
+            self.fila.adicionar(self.usuario_id, dados)
+            self.historico_pendente.adicionar(dict(dados, pendente=True))
+            self.somar_atividade(self.usuario, dados)
+            self.sincronizar_fila()
+
+            messagebox.showinfo(
+                "Sucesso",
+                f"Atividade registrado! (+{pontos} pts)"
+            )
+            self.mostrar_tela_principal()
 
         ttk.Button(btn_frame,
                    text="Salvar Atividade",
@@ -1112,64 +2078,86 @@ class ScoreAmbientalClient:
         A API precisa mandar self.usuario['categorias'] = {
             'Água': {'pontos': 42, 'meta': 100, ...}, ...
         }
+
+        Mostra na hora os dados que já temos e atualiza quando o usuário
+        chega da API.
         """
-        content = self.montar_layout_base("📊 Meu Progresso")
+        content, nova = self.abrir_tela('progresso', "📊 Meu Progresso")
+        w = self.widgets['progresso']
 
-        # Garante dados atualizados antes de exibir
-        resposta = self.fazer_requisicao('GET', f'/usuarios/{self.usuario_id}')
-        if resposta:
-            self.usuario = resposta
+        if nova:
+            frame_progresso = ttk.Frame(content, style='Card.TFrame')
+            frame_progresso.pack(pady=20, padx=20, fill='x')
 
-            # >>> NOVO: garante que nivel bate com pontos <<<
-            self.atualizar_nivel_local_e_api()
+            ttk.Label(frame_progresso,
+                      text="Progresso por Categoria",
+                      style='SectionTitle.TLabel').pack(anchor='w', pady=(0, 15))
 
-        frame_progresso = ttk.Frame(content, style='Card.TFrame')
-        frame_progresso.pack(pady=20, padx=20, fill='x')
+            # Grid com nome da categoria, barra, e texto "42/100 (42.0%)"
+            w['grid'] = ttk.Frame(frame_progresso, style='Card.TFrame')
+            w['grid'].pack(fill='x')
+            w['linhas'] = {}  # categoria -> (barra, texto)
 
-        ttk.Label(frame_progresso,
-                  text="Progresso por Categoria",
-                  style='SectionTitle.TLabel').pack(anchor='w', pady=(0, 15))
+        self.atualizar_progresso()
 
-        categorias_user = self.usuario.get('categorias', {})
+        def ao_responder(resposta):
+            if resposta:
+                self.definir_usuario(resposta)
+                self.atualizar_progresso()
+
+        # Garante dados atualizados
+        self.requisitar_async('GET', f'/usuarios/{self.usuario_id}', ao_concluir=ao_responder)
 
-        # Grid com nome da categoria, barra, e texto "42/100 (42.0%)"
-        grid_frame = ttk.Frame(frame_progresso, style='Card.TFrame')
-        grid_frame.pack(fill='x')
+    def atualizar_progresso(self):
+        """
+        Acerta as barras com self.usuario; só cria a linha de uma
+        categoria na primeira vez que ela aparece.
+        """
+        w = self.widgets['progresso']
+        categorias_user = self.usuario.get('categorias', {})
 
-        for i, (categoria, dados) in enumerate(categorias_user.items()):
+        for categoria, dados in categorias_user.items():
             pontos = dados.get('pontos', 0)
             meta = dados.get('meta', 0)
             progresso = (pontos / meta) * 100 if meta > 0 else 0
             progresso = min(100, progresso)
 
-            # Nome da categoria
-            ttk.Label(grid_frame,
-                      text=categoria,
-                      style='Text.TLabel',
-                      background='white',
-                      width=20).grid(row=i, column=0, pady=5, sticky='w')
-
-            # Barra de progresso personalizada por categoria
-            style_temp = ttk.Style()
-            style_name = f"{categoria}.Horizontal.TProgressbar"
-            style_temp.configure(style_name,
-                                 troughcolor='#f0f0f0',
-                                 background=COLORS['success'])
-
-            pb = ttk.Progressbar(grid_frame,
-                                 orient='horizontal',
-                                 length=300,
-                                 mode='determinate',
-                                 style=style_name)
+            if categoria not in w['linhas']:
+                i = len(w['linhas'])
+
+                # Nome da categoria
+                ttk.Label(w['grid'],
+                          text=categoria,
+                          style='Text.TLabel',
+                          background='white',
+                          width=20).grid(row=i, column=0, pady=5, sticky='w')
+
+                # Barra de progresso personalizada por categoria
+                style_temp = ttk.Style()
+                style_name = f"{categoria}.Horizontal.TProgressbar"
+                style_temp.configure(style_name,
+                                     troughcolor='#f0f0f0',
+                                     background=COLORS['success'])
+
+                pb = ttk.Progressbar(w['grid'],
+                                     orient='horizontal',
+                                     length=300,
+                                     mode='determinate',
+                                     style=style_name)
+                pb.grid(row=i, column=1, padx=10, pady=5, sticky='w')
+
+                # Texto ao lado da barra
+                texto = ttk.Label(w['grid'],
+                                  style='Text.TLabel',
+                                  background='white',
+                                  width=20)
+                texto.grid(row=i, column=2, padx=5, pady=5, sticky='w')
+
+                w['linhas'][categoria] = (pb, texto)
+
+            pb, texto = w['linhas'][categoria]
             pb['value'] = progresso
-            pb.grid(row=i, column=1, padx=10, pady=5, sticky='w')
-
-            # Texto ao lado da barra
-            ttk.Label(grid_frame,
-                      text=f"{pontos}/{meta} ({progresso:.1f}%)",
-                      style='Text.TLabel',
-                      background='white',
-                      width=20).grid(row=i, column=2, padx=5, pady=5, sticky='w')
+            texto.configure(text=f"{pontos}/{meta} ({progresso:.1f}%)")
 
     # ESTATÍSTICAS -----------------------------------
     def mostrar_estatisticas(self):
@@ -1182,112 +2170,144 @@ class ScoreAmbientalClient:
         - Categoria que mais pontuou
         - Tabela das últimas atividades
         """
-        content = self.montar_layout_base("📈 Estatísticas")
-
-        # Calcula estatísticas (isso já consulta a API p/ atualizar self.usuario)
-        stats = self.calcular_estatisticas_usuario()
-
-        # ---- Bloco Resumo (cards)
-        metrics_frame = ttk.Frame(content, style='Card.TFrame')
-        metrics_frame.pack(fill='x', padx=20, pady=(20, 10))
-
-        ttk.Label(metrics_frame,
-                  text="Resumo recente",
-                  style='SectionTitle.TLabel').pack(anchor='w', pady=(10, 5), padx=10)
-
-        metrics_row = ttk.Frame(metrics_frame, style='Card.TFrame')
-        metrics_row.pack(fill='x', padx=10, pady=(0, 10))
-
-        # Card: Pontos Hoje
-        self.criar_metric_card(
-            metrics_row,
-            "Pontos Hoje",
-            str(stats['pontos_hoje']),
-            "Somados no dia atual",
-            COLORS['primary']
-        )
+        content, nova = self.abrir_tela('estatisticas', "📈 Estatísticas")
+        w = self.widgets['estatisticas']
+
+        if nova:
+            # ---- Bloco Resumo (cards)
+            metrics_frame = ttk.Frame(content, style='Card.TFrame')
+            metrics_frame.pack(fill='x', padx=20, pady=(20, 10))
+
+            ttk.Label(metrics_frame,
+                      text="Resumo recente",
+                      style='SectionTitle.TLabel').pack(anchor='w', pady=(10, 5), padx=10)
+
+            metrics_row = ttk.Frame(metrics_frame, style='Card.TFrame')
+            metrics_row.pack(fill='x', padx=10, pady=(0, 10))
+
+            # Card: Pontos Hoje
+            w['hoje'], _ = self.criar_metric_card(
+                metrics_row,
+                "Pontos Hoje",
+                "…",
+                "Somados no dia atual",
+                COLORS['primary']
+            )
+
+            # Card: Últimos 7 dias
+            w['semana'], _ = self.criar_metric_card(
+                metrics_row,
+                "Últimos 7 dias",
+                "…",
+                "Total de pontos na última semana",
+                COLORS['secondary']
+            )
+
+            # Card: Média por Atividade
+            w['media'], _ = self.criar_metric_card(
+                metrics_row,
+                "Média / Atividade",
+                "…",
+                "Pontos médios por registro",
+                COLORS['success']
+            )
+
+            # ---- Bloco Categoria destaque
+            destaque_frame = ttk.Frame(content, style='Card.TFrame')
+            destaque_frame.pack(fill='x', padx=20, pady=(10, 10))
+
+            ttk.Label(destaque_frame,
+                      text="Categoria que mais pontuou",
+                      style='SectionTitle.TLabel').pack(anchor='w', pady=(10, 5), padx=10)
+
+            w['categoria_top'] = ttk.Label(destaque_frame,
+                                           text="…",
+                                           style='MetricValue.TLabel',
+                                           foreground=COLORS['warning'],
+                                           background='white')
+            w['categoria_top'].pack(anchor='w', padx=20, pady=(0, 15))
+
+            # ---- Bloco Últimas atividades (tabelinha)
+            ult_frame = ttk.Frame(content, style='Card.TFrame')
+            ult_frame.pack(fill='both', expand=True, padx=20, pady=(10, 20))
 
-        # Card: Últimos 7 dias
-        self.criar_metric_card(
-            metrics_row,
-            "Últimos 7 dias",
-            str(stats['pontos_7dias']),
-            "Total de pontos na última semana",
-            COLORS['secondary']
-        )
-
-        # Card: Média por Atividade
-        self.criar_metric_card(
-            metrics_row,
-            "Média / Atividade",
-            f"{stats['media_pontos']:.1f}",
-            "Pontos médios por registro",
-            COLORS['success']
-        )
-
-        # ---- Bloco Categoria destaque
-        destaque_frame = ttk.Frame(content, style='Card.TFrame')
-        destaque_frame.pack(fill='x', padx=20, pady=(10, 10))
-
-        ttk.Label(destaque_frame,
-                  text="Categoria que mais pontuou",
-                  style='SectionTitle.TLabel').pack(anchor='w', pady=(10, 5), padx=10)
+            ttk.Label(ult_frame,
+                      text="Últimas atividades registradas",
+                      style='SectionTitle.TLabel').pack(anchor='w', pady=(10, 5), padx=10)
 
-        ttk.Label(destaque_frame,
-                  text=stats['categoria_top'],
-                  style='MetricValue.TLabel',
-                  foreground=COLORS['warning'],
-                  background='white').pack(anchor='w', padx=20, pady=(0, 15))
+            w['tabela'] = ttk.Frame(ult_frame, style='Card.TFrame')
+            w['tabela'].pack(fill='both', expand=True)
+            self.mostrar_carregando(w['tabela'])
 
-        # ---- Bloco Últimas atividades (tabelinha)
-        ult_frame = ttk.Frame(content, style='Card.TFrame')
-        ult_frame.pack(fill='both', expand=True, padx=20, pady=(10, 20))
+        def ao_calcular(resultado):
+            usuario, stats, erro = resultado
+            if erro:
+                messagebox.showerror(*erro)
+            if usuario:
+                self.definir_usuario(usuario)
+            self.atualizar_estatisticas(self.somar_pendentes(stats))
 
-        ttk.Label(ult_frame,
-                  text="Últimas atividades registradas",
-                  style='SectionTitle.TLabel').pack(anchor='w', pady=(10, 5), padx=10)
+        # As duas consultas rodam fora da thread do Tk
+        self.em_segundo_plano(self.calcular_estatisticas_usuario, ao_calcular)
 
-        if not stats['ultimas_atividades']:
+    def atualizar_estatisticas(self, stats):
+        """
+        Troca os valores dos cards e, se mudou, a tabela de atividades.
+        """
+        w = self.widgets['estatisticas']
+        w['hoje'].configure(text=str(stats['pontos_hoje']))
+        w['semana'].configure(text=str(stats['pontos_7dias']))
+        w['media'].configure(text=f"{stats['media_pontos']:.1f}")
+        w['categoria_top'].configure(text=stats['categoria_top'])
+        self.redesenhar_se_mudou('ultimas_atividades', stats['ultimas_atividades'],
+                                 w['tabela'], self.desenhar_tabela_atividades)
+
+    def desenhar_tabela_atividades(self, ult_frame, atividades):
+        """
+        Tabela das últimas atividades (tela Estatísticas).
+        """
+        if not atividades:
             # Caso o usuário ainda não tenha atividades
             ttk.Label(ult_frame,
                       text="Nenhuma atividade registrada ainda.",
                       style='Text.TLabel',
                       background='white').pack(anchor='w', padx=20, pady=(0, 10))
-        else:
-            # Cabeçalho da tabela
-            header_row = ttk.Frame(ult_frame, style='Card.TFrame')
-            header_row.pack(fill='x', padx=15, pady=(0, 5))
-
-            ttk.Label(header_row, text="Data", style='FormLabel.TLabel',
-                      background='white', width=18).grid(row=0, column=0, sticky='w')
-            ttk.Label(header_row, text="Categoria", style='FormLabel.TLabel',
-                      background='white', width=18).grid(row=0, column=1, sticky='w')
-            ttk.Label(header_row, text="Descrição", style='FormLabel.TLabel',
-                      background='white', width=40).grid(row=0, column=2, sticky='w')
-            ttk.Label(header_row, text="Pontos", style='FormLabel.TLabel',
-                      background='white', width=10).grid(row=0, column=3, sticky='e')
-
-            # Linhas da tabela
-            for i, atv in enumerate(stats['ultimas_atividades'], start=1):
-                linha = ttk.Frame(ult_frame, style='Card.TFrame')
-                linha.pack(fill='x', padx=15, pady=2)
-
-                data_raw = atv.get('data', '')
-                # Formata a data pra ficar mais amigável visualmente
-                if "T" in data_raw:
-                    # "2025-10-30T15:33:58.639381" -> "2025-10-30 15:33:58"
-                    data_fmt = data_raw.replace("T", " ").split(".")[0]
-                else:
-                    data_fmt = data_raw
+            return
 
-                cat = atv.get('categoria', '—')
-                desc = atv.get('descricao', 'Sem descrição')
-                pts = atv.get('pontos', 0)
+        # Cabeçalho da tabela
+        header_row = ttk.Frame(ult_frame, style='Card.TFrame')
+        header_row.pack(fill='x', padx=15, pady=(0, 5))
+
+        ttk.Label(header_row, text="Data", style='FormLabel.TLabel',
+                  background='white', width=18).grid(row=0, column=0, sticky='w')
+        ttk.Label(header_row, text="Categoria", style='FormLabel.TLabel',
+                  background='white', width=18).grid(row=0, column=1, sticky='w')
+        ttk.Label(header_row, text="Descrição", style='FormLabel.TLabel',
+                  background='white', width=40).grid(row=0, column=2, sticky='w')
+        ttk.Label(header_row, text="Pontos", style='FormLabel.TLabel',
+                  background='white', width=10).grid(row=0, column=3, sticky='e')
+
+        # Linhas da tabela
+        for atv in atividades:
+            linha = ttk.Frame(ult_frame, style='Card.TFrame')
+            linha.pack(fill='x', padx=15, pady=2)
+
+            data_raw = atv.get('data', '')
+            # Formata a data pra ficar mais amigável visualmente
+            if "T" in data_raw:
+                # "2025-10-30T15:33:58.639381" -> "2025-10-30 15:33:58"
+                data_fmt = data_raw.replace("T", " ").split(".")[0]
+            else:
+                data_fmt = data_raw
+
+            cat = atv.get('categoria', '—')
+            desc = atv.get('descricao', 'Sem descrição')
+            pts = atv.get('pontos', 0)
 
-                tk.Label(linha, text=data_fmt, anchor='w', width=18, bg='white').grid(row=0, column=0, sticky='w')
-                tk.Label(linha, text=cat, anchor='w', width=18, bg='white').grid(row=0, column=1, sticky='w')
-                tk.Label(linha, text=desc, anchor='w', width=40, bg='white', justify='left', wraplength=400).grid(row=0, column=2, sticky='w')
-                tk.Label(linha, text=str(pts), anchor='e', width=10, bg='white').grid(row=0, column=3, sticky='e')
+            tk.Label(linha, text=data_fmt, anchor='w', width=18, bg='white').grid(row=0, column=0, sticky='w')
+            tk.Label(linha, text=cat, anchor='w', width=18, bg='white').grid(row=0, column=1, sticky='w')
+            tk.Label(linha, text=desc, anchor='w', width=40, bg='white', justify='left', wraplength=400).grid(row=0, column=2, sticky='w')
+            tk.Label(linha, text=str(pts), anchor='e', width=10, bg='white').grid(row=0, column=3, sticky='e')
 
     # CONFIGURAÇÕES ----------------------------------
     def mostrar_configuracoes(self):
@@ -1295,7 +2315,9 @@ class ScoreAmbientalClient:
         Tela de configurações de conta (placeholder ainda).
         Por enquanto só mostra um texto e um botão de logout.
         """
-        content = self.montar_layout_base("⚙️ Configurações")
+        content, nova = self.abrir_tela('configuracoes', "⚙️ Configurações")
+        if not nova:
+            return
 
         bloco = ttk.Frame(content, style='Card.TFrame')
         bloco.pack(fill='both', expand=True, padx=20, pady=20)
@@ -1317,93 +2339,98 @@ class ScoreAmbientalClient:
     # RANKING ----------------------------------------
     def mostrar_ranking(self):
         """
-        Tela de ranking geral.
-        Busca GET /ranking na API e lista:
+        Tela de ranking geral:
         - posição
         - nome
         - nível
         - pontuação total
-        Também destaca o usuário atual em azul claro.
+        A lista é virtual (ver ListaVirtual): as páginas de GET /ranking
+        só são buscadas quando a rolagem chega nelas. Abre já rolada até
+        o usuário atual, destacado em azul claro.
         """
-        content = self.montar_layout_base("🏆 Ranking")
-
-        ttk.Label(content,
-                  text="Ranking de Usuários",
-                  style='SectionTitle.TLabel').pack(anchor='w', pady=(20, 10), padx=20)
+        content, nova = self.abrir_tela('ranking', "🏆 Ranking")
+        w = self.widgets['ranking']
 
-        # Puxa ranking da API
-        resposta = self.fazer_requisicao('GET', '/ranking')
-        if not resposta:
+        if nova:
             ttk.Label(content,
-                      text="Não foi possível carregar o ranking.",
-                      style='Text.TLabel',
-                      background='white').pack(anchor='w', padx=20, pady=(0, 10))
-            return
-
-        # Área scrollável
-        container = ttk.Frame(content, style='Card.TFrame')
-        container.pack(fill='both', expand=True, padx=20, pady=10)
-
-        canvas = tk.Canvas(container, highlightthickness=0, bg='white')
-        scrollbar = ttk.Scrollbar(container, orient="vertical", command=canvas.yview)
-        scrollable_frame = ttk.Frame(canvas, style='Card.TFrame')
-
-        # Ajusta região de scroll conforme o conteúdo cresce
-        def on_configure(e):
-            canvas.configure(scrollregion=canvas.bbox("all"))
-
-        scrollable_frame.bind("<Configure>", on_configure)
-
-        # Cria uma "janela" dentro do canvas onde vai ficar nosso frame rolável
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-
-        # Cabeçalho da tabela (posição, nome, nível, pontos)
-        header_row = ttk.Frame(scrollable_frame, style='Card.TFrame')
-        header_row.grid(row=0, column=0, sticky='w', pady=(0, 10))
-
-        ttk.Label(header_row, text="Posição", style='FormLabel.TLabel',
-                  background='white', width=10).grid(row=0, column=0, padx=5, sticky='w')
-        ttk.Label(header_row, text="Nome", style='FormLabel.TLabel',
-                  background='white', width=30).grid(row=0, column=1, padx=5, sticky='w')
-        ttk.Label(header_row, text="Nível", style='FormLabel.TLabel',
-                  background='white', width=10).grid(row=0, column=2, padx=5, sticky='e')
-        ttk.Label(header_row, text="Pontuação", style='FormLabel.TLabel',
-                  background='white', width=15).grid(row=0, column=3, padx=5, sticky='e')
-
-        # Linhas do ranking
-        for i, usuario in enumerate(resposta, 1):
-            linha = ttk.Frame(scrollable_frame, style='Card.TFrame')
-            linha.grid(row=i, column=0, sticky='w')
-
-            # Se for o usuário logado, destaca com fundo azul claro
-            destaque = (usuario.get('id') == self.usuario_id)
-            bg_color = '#E3F2FD' if destaque else 'white'
+                      text="Ranking de Usuários",
+                      style='SectionTitle.TLabel').pack(anchor='w', pady=(20, 10), padx=20)
+
+            w['lista'] = ListaVirtual(
+                content,
+                colunas=[("Posição", 10, 'w'), ("Nome", 30, 'w'),
+                         ("Nível", 10, 'e'), ("Pontuação", 15, 'e')],
+                formatar=lambda u: (f"{u.get('posicao', '')}º", u.get('nome', ''),
+                                    str(u.get('nivel', '')), str(u.get('pontuacao_total', ''))),
+                pedir_pagina=self.pedir_pagina_ranking,
+                destacar=lambda u: u.get('id') == self.usuario_id,
+                tamanho_pagina=RANKING_TAMANHO_PAGINA,
+                max_paginas=RANKING_PAGINAS_EM_MEMORIA)
+            w['lista'].frame.pack(fill='both', expand=True, padx=20, pady=10)
+        else:
+            # Voltando pra tela: mostra o que já tinha e atualiza por cima
+            w['lista'].invalidar()
 
-            tk.Label(linha, text=f"{i}º", anchor='w', width=10, bg=bg_color).grid(
-                row=0, column=0, padx=5, pady=2, sticky='w')
+        def ao_buscar(resultado):
+            total, pagina, linhas, posicao, erro = resultado
+            if erro:
+                messagebox.showerror(*erro)
+                return
+            lista = w['lista']
+            lista.definir_total(total)
+            lista.receber_pagina(pagina, linhas)
+            if posicao:
+                lista.rolar_para(posicao - 1)
 
-            tk.Label(linha, text=usuario.get('nome', ''), anchor='w', width=30, bg=bg_color).grid(
-                row=0, column=1, padx=5, pady=2, sticky='w')
+        self.em_segundo_plano(self.buscar_inicio_ranking, ao_buscar)
 
-            tk.Label(linha, text=str(usuario.get('nivel', '')), anchor='e', width=10, bg=bg_color).grid(
-                row=0, column=2, padx=5, pady=2, sticky='e')
+    def endpoint_pagina_ranking(self, pagina):
+        return f'/ranking?offset={pagina * RANKING_TAMANHO_PAGINA}&limit={RANKING_TAMANHO_PAGINA}'
 
-            tk.Label(linha, text=str(usuario.get('pontuacao_total', '')), anchor='e', width=15, bg=bg_color).grid(
-                row=0, column=3, padx=5, pady=2, sticky='e')
+    def buscar_inicio_ranking(self):
+        """
+        Posição do usuário e a página do ranking onde ele está (a primeira,
+        se ele não aparece no ranking). Roda fora da thread do Tk.
+        Retorna (total, pagina, linhas, posicao, erro).
+        """
+        posicao = None
+        vizinhos, _ = self.executar_requisicao('GET', f'/ranking?around={self.usuario_id}&radius=0')
+        if vizinhos:
+            posicao = vizinhos[0].get('posicao')
+
+        pagina = (posicao - 1) // RANKING_TAMANHO_PAGINA if posicao else 0
+        linhas, erro, extras = self.executar_requisicao_com_headers(
+            'GET', self.endpoint_pagina_ranking(pagina))
+        total = int(extras.get('X-Total-Count', len(linhas or [])))
+        return total, pagina, linhas, posicao, erro
+
+    def pedir_pagina_ranking(self, pagina):
+        """
+        Chamado pela lista do ranking quando a rolagem chega numa página
+        que ela ainda não tem. Falhas só vão pro log: a página é pedida de
+        novo na próxima rolagem.
+        """
+        lista = self.widgets['ranking']['lista']
 
-        # Monta o scroll na tela
-        container.grid_columnconfigure(0, weight=1)
-        container.grid_rowconfigure(0, weight=1)
+        def ao_buscar(resultado):
+            linhas, erro, extras = resultado
+            if 'X-Total-Count' in extras:
+                lista.definir_total(int(extras['X-Total-Count']))
+            lista.receber_pagina(pagina, None if erro else linhas)
 
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        self.em_segundo_plano(
+            lambda: self.executar_requisicao_com_headers('GET', self.endpoint_pagina_ranking(pagina)),
+            ao_buscar)
 
 
 # ========================
 # MAIN / ENTRADA DO PROGRAMA
 # ========================
 if __name__ == "__main__":
+    # Log no terminal (ECOSCORE_LOG=INFO mostra cada requisição)
+    logging.basicConfig(level=os.environ.get('ECOSCORE_LOG', LOG_NIVEL_PADRAO).upper(),
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
     # Cria janela Tk
     root = tk.Tk()
 
@@ -1412,3 +2439,6 @@ if __name__ == "__main__":
 
     # Inicia o loop de eventos do Tkinter (janela interativa)
     root.mainloop()
+
+    # Janela fechada: encerra as requisições e conexões com a API
+    app.encerrar()